@@ -0,0 +1,115 @@
+import sys
+import time
+import zlib
+import sqlite3
+import argparse
+from bs4 import BeautifulSoup
+from typing import Any, Dict, List, Tuple
+from src.data_class import Links
+from src.event_parser import EventsParser
+
+
+class LegacyEventsParser(Links):
+    """
+    Fight page parsing as it was before the single pass extractor: a find_all per field
+    and a find_all per table cell. Kept as the reference for the output check.
+    """
+
+    def get_event_info(self, event_dict: Dict[str, str], soup: Any) -> Dict[str, str]:
+        for num, cls in enumerate([self.cls_fg_dt] * 2):
+            event_dict[f'f{num + 1}_status_fg'] = soup.find_all('div', class_=cls)[num].text.replace('\n', '')\
+                .strip().split(' ')[0]
+        for num in range(2):
+            event_dict[f'f{num + 1}_fullname'] = soup.find_all('a', class_=self.cls_person)[num].text.strip()
+        for num in range(2):
+            event_dict[f'f{num + 1}_url'] = soup.find_all('a', class_=self.cls_person)[num].get('href')
+        for num in range(2):
+            event_dict[f'f{num + 1}_nickname'] = soup.find_all('p', class_=self.cls_fight_details)[num].text\
+                .strip().replace('"', '')
+        event_dict['win_method'] = soup.find_all('i', {'style': 'font-style: normal'})[0].text.strip()
+        for num, (name, label) in enumerate([('round', 'Round:'), ('time', 'Time:'),
+                                             ('time_format', 'Time format:'), ('referee', 'Referee:')]):
+            event_dict[name] = soup.find_all('i', class_=self.cls_text)[num].text.replace('\n', '')\
+                .replace(label, '').strip()
+
+        data_block = soup.find_all('tr', class_='b-fight-details__table-row')
+        for fg_num in (1, 2):
+            event_dict = self.get_fight_info_per_rounds(event_dict, fg_num, data_block)
+
+        for num, chart in enumerate(self.charts_cols):
+            land_trg = soup.find_all('div', class_=self.cls_charts)[num].text.strip()
+            event_dict[f'f1_land_trg_{chart}'] = land_trg.replace('\n', '').replace('   ', '').split(' ')[0]
+            event_dict[f'f2_land_trg_{chart}'] = land_trg.replace('\n', '').replace('   ', '').split(' ')[2]
+
+        return event_dict
+
+    def get_fight_info_per_rounds(self, event_dict: Dict[str, str], fg_num: int, data_block: Any) -> Dict[str, str]:
+        event_rounds = int(event_dict['round'])
+        sig_num, i = event_rounds + 4, fg_num - 1
+
+        for name, ind in self.totals_cols:
+            event_dict[f'f{fg_num}_{name}'] = self.return_block(data_block, 1, ind, i)
+        for rnd in range(1, self.num_rounds + 1):
+            for name, ind in self.totals_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = self.return_block(data_block, rnd + 2, ind, i) \
+                    if rnd <= event_rounds else '---'
+        for name, ind in self.strikes_cols:
+            event_dict[f'f{fg_num}_{name}'] = self.return_block(data_block, sig_num, ind, i)
+        for rnd in range(1, self.num_rounds + 1):
+            for name, ind in self.strikes_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = self.return_block(data_block, sig_num + rnd + 1, ind, i) \
+                    if rnd <= event_rounds else '---'
+
+        return event_dict
+
+    def return_block(self, data_block: Any, num: int, ind: int, i: int) -> str:
+        return data_block[num].find_all('p', class_=self.cls)[ind + i].text.strip()
+
+
+def load_pages(cache_dir: str, limit: int) -> List[str]:
+    """
+    Load cached fight details pages.
+    :param cache_dir: directory of the html cache
+    :param limit: max number of pages
+    :return: list of pages html
+    """
+    conn = sqlite3.connect(f'{cache_dir}/pages.sqlite')
+    rows = conn.execute("SELECT body FROM pages WHERE url LIKE '%fight-details%' LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return [zlib.decompress(row[0]).decode('utf-8') for row in rows]
+
+
+def timeit(func: Any, pages: List[str]) -> Tuple[List[Dict[str, str]], float]:
+    """
+    :return: parsed pages and mean parse time of a page in ms
+    """
+    start = time.perf_counter()
+    result = [func(page) for page in pages]
+    return result, (time.perf_counter() - start) / len(pages) * 1000
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Fight page parsing micro-benchmark')
+    arg_parser.add_argument('--cache-dir', default='cache', help='directory of the html cache with fight pages')
+    arg_parser.add_argument('--limit', type=int, default=200, help='max number of fight pages')
+    args = arg_parser.parse_args()
+
+    pages = load_pages(args.cache_dir, args.limit)
+    if not pages:
+        sys.exit(f'No fight details pages in {args.cache_dir}, run the parser first to fill the cache')
+
+    legacy, ev, ev_lxml = LegacyEventsParser(), EventsParser(), EventsParser(extract_backend='lxml')
+    reference, legacy_ms = timeit(lambda page: legacy.get_event_info({}, BeautifulSoup(page, 'lxml')), pages)
+    result, bs4_ms = timeit(lambda page: ev.get_event_info({}, '', page), pages)
+    result_lxml, lxml_ms = timeit(lambda page: ev_lxml.get_event_info({}, '', page), pages)
+
+    print(f'fight pages: {len(pages)}')
+    print(f'legacy find_all:    {legacy_ms:8.2f} ms/fight')
+    print(f'single pass bs4:    {bs4_ms:8.2f} ms/fight  x{legacy_ms / bs4_ms:.1f}  '
+          f'identical: {result == reference}')
+    print(f'single pass lxml:   {lxml_ms:8.2f} ms/fight  x{legacy_ms / lxml_ms:.1f}  '
+          f'identical: {result_lxml == reference}')
+
+    # Timings of a different output mean nothing, the check is run by tests/test_fight_extractor.py as well
+    if result != reference or result_lxml != reference:
+        sys.exit('Output of the single pass extractor differs from the legacy parser')
@@ -0,0 +1,132 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict
+from src.data_class import Links
+from src.career_features import CareerFeatures, fight_records, feature_names, rates, SUMS
+from benchmarks.bench_store import synthetic_history
+
+
+def synthetic_fights(fights: int, fighters: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Events dataset of the given size with results and methods of real fights.
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    events = synthetic_history(fights, fighters, seed=seed)['events']
+    results = rng.choice([('W', 'L'), ('L', 'W'), ('D', 'D'), ('NC', 'NC')], fights, p=[0.49, 0.49, 0.01, 0.01])
+    events['f1_status_fg'], events['f2_status_fg'] = results[:, 0], results[:, 1]
+    events['win_method'] = rng.choice(['KO/TKO', 'Submission', 'Decision - Unanimous', 'Decision - Split'], fights)
+    events['time_format'] = '3 Rnd (5-5-5)'
+    return events
+
+
+def naive_features(records: pd.DataFrame, fights: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Reference features by a scan of the fights of the fighter before every fight, as the downstream scripts do.
+    :param records: fight_records of all fights
+    :param fights: fights whose features are computed
+    :param window: fight dates of the rolling features
+    :return: features of the fights, one row per fight and corner
+    """
+    rows = []
+    for fight in fights.itertuples(index=False):
+        before = records[(records['fighter'] == fight.fighter) & (records['date'] < fight.date)]
+        days = before.groupby('date')[SUMS].sum()
+        streak = 0.0
+        for _, day in days[::-1].iterrows():
+            if day['fights'] > day['wins']:
+                break
+            streak += day['fights']
+
+        total, last = days.sum().to_frame().T, days.tail(window).sum().to_frame().T
+        row = {'event_fight': fight.event_fight, 'corner': fight.corner,
+               **{name: total[name].iloc[0] for name in SUMS[:6]}, 'fight_minutes': total['fight_sec'].iloc[0] / 60,
+               'win_streak': streak, 'days_since_last': (fight.date - days.index[-1]).days if len(days) else np.nan,
+               **{name: value.iloc[0] for name, value in rates(total).items()},
+               f'last{window}_wins': last['wins'].iloc[0],
+               **{f'last{window}_{name}': value.iloc[0] for name, value in rates(last).items()}}
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def same_features(first: pd.DataFrame, second: pd.DataFrame) -> bool:
+    """
+    :return: True if the features are equal up to the float error
+    """
+    if first.shape != second.shape:
+        return False
+    return bool(np.allclose(first.to_numpy(dtype='float64'), second.to_numpy(dtype='float64'), equal_nan=True))
+
+
+def long_features(data: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    :return: features of the wide table as one row per fight and corner
+    """
+    names = feature_names(Links(features_window=window))
+    parts = [data[['event_fight'] + [f'f{corner}_{name}' for name in names]].set_axis(['event_fight'] + names, axis=1)
+             .assign(corner=corner) for corner in (1, 2)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def bench(events: pd.DataFrame, new_events: int, check: int, window: int) -> Dict[str, float]:
+    """
+    Full pass over the history, an incremental update by the last events and the reference scan.
+    :return: seconds and fights per second of every stage and the results of the output checks
+    """
+    start = time.perf_counter()
+    records = fight_records(events)
+    result = {'records_s': time.perf_counter() - start}
+
+    features = CareerFeatures(features_state_path='', features_window=window)
+    start = time.perf_counter()
+    full = features.rebuild(records)
+    result['full_s'] = time.perf_counter() - start
+    result['full_fights_per_s'] = len(events) / result['full_s']
+
+    # The history without its last events is the saved state, the last events are the new fights
+    last_events = events['event_url'].drop_duplicates().iloc[-new_events:]
+    new = records['event_fight'].isin(events.loc[events['event_url'].isin(last_events), 'event_fight'])
+    features.rebuild(records[~new])
+    start = time.perf_counter()
+    update = features.update(records[new])
+    result['update_s'] = time.perf_counter() - start
+    result['update_fights'] = len(update)
+    result['update_equals_full'] = same_features(update.drop(columns=['event_fight', 'date', 'f1_url', 'f2_url']),
+                                                 full[full['event_fight'].isin(update['event_fight'])]
+                                                 .drop(columns=['event_fight', 'date', 'f1_url', 'f2_url']))
+
+    # The reference scan is slow, it is timed on a sample of the fights
+    sample = records.sample(min(check, len(records)), random_state=0)
+    start = time.perf_counter()
+    naive = naive_features(records, sample, window)
+    result['naive_fights_per_s'] = len(sample) / 2 / (time.perf_counter() - start)
+    vectorized = long_features(full, window).set_index(['event_fight', 'corner'])
+    naive = naive.set_index(['event_fight', 'corner'])
+    result['naive_equals_full'] = same_features(naive, vectorized.loc[naive.index, naive.columns])
+
+    return result
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Pre-fight career features of a synthetic full history: '
+                                                     'full pass, incremental update and a per fighter scan')
+    arg_parser.add_argument('--fights', type=int, default=8000, help='number of fights')
+    arg_parser.add_argument('--fighters', type=int, default=2500, help='number of fighters')
+    arg_parser.add_argument('--new-events', type=int, default=2, help='events of the incremental update')
+    arg_parser.add_argument('--check', type=int, default=400, help='fights of the reference scan')
+    arg_parser.add_argument('--window', type=int, default=3, help='fight dates of the rolling features')
+    args = arg_parser.parse_args()
+
+    history = synthetic_fights(args.fights, args.fighters)
+    print(f'events: {len(history)} fights, fighters: {args.fighters}')
+    result = bench(history, args.new_events, args.check, args.window)
+    for key, value in result.items():
+        print(f'{key:24s} {value:10.3f}' if isinstance(value, float) else f'{key:24s} {value!s:>10s}')
+
+    # Timings of different features mean nothing, the checks are run by tests/test_career_features.py as well
+    if not (result['update_equals_full'] and result['naive_equals_full']):
+        sys.exit('Incremental or vectorized features differ from the full pass or the reference scan')
@@ -0,0 +1,132 @@
+import time
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+from dateutil import parser
+from typing import Callable
+from src.normalize import prepare_events, prepare_fighters
+from benchmarks.bench_output import synthetic_events
+
+
+def legacy_prepare_events(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation, EventsParser.prepare_data before the normalization module.
+    """
+    data = data.replace('--', np.nan, regex=True)
+    data['time'] = [parser.parse(time).time() for time in data['time']]
+    data['date'] = [parser.parse(date) for date in data['date'] if type(date) == str]
+    return data
+
+
+def legacy_prepare_fighters(fighters: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation, conversions of FighterParser.get_fighter_data before the normalization module.
+    Reach is read as whole inches as the profiles show it, reach_cm reads the decimal inches of the fighters
+    listing as well, where this reference fails. Outputs are compared on whole inches.
+    """
+    fighters = fighters.replace('--', np.nan, regex=True)
+
+    fighters['Height'] = [round(int(str(height).replace("'", " ").replace('"', '').split(' ')[0]) * 30.48 +
+                                int(str(height).replace("'", " ").replace('"', '').split(' ')[1]) * 2.54, 1)
+                          if type(height) != float else np.nan for height in fighters['Height']]
+
+    fighters['Weight'] = [round(int(str(weight).replace('lbs.', '').strip()) * 0.453592, 1)
+                          if type(weight) == str else np.nan for weight in fighters['Weight']]
+
+    fighters['Reach'] = [round(int(str(reach).replace('"', '').strip()) * 2.54, 1)
+                         if type(reach) == str else np.nan for reach in fighters['Reach']]
+
+    fighters['Age'] = [datetime.date.today().year - int(dob.split(',')[1])
+                       if type(dob) == str else np.nan for dob in fighters['DOB']]
+
+    for param in ['Str.Acc.', 'Str.Def', 'TDAcc.', 'TDDef.']:
+        fighters[param] = [int(str(val).replace('%', '').strip())
+                           if type(val) == str else np.nan for val in fighters[param]]
+
+    return fighters
+
+
+def missing(rng: np.random.Generator, values: pd.Series, share: float) -> pd.Series:
+    """
+    :return: values with the given share replaced by the '--' placeholder of the site
+    """
+    return values.where(rng.random(len(values)) >= share, '--')
+
+
+def synthetic_raw_events(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Raw fights as EventsParser collects them, before prepare_data.
+    :param rows: number of fights
+    :param seed: random seed
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    data = synthetic_events(rows, seed)
+
+    data['date'] = data['date'].dt.strftime('%B %d, %Y')
+    data['time'] = [f'{time.hour}:{time.minute:02d}' for time in data['time']]
+    for name in data.columns:
+        if name.endswith(('%', 'ctrl')):
+            data[name] = missing(rng, data[name], 0.1)
+
+    # Padded rounds are filled with '---' by get_fight_info_per_rounds
+    return data.fillna('---')
+
+
+def synthetic_raw_fighters(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Raw fighter parameters as FighterParser collects them from the profiles, before get_fighter_data.
+    :param rows: number of fighters
+    :param seed: random seed
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    months = np.array(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+
+    def numbers(low: int, high: int, template: str) -> pd.Series:
+        return missing(rng, pd.Series([template.format(value) for value in rng.integers(low, high, rows)]), 0.05)
+
+    data = {'Fullname': [f'Fighter {num}' for num in range(rows)],
+            'Win': rng.integers(0, 30, rows), 'Loss': rng.integers(0, 15, rows), 'Draw': rng.integers(0, 3, rows),
+            'Height': missing(rng, pd.Series([f'{feet}\'{inches}"' for feet, inches in
+                                              zip(rng.integers(5, 7, rows), rng.integers(0, 12, rows))]), 0.05),
+            'Weight': numbers(115, 266, '{}lbs.'), 'Reach': numbers(58, 85, '{}"'),
+            'STANCE': rng.choice(['Orthodox', 'Southpaw', 'Switch', '--'], rows),
+            'DOB': missing(rng, pd.Series([f'{month}{day:02d},{year}' for month, day, year in
+                                           zip(rng.choice(months, rows), rng.integers(1, 29, rows),
+                                               rng.integers(1960, 2004, rows))]), 0.2),
+            'SLpM': numbers(0, 900, '{}'), 'SApM': numbers(0, 900, '{}'), 'TDAvg.': numbers(0, 700, '{}'),
+            'Sub.Avg.': numbers(0, 300, '{}')}
+    for param in ['Str.Acc.', 'Str.Def', 'TDAcc.', 'TDDef.']:
+        data[param] = numbers(0, 101, '{}%')
+
+    return pd.DataFrame(data)
+
+
+def bench(name: str, legacy: Callable, vectorized: Callable, data: pd.DataFrame) -> None:
+    """
+    Time both implementations on copies of the data and check that their outputs are identical.
+    The same check is run on smaller frames by tests/test_normalize.py.
+    """
+    start = time.perf_counter()
+    expected = legacy(data.copy())
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = vectorized(data.copy())
+    vectorized_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected)
+    print(f'{name:8s} {len(data):8d} rows  legacy {legacy_time:8.2f} s  vectorized {vectorized_time:8.2f} s  '
+          f'speedup {legacy_time / vectorized_time:6.1f}x  identical output')
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Post-processing of the datasets, legacy against vectorized')
+    arg_parser.add_argument('--rows', type=int, default=100000, help='number of fighters')
+    arg_parser.add_argument('--event-rows', type=int, default=100000, help='number of fights')
+    args = arg_parser.parse_args()
+
+    bench('fighters', legacy_prepare_fighters, prepare_fighters, synthetic_raw_fighters(args.rows))
+    bench('events', legacy_prepare_events, prepare_events, synthetic_raw_events(args.event_rows))
@@ -0,0 +1,88 @@
+import os
+import time
+import argparse
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Dict
+from src.data_class import Links
+from src.schemas import events_schema
+from utils.writers import get_writer, read_data
+
+
+def synthetic_events(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Events dataset of the given size with the columns and value formats of EventsParser.
+    :param rows: number of fights
+    :param seed: random seed
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    schema, schema_rounds = events_schema(Links()), Links().num_rounds
+    data = {}
+
+    for field in schema:
+        if pa.types.is_timestamp(field.type):
+            data[field.name] = pd.Timestamp('1993-11-12') + pd.to_timedelta(rng.integers(0, 11000, rows), unit='D')
+        elif pa.types.is_time(field.type):
+            data[field.name] = [datetime.time(0, minute, second) for minute, second in
+                                zip(rng.integers(0, 5, rows), rng.integers(0, 60, rows))]
+        elif field.name.endswith('%'):
+            data[field.name] = pd.Series(rng.integers(0, 101, rows)).astype(str) + '%'
+        elif field.name.endswith('ctrl'):
+            data[field.name] = [f'{minute}:{second:02d}' for minute, second in
+                                zip(rng.integers(0, 5, rows), rng.integers(0, 60, rows))]
+        elif 'str' in field.name or field.name.endswith('_td'):
+            data[field.name] = [f'{landed} of {landed + attempted}' for landed, attempted in
+                                zip(rng.integers(0, 60, rows), rng.integers(0, 60, rows))]
+        elif field.name == 'round':
+            data[field.name] = pd.Series(rng.integers(1, schema_rounds + 1, rows)).astype(str)
+        else:
+            data[field.name] = pd.Series(rng.integers(0, 5, rows)).astype(str)
+    data = pd.DataFrame(data)
+
+    # Rounds after the end of the fight are padded and become missing values in EventsParser.prepare_data
+    for rnd in range(2, schema_rounds + 1):
+        padded = [name for name in data.columns if f'_rnd{rnd}_' in name]
+        data.loc[data['round'].astype(int) < rnd, padded] = np.nan
+
+    return data
+
+
+def bench_format(data: pd.DataFrame, path: str, chunk_size: int) -> Dict[str, float]:
+    """
+    Stream the dataset into the file in chunks and read it back.
+    :return: write time, read time in seconds and size of the file in MB
+    """
+    schema = events_schema(Links())
+
+    start = time.perf_counter()
+    with get_writer(path, schema) as writer:
+        for begin in range(0, len(data), chunk_size):
+            writer.write(data.iloc[begin:begin + chunk_size])
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read_data(path)
+    read_time = time.perf_counter() - start
+
+    return {'write_s': write_time, 'read_s': read_time, 'size_mb': os.path.getsize(path) / 1024 ** 2}
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Output formats benchmark on a synthetic events dataset')
+    arg_parser.add_argument('--rows', type=int, default=20000, help='number of fights')
+    arg_parser.add_argument('--chunk-size', type=int, default=5000, help='rows per written chunk')
+    arg_parser.add_argument('--formats', nargs='+', default=['parquet', 'feather', 'xlsx'], help='formats to compare')
+    args = arg_parser.parse_args()
+
+    events = synthetic_events(args.rows)
+    print(f'events: {events.shape[0]} rows x {events.shape[1]} columns')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for file_format in args.formats:
+            result = bench_format(events, os.path.join(folder, f'events.{file_format}'), args.chunk_size)
+            print(f'{file_format:8s} write {result["write_s"]:8.2f} s  read {result["read_s"]:8.2f} s  '
+                  f'size {result["size_mb"]:8.2f} MB')
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.fetcher import Fetcher
+
+
+class FaultyServer(ThreadingHTTPServer):
+    """
+    Local stand-in of the site serving the html fixtures. It handles capacity requests at a time with
+    the given latency, extra requests wait in its queue, above throttle requests in flight it answers 429
+    with Retry-After. Random 500 errors, empty pages, dropped connections and stalls are injected.
+    """
+    daemon_threads = True
+
+    def __init__(self, fixtures_dir: str, capacity: int, throttle: int, latency: float, faults: Dict[str, float],
+                 seed: int = 0) -> None:
+        super().__init__(('127.0.0.1', 0), FaultyHandler)
+        with open(os.path.join(fixtures_dir, 'index.json'), 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        self.pages = {}
+        for url, name in index.items():
+            with open(os.path.join(fixtures_dir, name), 'r', encoding='utf-8') as file:
+                parts = urlsplit(url)
+                self.pages[parts.path + ('?' + parts.query if parts.query else '')] = file.read().encode()
+
+        self.capacity, self.throttle = threading.Semaphore(capacity), throttle
+        self.latency, self.faults = latency, faults
+        self.random, self.lock, self.in_flight, self.answers = random.Random(seed), threading.Lock(), 0, {}
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients close connections of stalled requests by timeout
+        pass
+
+    def url(self, path: str) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def fault(self) -> str:
+        with self.lock:
+            draw = self.random.random()
+        for fault, share in self.faults.items():
+            if draw < share:
+                return fault
+            draw -= share
+        return ''
+
+
+class FaultyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            throttled = server.in_flight > server.throttle
+        try:
+            fault = 'throttled' if throttled else server.fault()
+            if fault == 'drop':
+                self.close_connection = True
+                return
+            if fault == 'stall':
+                time.sleep(5)
+
+            with server.capacity:
+                time.sleep(server.latency)
+            # Requests sent through the server as a proxy have the absolute url
+            parts = urlsplit(self.path)
+            body = server.pages.get(parts.path + ('?' + parts.query if parts.query else ''), b'')
+            status = {'throttled': 429, 'error': 500}.get(fault, 200 if body else 404)
+            body = b'' if fault == 'empty' or status != 200 else body
+
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '1')
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with server.lock:
+                server.answers[fault or status] = server.answers.get(fault or status, 0) + 1
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def run(server: FaultyServer, urls: List[str], config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Download the urls from the server with the fetcher of the given settings.
+    :return: downloaded and failed pages, throughput, answers of the server and metrics of the fetcher
+    """
+    server.answers = {}
+    with Fetcher(use_cache=False, **config) as fetcher:
+        start = time.perf_counter()
+        pages = fetcher.fetch_many(urls)
+        seconds = time.perf_counter() - start
+        report = fetcher.metrics.report()
+
+    downloaded = sum(page is not None for page in pages)
+    return {'seconds': round(seconds, 3), 'downloaded': downloaded, 'failed': len(urls) - downloaded,
+            'pages_per_sec': round(downloaded / seconds, 2), 'server_answers': dict(server.answers),
+            'retries': report.get('retries', {}), 'rate_control': report.get('rate_control', {})}
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Fixed concurrency against the adaptive rate controller '
+                                                     'on a local server injecting latency and errors')
+    arg_parser.add_argument('--fixtures', default=os.path.join('benchmarks', 'fixtures'), help='fixtures folder')
+    arg_parser.add_argument('--pages', type=int, default=600, help='number of requested pages')
+    arg_parser.add_argument('--workers', type=int, default=32, help='max_workers of the fetcher')
+    arg_parser.add_argument('--capacity', type=int, default=8, help='requests served by the server at a time')
+    arg_parser.add_argument('--throttle', type=int, default=12, help='requests in flight answered with 429')
+    arg_parser.add_argument('--latency', type=float, default=0.02, help='seconds of serving a page')
+    arg_parser.add_argument('--error-rate', type=float, default=0.02, help='share of 500 answers')
+    arg_parser.add_argument('--empty-rate', type=float, default=0.01, help='share of empty pages')
+    arg_parser.add_argument('--drop-rate', type=float, default=0.01, help='share of dropped connections')
+    arg_parser.add_argument('--stall-rate', type=float, default=0.002, help='share of stalled requests')
+    args = arg_parser.parse_args()
+
+    faulty_server = FaultyServer(args.fixtures, args.capacity, args.throttle, args.latency,
+                                 {'error': args.error_rate, 'empty': args.empty_rate, 'drop': args.drop_rate,
+                                  'stall': args.stall_rate})
+    threading.Thread(target=faulty_server.serve_forever, daemon=True).start()
+
+    paths = sorted(faulty_server.pages)
+    page_urls = [faulty_server.url(paths[num % len(paths)]) for num in range(args.pages)]
+
+    # Requests of the fixed mode are neither throttled by the controller nor retried
+    modes = {'fixed': {'max_workers': args.workers, 'initial_concurrency': args.workers, 'backoff_factor': 1.0,
+                       'latency_tolerance': float('inf'), 'max_retries': 0, 'breaker_threshold': args.pages + 1,
+                       'timeout': 2.0},
+             'adaptive': {'max_workers': args.workers, 'retry_base_delay': 0.1, 'timeout': 2.0}}
+
+    for mode, mode_config in modes.items():
+        print(mode, json.dumps(run(faulty_server, page_urls, mode_config), indent=1))
+
+    faulty_server.shutdown()
@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from benchmarks.make_fixtures import save, synthetic
+from benchmarks.bench_rate_control import FaultyServer
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def main_args(server: FaultyServer, folder: str, args: List[str]) -> Dict[str, Any]:
+    """
+    :return: arguments of a subprocess running main.py in the folder, the site is served by the local server
+    """
+    proxy = server.url('')
+    env = dict(os.environ, http_proxy=proxy, HTTP_PROXY=proxy, no_proxy='', NO_PROXY='')
+    return {'args': [sys.executable, MAIN, '--no-cache', *args], 'cwd': folder, 'env': env,
+            'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+
+def crawl(server: FaultyServer, folder: str, workers: int, options: List[str],
+          kill_after: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Plan shards, run the workers at once and merge their outputs.
+    :param server: local stand-in of the site
+    :param folder: working folder of the crawl
+    :param workers: number of worker processes
+    :param options: options of every run of main.py
+    :param kill_after: seconds after which the first worker is killed with SIGKILL, its shard is crawled again
+    when its lease expires
+    :return: seconds of the workers, pages per second and rows of the merged datasets
+    """
+    os.makedirs(folder, exist_ok=True)
+    subprocess.run(**main_args(server, folder, ['--plan', *options]), check=True)
+
+    answered, start = sum(server.answers.values()), time.perf_counter()
+    processes = [subprocess.Popen(**main_args(server, folder, ['--worker', *options])) for _ in range(workers)]
+    if kill_after is not None:
+        threading.Timer(kill_after, processes[0].send_signal, [signal.SIGKILL]).start()
+    codes = [process.wait() for process in processes]
+    seconds, pages = time.perf_counter() - start, sum(server.answers.values()) - answered
+
+    subprocess.run(**main_args(server, folder, ['--merge', *options]), check=True)
+    rows = {name: len(pd.read_parquet(os.path.join(folder, 'data', f'{name}.parquet')))
+            for name in ['events', 'fighter']}
+    return {'workers': workers, 'seconds': round(seconds, 2), 'pages': pages,
+            'pages_per_sec': round(pages / seconds, 1), 'exit_codes': codes, 'rows': rows}
+
+
+def same_output(first: str, second: str) -> Dict[str, bool]:
+    """
+    :return: True by dataset if the merged datasets of both crawls have the same rows
+    """
+    result = {}
+    for name, key in [('events', 'event_fight'), ('fighter', 'Fullname')]:
+        data = [pd.read_parquet(os.path.join(folder, 'data', f'{name}.parquet')).sort_values(key)
+                .reset_index(drop=True) for folder in (first, second)]
+        result[name] = data[0].equals(data[1])
+
+    return result
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Scaling of the sharded crawl with the number of workers and '
+                                                     'recovery of the shard of a killed worker')
+    arg_parser.add_argument('--events', type=int, default=60, help='events of the synthetic corpus')
+    arg_parser.add_argument('--workers', default='1,2,4', help='numbers of worker processes')
+    arg_parser.add_argument('--concurrency', type=int, default=4, help='max requests in flight of a worker')
+    arg_parser.add_argument('--latency', type=float, default=0.1, help='seconds of serving a page')
+    arg_parser.add_argument('--shard-size', type=int, default=5, help='events in a shard')
+    arg_parser.add_argument('--lease', type=float, default=3.0, help='lease of a shard in seconds')
+    arg_parser.add_argument('--kill-after', type=float, default=4.0,
+                            help='seconds after which a worker of the recovery run is killed')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        save(synthetic(events=args.events), os.path.join(tmp, 'site'))
+        local_server = FaultyServer(os.path.join(tmp, 'site'), capacity=1024, throttle=1024,
+                                    latency=args.latency, faults={})
+        threading.Thread(target=local_server.serve_forever, daemon=True).start()
+
+        crawl_options = ['--workers', str(args.concurrency), '--parse-workers', '0',
+                         '--shard-size', str(args.shard_size), '--lease', str(args.lease)]
+        # Outputs of every crawl are compared with the output of the first one
+        report, folders = {'params': vars(args), 'scaling': []}, []
+        for num in map(int, args.workers.split(',')):
+            folders.append(os.path.join(tmp, f'workers-{num}'))
+            result = crawl(local_server, folders[-1], num, crawl_options)
+            result['speedup'] = round(report['scaling'][0]['seconds'] / result['seconds'], 2) \
+                if report['scaling'] else 1.0
+            result['same_output'] = same_output(folders[0], folders[-1])
+            report['scaling'].append(result)
+
+        report['recovery'] = crawl(local_server, os.path.join(tmp, 'recovery'), 2, crawl_options, args.kill_after)
+        report['recovery']['same_output'] = same_output(folders[0], os.path.join(tmp, 'recovery'))
+        local_server.shutdown()
+
+    print(json.dumps(report, indent=1))
@@ -0,0 +1,40 @@
+import os
+import time
+import argparse
+import tempfile
+import pandas as pd
+from src.data_class import Links
+from src.schemas import dataset_schema
+from src.stats_model import normalize_events
+from benchmarks.bench_output import synthetic_events
+from utils.writers import get_writer
+
+
+def parquet_size(data: pd.DataFrame, dataset: str, folder: str) -> float:
+    """
+    :return: size of the dataset written to parquet in MB
+    """
+    path = os.path.join(folder, f'{dataset}.parquet')
+    with get_writer(path, dataset_schema(dataset, Links())) as writer:
+        writer.write(data)
+
+    return os.path.getsize(path) / 1024 ** 2
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Wide string events dataset against the typed stats model')
+    arg_parser.add_argument('--rows', type=int, default=20000, help='number of fights')
+    args = arg_parser.parse_args()
+
+    events = synthetic_events(args.rows)
+
+    start = time.perf_counter()
+    tables = normalize_events(events, Links())
+    normalize_time = time.perf_counter() - start
+    print(f'normalize {args.rows} fights: {normalize_time:.2f} s')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for dataset, data in [('events', events), *tables.items()]:
+            memory = data.memory_usage(deep=True).sum() / 1024 ** 2
+            print(f'{dataset:8s} {data.shape[0]:8d} rows x {data.shape[1]:4d} columns  memory {memory:8.2f} MB  '
+                  f'parquet {parquet_size(data, dataset, folder):8.2f} MB')
@@ -0,0 +1,150 @@
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+from src.store import Store
+from src.data_class import Links
+from src.schemas import events_schema
+from utils.writers import get_writer, read_data
+from benchmarks.bench_output import synthetic_events
+
+URL = 'http://ufcstats.com/{}-details/{:016x}'
+
+
+def synthetic_history(fights: int, fighters: int, per_event: int = 12, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Prepared events and fighters datasets of the given size, fights of an event share its date.
+    :param fights: number of fights
+    :param fighters: number of fighters
+    :param per_event: fights of an event
+    :param seed: random seed
+    :return: events and fighter datasets
+    """
+    rng = np.random.default_rng(seed)
+    events = synthetic_events(fights, seed)
+    event_num = np.arange(fights) // per_event
+    events['date'] = pd.Timestamp('1993-11-12') + pd.to_timedelta(event_num * 7, unit='D')
+    events['event_url'] = [URL.format('event', num) for num in event_num]
+    events['event_fight'] = [URL.format('fight', num) for num in range(fights)]
+
+    corners = rng.integers(0, fighters, (fights, 2))
+    for corner in (1, 2):
+        events[f'f{corner}_url'] = [URL.format('fighter', num) for num in corners[:, corner - 1]]
+        events[f'f{corner}_fullname'] = [f'Fighter {num}' for num in corners[:, corner - 1]]
+
+    fighter = pd.DataFrame({'Fullname': [f'Fighter {num}' for num in range(fighters)],
+                            'Win': rng.integers(0, 30, fighters), 'Loss': rng.integers(0, 15, fighters),
+                            'Draw': rng.integers(0, 2, fighters), 'Age': rng.integers(20, 45, fighters) * 1.0,
+                            'Height': rng.normal(178, 8, fighters).round(), 'Weight': rng.normal(77, 12, fighters),
+                            'Reach': rng.normal(183, 10, fighters).round(), 'Stance': 'Orthodox',
+                            'SLpM': rng.uniform(0, 8, fighters).round(2).astype(str),
+                            'Str.Acc.%': rng.integers(20, 70, fighters) * 1.0,
+                            'SApM': rng.uniform(0, 8, fighters).round(2).astype(str),
+                            'Str.Def%': rng.integers(30, 70, fighters) * 1.0,
+                            'TDAvg.': rng.uniform(0, 5, fighters).round(2).astype(str),
+                            'TDAcc.%': rng.integers(0, 100, fighters) * 1.0,
+                            'TDDef.%': rng.integers(0, 100, fighters) * 1.0,
+                            'Sub.Avg.': rng.uniform(0, 3, fighters).round(1).astype(str),
+                            'Link': [URL.format('fighter', num) for num in range(fighters)]})
+
+    return {'events': events, 'fighter': fighter}
+
+
+def timed(function: Callable[[], object], repeat: int) -> float:
+    """
+    :return: median milliseconds of a call of the function
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def bench_upserts(store: Store, datasets: Dict[str, pd.DataFrame], chunk_size: int) -> Dict[str, float]:
+    """
+    Upsert the datasets in chunks into an empty store, then upsert them again, every row is updated in place.
+    :return: fights per second of the insert and of the update, fighters per second of the insert
+    """
+    events, result = datasets['events'], {}
+    for name in ['insert', 'update']:
+        start = time.perf_counter()
+        for begin in range(0, len(events), chunk_size):
+            store.upsert_events(events.iloc[begin:begin + chunk_size])
+        result[f'{name}_fights_per_s'] = len(events) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    store.upsert_fighters(datasets['fighter'])
+    result['insert_fighters_per_s'] = len(datasets['fighter']) / (time.perf_counter() - start)
+    return result
+
+
+def bench_queries(store: Store, files: Dict[str, str], datasets: Dict[str, pd.DataFrame],
+                  repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Point and range queries of the store against loading a whole saved dataset and filtering it.
+    :param store: filled store
+    :param files: paths of the saved events dataset by format
+    :param datasets: events and fighter datasets
+    :param repeat: calls of every query
+    :return: median milliseconds of every query by backend
+    """
+    events = datasets['events']
+    fighter, event = events['f1_url'].iloc[len(events) // 2], events['event_url'].iloc[len(events) // 2]
+    start, end = '2005-01-01', '2005-12-31'
+
+    result = {'sqlite': {'fighter_fights': timed(lambda: store.fighter_fights(fighter), repeat),
+                         'event_fights': timed(lambda: store.event_fights(event), repeat),
+                         'fights_between': timed(lambda: store.fights_between(start, end), repeat),
+                         'fighter': timed(lambda: store.fighter(fighter), repeat)}}
+
+    def load(path: str, column: str) -> Callable[[], pd.DataFrame]:
+        return lambda: read_data(path).query(column)
+
+    for file_format, path in files.items():
+        file_repeat = repeat if file_format != 'xlsx' else 1
+        result[file_format] = {
+            'fighter_fights': timed(load(path, f'f1_url == "{fighter}" or f2_url == "{fighter}"'), file_repeat),
+            'event_fights': timed(load(path, f'event_url == "{event}"'), file_repeat),
+            'fights_between': timed(load(path, f'"{start}" <= date <= "{end}"'), file_repeat)}
+
+    return result
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Upserts and queries of the sqlite store against loading '
+                                                     'the saved datasets, on a synthetic history')
+    arg_parser.add_argument('--fights', type=int, default=8000, help='number of fights')
+    arg_parser.add_argument('--fighters', type=int, default=2500, help='number of fighters')
+    arg_parser.add_argument('--chunk-size', type=int, default=1000, help='fights per upsert')
+    arg_parser.add_argument('--repeat', type=int, default=20, help='calls of every query')
+    arg_parser.add_argument('--formats', nargs='+', default=['parquet'],
+                            help='formats of the compared datasets, xlsx takes minutes')
+    args = arg_parser.parse_args()
+
+    history = synthetic_history(args.fights, args.fighters)
+    print(f'events: {len(history["events"])} fights, fighters: {len(history["fighter"])}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        saved: Dict[str, str] = {}
+        for saved_format in args.formats:
+            saved[saved_format] = os.path.join(folder, f'events.{saved_format}')
+            with get_writer(saved[saved_format], events_schema(Links())) as writer:
+                writer.write(history['events'])
+
+        with Store(store_path=os.path.join(folder, 'ufc.sqlite')) as bench_store:
+            for key, value in bench_upserts(bench_store, history, args.chunk_size).items():
+                print(f'{key:24s} {value:10.0f}')
+            print(f'{"size_mb":24s} {os.path.getsize(bench_store.store_path) / 1024 ** 2:10.1f}')
+
+            queries: List[str] = ['fighter_fights', 'event_fights', 'fights_between', 'fighter']
+            timings = bench_queries(bench_store, saved, history, args.repeat)
+            print(f'{"query, ms":16s}' + ''.join(f'{backend:>12s}' for backend in timings))
+            for query in queries:
+                print(f'{query:16s}' + ''.join(f'{timings[backend].get(query, float("nan")):12.2f}'
+                                               for backend in timings))
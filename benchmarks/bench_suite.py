@@ -0,0 +1,168 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import contextlib
+import resource
+import tempfile
+import subprocess
+import pandas as pd
+from typing import Any, Dict, Optional
+from src.schemas import dataset_schema
+from src.event_parser import EventsParser
+from src.fighter_parser import FighterParser
+from utils.writers import get_writer
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+
+def peak_rss_mb() -> float:
+    """
+    :return: peak resident memory of the process and its finished children in MB
+    """
+    usage = [resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return sum(usage) / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def git_commit() -> Optional[str]:
+    """
+    :return: current commit of the repository or None outside of a git checkout
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_fights(fetcher: FixtureFetcher, repeat: int) -> Dict[str, Any]:
+    """
+    Parse every fight page of the corpus with get_event_info and get_fight_info_per_rounds.
+    :return: ms per fight by number of rounds and pages that can't be parsed
+    """
+    ev = EventsParser(use_cache=False, parse_workers=0)
+    timings, rounds_timings, not_parsed = {}, [], 0
+
+    for url in [url for url in fetcher.index if '/fight-details/' in url]:
+        page = fetcher.fetch(url)
+        try:
+            event_dict = ev.get_event_info({}, url, page)
+        except (AttributeError, IndexError, KeyError, ValueError):
+            not_parsed += 1
+            continue
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            ev.get_event_info({}, url, page)
+        timings.setdefault(event_dict['round'], []).append((time.perf_counter() - start) / repeat * 1000)
+
+        rows = ev.extractor.extract(page)['rows']
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for fg_num in (1, 2):
+                ev.get_fight_info_per_rounds({'round': event_dict['round']}, fg_num, rows)
+        rounds_timings.append((time.perf_counter() - start) / repeat * 1000)
+
+    all_timings = [ms for values in timings.values() for ms in values]
+    return {'fights': len(all_timings), 'not_parsed': not_parsed,
+            'get_event_info_ms_per_fight': sum(all_timings) / len(all_timings),
+            'get_event_info_ms_by_rounds': {rounds: sum(values) / len(values)
+                                            for rounds, values in sorted(timings.items())},
+            'get_fight_info_per_rounds_ms_per_fight': sum(rounds_timings) / len(rounds_timings)}
+
+
+def bench_crawl(fetcher: FixtureFetcher, parse_workers: int, repeat: int) -> Dict[str, Any]:
+    """
+    Run the parsers over the corpus through the file backed fetcher, the best of repeat runs is reported.
+    :return: time and pages per second of every stage, parsed datasets
+    """
+    ev, fp = EventsParser(use_cache=False, parse_workers=parse_workers), \
+        FighterParser(use_cache=False, parse_workers=parse_workers)
+    ev.fetcher = fp.fetcher = fetcher
+    results, datasets = {}, {}
+
+    for name, run in [('get_all_event_data', ev.get_all_event_data), ('get_fighters_params', fp.get_fighters_params),
+                      ('get_fighter_data', fp.get_fighter_data)]:
+        timings = []
+        for _ in range(repeat):
+            requests, start = fetcher.requests, time.perf_counter()
+            # Progress bars and messages of the parsers would be mixed with the report
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                datasets[name] = run()
+            timings.append(time.perf_counter() - start)
+        pages = fetcher.requests - requests
+        results[name] = {'seconds': min(timings), 'pages': pages, 'pages_per_sec': pages / min(timings),
+                         'rows': len(datasets[name])}
+
+    return {'stages': results, 'datasets': {'events': datasets['get_all_event_data'],
+                                            'fighter': datasets['get_fighter_data']}}
+
+
+def bench_write(datasets: Dict[str, pd.DataFrame], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Write the parsed datasets in every output format.
+    :return: best write time in ms by dataset and format
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for dataset, data in datasets.items():
+            schema = dataset_schema(dataset, EventsParser())
+            for file_format in ['parquet', 'feather', 'xlsx']:
+                path, timings = os.path.join(folder, f'{dataset}.{file_format}'), []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    with get_writer(path, schema) as writer:
+                        writer.write(data)
+                    timings.append(time.perf_counter() - start)
+                results.setdefault(dataset, {})[file_format] = min(timings) * 1000
+
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], prefix: str = '') -> None:
+    """
+    Print numeric metrics of two reports side by side.
+    """
+    for key, value in current.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            compare(value, old or {}, f'{prefix}{key}.')
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            print(f'{prefix + key:70s} {old:12.3f} -> {value:12.3f}  {value / old:6.2f}x')
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Benchmark suite over the html fixtures, works offline')
+    arg_parser.add_argument('--fixtures', default=os.path.join('benchmarks', 'fixtures'), help='fixtures folder')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='repeats of every measurement, the best is taken')
+    arg_parser.add_argument('--parse-workers', type=int, default=0, help='processes parsing html during the crawl')
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds of every request')
+    arg_parser.add_argument('--output', help='path of the json report, benchmarks/results/<commit>.json by default')
+    arg_parser.add_argument('--compare', help='json report of a previous run to compare with')
+    args = arg_parser.parse_args()
+
+    fixture_fetcher = FixtureFetcher(fixtures_dir=args.fixtures, latency=args.latency, use_cache=False)
+    commit = git_commit()
+
+    crawl = bench_crawl(fixture_fetcher, args.parse_workers, args.repeat)
+    report = {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+              'platform': platform.platform(), 'cpus': os.cpu_count(),
+              'params': {'repeat': args.repeat, 'parse_workers': args.parse_workers, 'latency': args.latency,
+                         'pages': len(fixture_fetcher.index)},
+              'fight_parse': bench_fights(fixture_fetcher, args.repeat), 'crawl': crawl['stages'],
+              'write_ms': bench_write(crawl['datasets'], args.repeat), 'peak_rss_mb': peak_rss_mb()}
+    fixture_fetcher.close()
+
+    output = args.output or os.path.join('benchmarks', 'results', f'{commit or "local"}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=1)
+
+    print(json.dumps(report, indent=1))
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(report, json.load(file))
+    print(f'report saved to {output}')
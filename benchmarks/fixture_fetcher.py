@@ -0,0 +1,41 @@
+import os
+import json
+import time
+import requests
+from typing import Tuple
+from dataclasses import dataclass
+from src.fetcher import Fetcher
+
+
+@dataclass
+class FixtureFetcher(Fetcher):
+    """
+    File backed fetch engine, pages are served from the fixtures folder instead of the site.
+    Latency simulates the network round trip of every request.
+    """
+    fixtures_dir: str = os.path.join('benchmarks', 'fixtures')
+    latency: float = 0.0
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        with open(os.path.join(self.fixtures_dir, 'index.json'), 'r', encoding='utf-8') as file:
+            self.index = json.load(file)
+        self.pages = {}
+        self.requests = 0
+
+    def get(self, url: str) -> Tuple[str, str]:
+        """
+        :param url: page url
+        :return: page html and its source
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if url not in self.index:
+            raise requests.HTTPError(f'404 Client Error: no fixture for url: {url}')
+
+        self.requests += 1
+        if url not in self.pages:
+            with open(os.path.join(self.fixtures_dir, self.index[url]), 'r', encoding='utf-8') as file:
+                self.pages[url] = file.read()
+
+        return self.pages[url], 'fixture'
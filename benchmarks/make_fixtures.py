@@ -0,0 +1,300 @@
+import os
+import json
+import random
+import string
+import argparse
+import datetime
+import itertools
+from bs4 import BeautifulSoup
+from typing import Dict, List, Tuple
+from src.data_class import Links
+from src.fetcher import Fetcher
+
+# Rounds of the fights of every synthetic event, fights marked as missing have '--' instead of some stats
+EVENTS = [[(1, False), (3, False), (5, False), (3, True)],
+          [(5, False), (1, True), (3, False), (5, False)],
+          [(3, False), (3, False), (1, False), (5, True)]]
+
+BASE = 'http://ufcstats.com'
+
+
+def url_id(rnd: random.Random) -> str:
+    return '%016x' % rnd.getrandbits(64)
+
+
+def cells(first: str, second: str) -> str:
+    return (f'<td class="b-fight-details__table-col">\n  <p class="b-fight-details__table-text">\n    {first}\n  </p>\n'
+            f'  <p class="b-fight-details__table-text">\n    {second}\n  </p>\n</td>\n')
+
+
+def fight_page(rnd: random.Random, rounds: int, fighters: List[Tuple[str, str]], missing: bool,
+               stats: bool = True) -> str:
+    """
+    Fight details page in the markup of ufcstats.com.
+    :param rnd: random generator
+    :param rounds: number of fought rounds
+    :param fighters: names and links of both fighters
+    :param missing: percentages and control time are missing
+    :param stats: False for old fights without stats tables
+    :return: html
+    """
+    def landed() -> str:
+        attempted = rnd.randint(0, 120)
+        return f'{rnd.randint(0, attempted)} of {attempted}'
+
+    def percent() -> str:
+        return '---' if missing else f'{rnd.randint(0, 100)}%'
+
+    def control() -> str:
+        return '--' if missing else f'{rnd.randint(0, 4)}:{rnd.randint(0, 59):02d}'
+
+    def names() -> str:
+        return cells(*[f'<a class="b-link b-link_style_black" href="{link}">\n      {name}\n    </a>'
+                       for name, link in fighters])
+
+    def totals_row() -> str:
+        row = names() + cells(rnd.randint(0, 2), rnd.randint(0, 2)) + cells(landed(), landed())
+        row += cells(percent(), percent()) + cells(landed(), landed()) + cells(landed(), landed())
+        row += cells(percent(), percent()) + cells(rnd.randint(0, 3), rnd.randint(0, 3))
+        row += cells(rnd.randint(0, 1), rnd.randint(0, 1)) + cells(control(), control())
+        return f'<tr class="b-fight-details__table-row">\n{row}</tr>\n'
+
+    def strikes_row() -> str:
+        row = names() + cells(landed(), landed()) + cells(percent(), percent())
+        row += ''.join(cells(landed(), landed()) for _ in range(6))
+        return f'<tr class="b-fight-details__table-row">\n{row}</tr>\n'
+
+    def table(row, per_round: bool) -> str:
+        head = ('<thead class="b-fight-details__table-head">\n<tr class="b-fight-details__table-row">\n'
+                '<th class="b-fight-details__table-col">Fighter</th>\n</tr>\n</thead>\n')
+        if not per_round:
+            return f'<table class="b-fight-details__table">\n{head}<tbody class="b-fight-details__table-body">\n' \
+                   f'{row()}</tbody>\n</table>\n'
+        body = ''.join(f'<thead class="b-fight-details__table-row b-fight-details__table-row_type_head">\n'
+                       f'<th class="b-fight-details__table-col" colspan="10">Round {num}</th>\n</thead>\n'
+                       f'<tbody class="b-fight-details__table-body">\n{row()}</tbody>\n'
+                       for num in range(1, rounds + 1))
+        return f'<table class="b-fight-details__table js-fight-table">\n{head}{body}</table>\n'
+
+    html = ['<!DOCTYPE html>\n<html>\n<head><title>UFC Stats</title></head>\n<body>\n<section class="b-statistic">',
+            '<div class="b-fight-details">\n<div class="b-fight-details__persons clearfix">']
+    for status, (name, link) in zip(rnd.choice([('W', 'L'), ('L', 'W'), ('D', 'D')]), fighters):
+        html.append(f'<div class="b-fight-details__person">\n  <i class="b-fight-details__person-status">\n    '
+                    f'{status}\n  </i>\n  <div class="b-fight-details__person-text">\n'
+                    f'    <h3 class="b-fight-details__person-name">\n      '
+                    f'<a class="b-link b-fight-details__person-link" href="{link}">{name}</a>\n    </h3>\n'
+                    f'    <p class="b-fight-details__person-title">\n      "{name.split()[-1]} Jr"\n    </p>\n'
+                    f'  </div>\n</div>')
+    html.append('</div>\n<div class="b-fight-details__fight">\n<div class="b-fight-details__content">\n'
+                '<p class="b-fight-details__text">')
+    html.append(f'<i class="b-fight-details__text-item_first">\n  <i class="b-fight-details__label">Method:</i>\n'
+                f'  <i style="font-style: normal">\n    {rnd.choice(["KO/TKO", "Submission", "Decision - Unanimous"])}'
+                f'\n  </i>\n</i>')
+    for label, value in [('Round:', rounds), ('Time:', f'{rnd.randint(0, 4)}:{rnd.randint(0, 59):02d}'),
+                         ('Time format:', f'{max(rounds, 3)} Rnd ({"-".join(["5"] * max(rounds, 3))})'),
+                         ('Referee:', '<span>\n      Herb Dean\n    </span>')]:
+        html.append(f'<i class="b-fight-details__text-item">\n  <i class="b-fight-details__label">\n    {label}\n'
+                    f'  </i>\n  {value}\n</i>')
+    html.append('</p>\n</div>\n</div>')
+
+    if stats:
+        html.append(table(totals_row, False) + table(totals_row, True))
+        html.append('<div class="b-fight-details__charts">')
+        for target in ['Head', 'Body', 'Leg', 'Distance', 'Clinch', 'Ground']:
+            html.append(f'<div class="b-fight-details__charts-row">\n'
+                        f'<i class="b-fight-details__charts-num">{rnd.randint(0, 100)}%</i>\n'
+                        f'<i class="b-fight-details__charts-title"> {target} </i>\n'
+                        f'<i class="b-fight-details__charts-num">{rnd.randint(0, 100)}%</i>\n</div>')
+        html.append('</div>')
+        html.append(table(strikes_row, False) + table(strikes_row, True))
+    else:
+        html.append('<p class="b-fight-details__collapse-link_tot">\n  Round-by-round stats not currently available.\n'
+                    '</p>')
+
+    html.append('</div>\n</section>\n</body>\n</html>\n')
+    return '\n'.join(html)
+
+
+def fighter_page(rnd: random.Random, name: str, missing: bool) -> Tuple[str, List[str]]:
+    """
+    Fighter profile page in the markup of ufcstats.com.
+    :param rnd: random generator
+    :param name: fighter name
+    :param missing: reach and date of birth are missing
+    :return: html and the columns of the fighter on the listing: height, weight, reach, stance, W, L, D of the fights
+    on the profile
+    """
+    params = [('Height:', f'{rnd.randint(5, 6)}\' {rnd.randint(0, 11)}"'),
+              ('Weight:', f'{rnd.randint(115, 265)} lbs.'),
+              ('Reach:', '--' if missing else f'{rnd.randint(60, 84)}"'),
+              ('STANCE:', rnd.choice(['Orthodox', 'Southpaw', 'Switch'])),
+              ('DOB:', '--' if missing else f'Jul {rnd.randint(1, 28):02d}, {rnd.randint(1970, 2002)}'),
+              ('', ''), ('SLpM:', f'{rnd.uniform(0, 8):.2f}'), ('Str. Acc.:', f'{rnd.randint(20, 70)}%'),
+              ('SApM:', f'{rnd.uniform(0, 8):.2f}'), ('Str. Def:', f'{rnd.randint(20, 70)}%'), ('', ''),
+              ('TD Avg.:', f'{rnd.uniform(0, 5):.2f}'), ('TD Acc.:', f'{rnd.randint(0, 100)}%'),
+              ('TD Def.:', f'{rnd.randint(0, 100)}%'), ('Sub. Avg.:', f'{rnd.uniform(0, 3):.1f}')]
+    items = ''.join(f'<li class="b-list__box-list-item b-list__box-list-item_type_block">\n'
+                    f'  <i class="b-list__box-item-title b-list__box-item-title_type_width">\n    {label}\n  </i>\n'
+                    f'  {value}\n</li>\n' for label, value in params)
+    results = ['win'] * rnd.randint(1, 20) + ['loss'] * rnd.randint(0, 8) + ['draw'] * rnd.randint(0, 1) + ['next']
+    flags = ''.join(f'<tr class="b-fight-details__table-row"><td class="b-fight-details__table-col">'
+                    f'<p class="b-fight-details__table-text"><a class="b-flag"><i class="b-flag__inner">'
+                    f'<i class="b-flag__text">{result}</i></i></a></p></td></tr>\n' for result in results)
+
+    # The listing has decimal inches of reach
+    listing = [params[0][1], params[1][1], params[2][1].replace('"', '.0"') if not missing else '--', params[3][1]]
+    listing += [str(results.count(result)) for result in ['win', 'loss', 'draw']]
+
+    return (f'<!DOCTYPE html>\n<html>\n<body>\n<section class="b-statistics__section_details">\n'
+            f'<h2 class="b-content__title">\n  <span class="b-content__title-highlight">\n    {name}\n  </span>\n'
+            f'</h2>\n'
+            f'<ul class="b-list__box-list">\n{items}</ul>\n<table class="b-fight-details__table">\n<tbody>\n{flags}'
+            f'</tbody>\n</table>\n</section>\n</body>\n</html>\n'), listing
+
+
+def listing_pages(rnd: random.Random, fighters: List[Tuple[str, str, List[str]]]) -> Dict[str, str]:
+    """
+    Alphabetical fighters listing in the markup of ufcstats.com, one page per first letter of the last name.
+    W/L/D of the listing is the whole professional record, fights outside the UFC are added to the profile ones.
+    :param rnd: random generator
+    :param fighters: names, links and listing columns of the fighters
+    :return: dictionary of urls and pages html
+    """
+    links, pages = Links(), {}
+    for char in string.ascii_lowercase:
+        # The first row of the table is empty on the site
+        rows = ['<tr class="b-statistics__table-row">\n<td class="b-statistics__table-col_type_clear" colspan="11">'
+                '</td>\n</tr>\n']
+        for name, link, listing in fighters:
+            first, last = name.split(' ', 1)
+            if not last.lower().startswith(char):
+                continue
+
+            record = [str(int(count) + rnd.randint(0, 6)) for count in listing[4:]]
+            names = [f'<a href="{link}" class="b-link b-link_style_black">{part}</a>' for part in [first, last]]
+            values = names + [''] + listing[:4] + record + ['']
+            rows.append('<tr class="b-statistics__table-row">\n' + ''.join(
+                f'<td class="b-statistics__table-col">\n  {value}\n</td>\n' for value in values) + '</tr>\n')
+
+        pages[links.page_fighters.format(char)] = (f'<!DOCTYPE html>\n<html>\n<body>\n'
+                                                   f'<table class="b-statistics__table">\n<tbody>\n{"".join(rows)}'
+                                                   f'</tbody>\n</table>\n</body>\n</html>\n')
+    return pages
+
+
+def synthetic(seed: int = 0, events: int = len(EVENTS)) -> Dict[str, str]:
+    """
+    Deterministic corpus: events list, events, fights with 1, 3 and 5 rounds, fights with missing stats,
+    an old fight without stats tables and fighter profiles.
+    :param seed: random seed
+    :param events: number of events besides the oldest one, their fights repeat EVENTS
+    :return: dictionary of urls and pages html
+    """
+    rnd, pages, rows, used = random.Random(seed), {}, [], {}
+    fighters = [(f'{first} {last}', f'{BASE}/fighter-details/{url_id(rnd)}')
+                for first, last in zip(['Jon', 'Max', 'Alex', 'Israel', 'Dustin', 'Amanda', 'Leon', 'Islam'] * 3,
+                                       ['Jones', 'Holloway', 'Pereira', 'Adesanya', 'Poirier', 'Nunes', 'Edwards',
+                                        'Makhachev', 'Smith', 'Silva', 'Lee', 'Kim', 'Garcia', 'Ivanov', 'Costa',
+                                        'Brown', 'Evans', 'Lopez', 'Walker', 'Young', 'King', 'Green', 'Hall',
+                                        'Allen'])]
+    # A larger corpus has more fighters, two per extra event
+    fighters += [(f'{first} {last}', f'{BASE}/fighter-details/{url_id(rnd)}')
+                 for first, last in zip(['Fighter'] * 2 * max(events - len(EVENTS), 0), map(str, itertools.count(1)))]
+
+    events = [[EVENTS[num % len(EVENTS)], f'{BASE}/event-details/{url_id(rnd)}',
+               (datetime.date(2024, 3, 2) + datetime.timedelta(days=num)).strftime('%B %d, %Y'), True]
+              for num in range(events)]
+    # The oldest event, fights of that time have no stats tables
+    events.append([[(1, False)], f'{BASE}/event-details/{url_id(rnd)}', 'November 12, 1993', False])
+
+    for num, (fights, event_link, date, stats) in enumerate(events):
+        rows.append(f'<tr class="b-statistics__table-row">\n<td class="b-statistics__table-col">\n'
+                    f'  <i class="b-statistics__table-content">\n'
+                    f'    <a href="{event_link}" class="b-link b-link_style_black">\n      UFC {300 - num}\n    </a>\n'
+                    f'    <span class="b-statistics__date">\n      {date}\n    </span>\n  </i>\n</td>\n</tr>\n')
+        fight_rows = []
+        for rounds, missing in fights:
+            fight_link, pair = f'{BASE}/fight-details/{url_id(rnd)}', rnd.sample(fighters, 2)
+            used.update(pair)
+            pages[fight_link] = fight_page(rnd, rounds, pair, missing, stats)
+            links = ''.join(f'<p class="b-fight-details__table-text">\n  <a href="{link}" '
+                            f'class="b-link b-link_style_black">\n    {name}\n  </a>\n</p>\n' for name, link in pair)
+            fight_rows.append(f'<tr class="b-fight-details__table-row b-fight-details__table-row__hover '
+                              f'js-fight-details-click" data-link="{fight_link}">\n'
+                              f'<td class="b-fight-details__table-col l-page_align_left">\n{links}</td>\n</tr>\n')
+        pages[event_link] = (f'<!DOCTYPE html>\n<html>\n<body>\n<table class="b-fight-details__table">\n<tbody>\n'
+                             f'{"".join(fight_rows)}</tbody>\n</table>\n</body>\n</html>\n')
+
+    pages[Links().page_events] = (f'<!DOCTYPE html>\n<html>\n<body>\n<table class="b-statistics__table-events">\n'
+                                  f'<tbody>\n{"".join(rows)}</tbody>\n</table>\n</body>\n</html>\n')
+
+    # Profiles of every fourth fighter miss reach and date of birth
+    listed = []
+    for num, (name, link) in enumerate(sorted(used.items())):
+        pages[link], listing = fighter_page(rnd, name, missing=num % 4 == 3)
+        listed.append((name, link, listing))
+    pages.update(listing_pages(rnd, listed))
+
+    return pages
+
+
+def record(events: int) -> Dict[str, str]:
+    """
+    Download a corpus from the site: the latest events and the oldest one with their fights and fighters.
+    :param events: number of the latest events
+    :return: dictionary of urls and pages html
+    """
+    links = Links()
+    with Fetcher(use_cache=False) as fetcher:
+        pages = {links.page_events: fetcher.fetch(links.page_events)}
+        soup = BeautifulSoup(pages[links.page_events], 'lxml')
+        event_links = [row.find('a')['href'] for row in soup.find_all('i', class_=links.cls_statistics)]
+        event_links = event_links[:events] + event_links[-1:]
+
+        urls = []
+        for event_link, page in zip(event_links, fetcher.fetch_many(event_links, desc='Events recorded')):
+            pages[event_link] = page
+            soup = BeautifulSoup(page, 'lxml')
+            urls += [row['data-link'] for row in soup.find_all('tr', class_=links.cls_fight_details_tb)]
+            urls += [block['href'] for block in soup.find_all('a', class_=links.cls_style) if block.get('href')]
+
+        urls = list(dict.fromkeys(urls))
+        for url, page in zip(urls, fetcher.fetch_many(urls, desc='Pages recorded')):
+            if page is not None:
+                pages[url] = page
+
+    return pages
+
+
+def save(pages: Dict[str, str], folder: str) -> None:
+    """
+    Write pages and the index of their urls.
+    :param pages: dictionary of urls and pages html
+    :param folder: fixtures folder
+    """
+    os.makedirs(folder, exist_ok=True)
+    index = {}
+    for url, page in pages.items():
+        kind = ('events' if url == Links().page_events else 'fighters' if '/statistics/fighters' in url
+                else url.rstrip('/').split('/')[-2])
+        index[url] = f'{kind}-{len(index):03d}.html'
+        with open(os.path.join(folder, index[url]), 'w', encoding='utf-8') as file:
+            file.write(page)
+
+    with open(os.path.join(folder, 'index.json'), 'w', encoding='utf-8') as file:
+        json.dump(index, file, indent=1)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Build the html fixtures of the benchmark suite')
+    arg_parser.add_argument('--folder', default=os.path.join('benchmarks', 'fixtures'), help='fixtures folder')
+    arg_parser.add_argument('--record', type=int, default=0,
+                            help='download the given number of the latest events from the site instead of '
+                                 'generating the synthetic corpus')
+    arg_parser.add_argument('--seed', type=int, default=0, help='random seed of the synthetic corpus')
+    arg_parser.add_argument('--events', type=int, default=len(EVENTS), help='events of the synthetic corpus')
+    args = arg_parser.parse_args()
+
+    corpus = record(args.record) if args.record else synthetic(args.seed, args.events)
+    save(corpus, args.folder)
+    print(f'{len(corpus)} pages saved to {args.folder}')
@@ -1,26 +1,208 @@
-from utils.scripts import save_data
+import os
+import argparse
+from src.fetcher import Fetcher
+from src.manifest import Manifest
+from src.metrics import Metrics
+from src.checkpoint import Checkpoint
+from src.crawl_graph import CrawlGraph
+from src.shard_worker import ShardWorker
+from src.pipeline import Pipeline
+from src.store import Store
+from src.career_features import CareerFeatures, fight_records
+from src.schemas import dataset_schema
+from src.stats_model import normalize_events
+from utils.scripts import save_data, load_data, merge_data, open_writer
 from src.event_parser import EventsParser
 from src.fighter_parser import FighterParser
 
 
 if __name__ == '__main__':
-    # Initialization of classes
-    fp, ev = FighterParser(), EventsParser()
+    arg_parser = argparse.ArgumentParser(description='UFC statistics parser')
+    arg_parser.add_argument('--workers', type=int, default=16, help='max number of concurrent requests')
+    arg_parser.add_argument('--parse-workers', type=int, default=os.cpu_count(),
+                            help='number of processes parsing html, 0 parses in the main process')
+    arg_parser.add_argument('--chunk-size', type=int, default=10000, help='rows written at once, the resume step')
+    arg_parser.add_argument('--cache-dir', default='cache', help='directory of the html cache')
+    arg_parser.add_argument('--no-cache', action='store_true', help='always download pages from the site')
+    arg_parser.add_argument('--offline', action='store_true', help='serve pages only from the html cache')
+    arg_parser.add_argument('--fighters-discovery', choices=['events', 'index'], default='events',
+                            help='find fighters on event pages or on the alphabetical fighters listing')
+    arg_parser.add_argument('--no-profiles', action='store_true',
+                            help='with index discovery collect only the listing columns, without fighter profiles')
+    arg_parser.add_argument('--format', choices=['parquet', 'feather', 'xlsx'], default='parquet',
+                            help='format of the saved datasets')
+    arg_parser.add_argument('--typed', action='store_true',
+                            help='save fights with typed stats and a long per round table instead of the wide events')
+    arg_parser.add_argument('--excel', action='store_true', help='export the datasets to excel as well')
+    arg_parser.add_argument('--incremental', action='store_true', help='parse only events newer than saved data')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='continue an interrupted full run from its checkpoint instead of starting over')
+    arg_parser.add_argument('--report', default=os.path.join('data', 'run_report.json'),
+                            help='path of the json run report, empty to disable')
+    arg_parser.add_argument('--metrics-textfile', default=os.path.join('data', 'ufc_parser.prom'),
+                            help='path of the prometheus textfile, empty to disable')
+    arg_parser.add_argument('--store', nargs='?', const=os.path.join('data', 'ufc.sqlite'),
+                            help='upsert the datasets into the indexed sqlite database as well, data/ufc.sqlite '
+                                 'if the path is not given')
+    arg_parser.add_argument('--features', action='store_true',
+                            help='save pre-fight career features of both fighters of every fight, an incremental '
+                                 'run updates them with the new fights only')
+    arg_parser.add_argument('--plan', action='store_true', help='split the events list into shards of the work queue')
+    arg_parser.add_argument('--worker', action='store_true',
+                            help='claim and crawl shards of the work queue until it is drained, '
+                                 'any number of workers can share the queue')
+    arg_parser.add_argument('--merge', action='store_true',
+                            help='combine partial outputs of crawled shards into the datasets')
+    arg_parser.add_argument('--queue', default=os.path.join('data', 'queue.sqlite'),
+                            help='path of the work queue of the sharded crawl')
+    arg_parser.add_argument('--shard-size', type=int, default=25, help='events in a shard of the work queue')
+    arg_parser.add_argument('--lease', type=float, default=300.0,
+                            help='seconds after which a shard of a silent worker is given to another one')
+    args = arg_parser.parse_args()
+    sharded = args.plan or args.worker or args.merge
+    if sharded and (args.incremental or args.resume or args.no_profiles):
+        arg_parser.error('the sharded crawl is a full run with fighter profiles, resumed by the work queue')
+    if args.no_profiles and args.fighters_discovery != 'index':
+        arg_parser.error('--no-profiles collects the listing columns, it needs --fighters-discovery index')
+
+    config = {'max_workers': args.workers, 'parse_workers': args.parse_workers, 'chunk_size': args.chunk_size,
+              'cache_dir': args.cache_dir, 'use_cache': not args.no_cache, 'offline': args.offline,
+              'fighters_discovery': args.fighters_discovery, 'fetch_profiles': not args.no_profiles,
+              'report_path': args.report, 'metrics_textfile': args.metrics_textfile,
+              'queue_path': args.queue, 'shard_size': args.shard_size, 'lease_seconds': args.lease}
+
+    # Every worker of a sharded crawl writes its own run report and metrics
+    shards = ShardWorker(**config) if sharded else None
+    if args.worker:
+        config['metrics_labels'] = {'worker': shards.worker_id}
+        for key in ['report_path', 'metrics_textfile']:
+            if config[key]:
+                name, extension = os.path.splitext(config[key])
+                config[key] = f'{name}-{shards.worker_id}{extension}'
+
+    # Initialization of classes, both parsers share one pool of connections, the cache and the metrics
+    fetcher, metrics = Fetcher(**config), Metrics(**config)
+    fp, ev, graph = FighterParser(**config), EventsParser(**config), CrawlGraph(**config)
+    fp.fetcher = ev.fetcher = graph.fetcher = fetcher
+    fp.metrics = ev.metrics = graph.metrics = fetcher.metrics = metrics
+    # A full run records the ingested pages from scratch, so the next incremental run continues from it
+    manifest = Manifest() if not sharded else None
+    if manifest is not None and not args.incremental:
+        manifest.sections = {}
+    store = Store(**config, store_path=args.store) if args.store else None
+    if store is not None:
+        store.metrics = metrics
+    features = CareerFeatures(**config) if args.features else None
     print('-----STARTING PARSING DATA-----')
 
-    # Running the fighter parser
-    fighters_data = fp.get_fighter_data()
-    save_data('fighter.xlsx', fighters_data)
-    print('---FIGHTERS DATASET PREPARED AND SAVED---')
+    # The run report and the metrics are saved even if the run fails
+    success = False
+    try:
+        # Tables of the events dataset and columns identifying their rows
+        events_keys = {'fights': 'event_fight', 'rounds': ['event_fight', 'fighter', 'round']} if args.typed \
+            else {'events': 'event_fight'}
+
+        # A full run streams the datasets into resumable files and logs written pages, so it can be resumed
+        checkpoint = Checkpoint() if not args.incremental and not sharded else None
+        if checkpoint is not None and not args.resume:
+            checkpoint.clear()
 
-    # Running the event parser
-    events_data = ev.get_all_event_data()
-    save_data('events.xlsx', events_data)
-    print('---FIGHTERS EVENTS DATASET PREPARED AND SAVED---')
+        if sharded:
+            # Shards are planned, crawled by any number of workers sharing the queue and merged, in one run
+            # or in separate runs
+            shards.fetcher, shards.metrics = fetcher, metrics
+            if args.plan:
+                shards.plan()
+            if args.worker:
+                shards.run()
+            if args.merge:
+                shards.merge(args.format, args.typed, store)
+        else:
+            # Events list and event pages are downloaded once for both parsers
+            graph.build(manifest)
 
+            fighters_file = f'fighter.{args.format}'
 
+            def event_tables(data):
+                return normalize_events(data, ev) if args.typed else {'events': data}
 
+            # Running the fighter parser
+            if not args.incremental:
+                if checkpoint.done('datasets', 'fighter'):
+                    # Fighters are written before the interruption, events of failed profiles are not ingested
+                    written = checkpoint.sections.get('fighters', set())
+                    manifest.add('fighters_events', [event[1] for event in graph.events if graph.fighters.get(event[1])
+                                                     and all(link in written for link in graph.fighters[event[1]])])
+                else:
+                    schema = dataset_schema('fighter', fp)
+                    with open_writer(fighters_file, schema, resumable=True, resume=args.resume,
+                                     metrics=metrics, key='Link') as writer:
+                        for chunk in fp.iter_fighter_data(manifest, graph, checkpoint=checkpoint):
+                            writer.write(chunk)
+                            if store is not None:
+                                store.upsert_fighters(chunk)
+                    checkpoint.mark('datasets', ['fighter'])
+            else:
+                # Fighters are identified by their links, files saved before the links were added by their names
+                fighters_data, saved_fighters = fp.get_fighter_data(manifest, graph), load_data(fighters_file)
+                key = 'Fullname' if saved_fighters is not None and 'Link' not in saved_fighters else 'Link'
+                save_data(fighters_file, merge_data(saved_fighters, fighters_data, key),
+                          dataset_schema('fighter', fp), metrics)
+                if store is not None:
+                    store.upsert_fighters(fighters_data)
+            print('---FIGHTERS DATASET PREPARED AND SAVED---')
 
+            # Running the event parser, a full run streams fights into the files as they are parsed
+            if not args.incremental:
+                # Fights written again after a kill between a write and its checkpoint are kept once
+                writers = {name: open_writer(f'{name}.{args.format}', dataset_schema(name, ev), resumable=True,
+                                             resume=args.resume, metrics=metrics, key=events_keys[name])
+                           for name in events_keys}
+                for chunk in ev.iter_event_data(manifest, graph, checkpoint=checkpoint):
+                    for name, table in event_tables(chunk).items():
+                        writers[name].write(table)
+                    if store is not None:
+                        store.upsert_events(chunk)
+                for writer in writers.values():
+                    writer.close()
+            else:
+                events_data = ev.get_all_event_data(manifest, graph)
+                for name, table in event_tables(events_data).items():
+                    events_file = f'{name}.{args.format}'
+                    save_data(events_file, merge_data(load_data(events_file), table, events_keys[name]),
+                              dataset_schema(name, ev), metrics)
+                if store is not None:
+                    store.upsert_events(events_data)
+            print('---FIGHTERS EVENTS DATASET PREPARED AND SAVED---')
 
+        # Features are built from the saved fights, an incremental run adds the new ones to the running state
+        if features is not None and (args.merge or not sharded):
+            features_file = f'features.{args.format}'
+            if not args.incremental or features.state is None:
+                features_data = features.rebuild(fight_records(load_data(f'{"fights" if args.typed else "events"}.'
+                                                                         f'{args.format}')))
+            else:
+                features_data = merge_data(load_data(features_file), features.update(fight_records(events_data)),
+                                           'event_fight')
+            save_data(features_file, features_data, dataset_schema('features', features), metrics)
+            features.save()
+            print('---CAREER FEATURES PREPARED AND SAVED---')
 
+        if args.excel and args.format != 'xlsx' and (args.merge or not sharded):
+            for name in ['fighter', *events_keys, *(['features'] if features is not None else [])]:
+                save_data(f'{name}.xlsx', load_data(f'{name}.{args.format}'), metrics=metrics)
 
+        # Manifest is saved last, so a crash never marks unsaved pages as ingested
+        if manifest is not None:
+            manifest.save()
+        if checkpoint is not None:
+            checkpoint.clear()
+        success = True
+    finally:
+        metrics.save(success)
+        fetcher.close()
+        Pipeline.close_pool()
+        if shards is not None:
+            shards.close()
+        if store is not None:
+            store.close()
@@ -0,0 +1,119 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Optional
+from dataclasses import dataclass
+from src.data_class import Links
+
+
+class CacheMissError(LookupError):
+    """
+    Page is absent in the cache while the parser works offline.
+    """
+
+
+@dataclass
+class HtmlCache(Links):
+    """
+    Persistent cache of raw html pages. Pages are stored zlib compressed in a sqlite file keyed by url,
+    expire by the ttl of their url class and are evicted in least recently used order above cache_max_size.
+    """
+
+    def __post_init__(self) -> None:
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'pages.sqlite'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, body BLOB NOT NULL, '
+                           'size INTEGER NOT NULL, fetched REAL NOT NULL, accessed REAL NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def ttl(self, url: str) -> Optional[float]:
+        """
+        :param url: page url
+        :return: lifetime of the page in seconds, None if the page never expires
+        """
+        for url_class, ttl in self.cache_ttl.items():
+            if url_class in url:
+                return ttl
+
+        return self.cache_ttl.get('default')
+
+    def get(self, url: str, stale: bool = False) -> Optional[str]:
+        """
+        Return cached page.
+        :param url: page url
+        :param stale: return the page even if it is expired
+        :return: page html or None if it is absent or expired
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT body, fetched FROM pages WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+
+            ttl = self.ttl(url)
+            if not stale and ttl is not None and time.time() - row[1] > ttl:
+                return None
+
+            self._conn.execute('UPDATE pages SET accessed = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, url: str, page: str) -> None:
+        """
+        Save page to the cache and evict old pages if the cache is over its size.
+        :param url: page url
+        :param page: page html
+        """
+        body = zlib.compress(page.encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM pages WHERE url = ?', (url,)).fetchone()
+            self._size += len(body) - (row[0] if row else 0)
+            self._conn.execute('INSERT OR REPLACE INTO pages (url, body, size, fetched, accessed) '
+                               'VALUES (?, ?, ?, ?, ?)', (url, body, len(body), now, now))
+            if self._size > self.cache_max_size:
+                self.evict()
+            self._conn.commit()
+
+    def delete(self, url: str) -> None:
+        """
+        Delete the page from the cache.
+        :param url: page url
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM pages WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return
+            self._size -= row[0]
+            self._conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+            self._conn.commit()
+
+    def evict(self) -> None:
+        """
+        Delete least recently used pages until the cache takes no more than 90% of cache_max_size.
+        Called under the lock.
+        """
+        limit = self.cache_max_size * 0.9
+        rows = self._conn.execute('SELECT url, size FROM pages ORDER BY accessed').fetchall()
+
+        evicted = []
+        for url, size in rows:
+            if self._size <= limit:
+                break
+            evicted.append((url,))
+            self._size -= size
+
+        self._conn.executemany('DELETE FROM pages WHERE url = ?', evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,204 @@
+import os
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from dataclasses import dataclass
+from src.data_class import Links
+from src.normalize import time_seconds
+from src.stats_model import typed_columns, typed_stats
+from typing import Dict, List
+
+# Sums of a fighter over his fights, the features are built from them. 'abs' strikes are landed on the fighter,
+# 'opp' takedowns are attempted by the opponent, stats_sec is the time of the fights with stats
+SUMS = ['fights', 'wins', 'losses', 'draws', 'ko_wins', 'sub_wins', 'fight_sec', 'stats_sec', 'sig_str_landed',
+        'sig_str_attempted', 'sig_str_abs_landed', 'sig_str_abs_attempted', 'td_landed', 'td_attempted',
+        'td_opp_landed', 'td_opp_attempted', 'kd', 'sub_att', 'ctrl_sec']
+
+# Stats of the fight pages the sums are taken from
+STATS = ['sig_str', 'td', 'kd', 'sub.att', 'ctrl']
+
+# Features of the whole career before the fight, rates are computed for the last fights as well
+COUNTS = ['fights', 'wins', 'losses', 'draws', 'ko_wins', 'sub_wins', 'fight_minutes', 'win_streak', 'days_since_last']
+RATES = ['win_pct', 'sig_str_acc', 'sig_str_def', 'slpm', 'sapm', 'td_acc', 'td_def', 'td_avg', 'sub_avg', 'kd_avg',
+         'ctrl_pct']
+
+
+def feature_names(links: Links) -> List[str]:
+    """
+    :param links: parameters of the features, the rolling ones depend on features_window
+    :return: names of the features of a fighter
+    """
+    return COUNTS + RATES + [f'last{links.features_window}_{name}' for name in ['wins'] + RATES]
+
+
+def fight_records(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function turns fights into one row per fighter and fight with the sums of the fight.
+    Fighters are identified by their links, by names in datasets saved without the links.
+    :param data: prepared events dataset or fights of the typed stats model
+    :return: DataFrame with event_fight, date, corner, fighter and SUMS columns
+    """
+    if data.empty:
+        return pd.DataFrame(columns=['event_fight', 'date', 'corner', 'fighter'] + SUMS)
+
+    stats = {}
+    for corner in (1, 2):
+        typed = [f'f{corner}_{column}' for column, _ in typed_columns(STATS)]
+        if set(typed) <= set(data.columns):
+            part = data[typed].set_axis([column for column, _ in typed_columns(STATS)], axis=1)
+        else:
+            part = typed_stats(data[[f'f{corner}_{name}' for name in STATS]].set_axis(STATS, axis=1))
+        stats[corner] = part.astype('float64')
+
+    # Rounds before the last one last as the first round of the time format, 5 minutes if it is unknown
+    rounds = pd.to_numeric(data['round'], errors='coerce').astype('float64')
+    last_round = time_seconds(data['time'])
+    round_sec = pd.to_numeric(data['time_format'].astype('string').str.extract(r'\((\d+)')[0], errors='coerce')
+    fight_sec = ((rounds - 1) * round_sec.fillna(5).astype('float64') * 60 + last_round.astype('float64')).fillna(0)
+    method = data['win_method'].astype('string').fillna('')
+
+    parts = []
+    for corner, other in ((1, 2), (2, 1)):
+        status = data[f'f{corner}_status_fg'].astype('string').str.strip()
+        fighter = data[f'f{corner}_url'] if f'f{corner}_url' in data else pd.Series(np.nan, index=data.index)
+        wins = (status == 'W').fillna(False).to_numpy()
+        part = pd.DataFrame({'event_fight': data['event_fight'], 'date': data['date'], 'corner': corner,
+                             'fighter': fighter.fillna(data[f'f{corner}_fullname']),
+                             'fights': 1.0, 'wins': wins, 'losses': (status == 'L').fillna(False).to_numpy(),
+                             'draws': (status == 'D').fillna(False).to_numpy(),
+                             'ko_wins': wins & method.str.contains('KO').to_numpy(),
+                             'sub_wins': wins & method.str.startswith('Submission').to_numpy(),
+                             'fight_sec': fight_sec, 'stats_sec': fight_sec.where(stats[corner]['sig_str_attempted']
+                                                                                  .notna(), 0)})
+        for column in ['sig_str_landed', 'sig_str_attempted', 'td_landed', 'td_attempted', 'kd', 'sub_att',
+                       'ctrl_sec']:
+            part[column] = stats[corner][column]
+        for name, column in [('sig_str_abs', 'sig_str'), ('td_opp', 'td')]:
+            part[f'{name}_landed'] = stats[other][f'{column}_landed']
+            part[f'{name}_attempted'] = stats[other][f'{column}_attempted']
+        parts.append(part)
+
+    records = pd.concat(parts, ignore_index=True)
+    records[SUMS] = records[SUMS].astype('float64').fillna(0)
+    return records
+
+
+def rates(sums: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    :param sums: SUMS of fights of fighters
+    :return: rates of the sums, missing where the denominator is zero
+    """
+    def ratio(numerator: str, denominator: str) -> pd.Series:
+        return sums[numerator] / sums[denominator].where(sums[denominator] > 0)
+
+    per_15_min = 15 * 60 / sums['stats_sec'].where(sums['stats_sec'] > 0)
+    return {'win_pct': ratio('wins', 'fights'), 'sig_str_acc': ratio('sig_str_landed', 'sig_str_attempted'),
+            'sig_str_def': 1 - ratio('sig_str_abs_landed', 'sig_str_abs_attempted'),
+            'slpm': ratio('sig_str_landed', 'stats_sec') * 60, 'sapm': ratio('sig_str_abs_landed', 'stats_sec') * 60,
+            'td_acc': ratio('td_landed', 'td_attempted'), 'td_def': 1 - ratio('td_opp_landed', 'td_opp_attempted'),
+            'td_avg': sums['td_landed'] * per_15_min, 'sub_avg': sums['sub_att'] * per_15_min,
+            'kd_avg': sums['kd'] * per_15_min, 'ctrl_pct': ratio('ctrl_sec', 'stats_sec')}
+
+
+@dataclass
+class CareerFeatures(Links):
+    """
+    Features of both fighters of every fight as of the fight date: the record, strike and takedown rates
+    of the whole career before the fight and of the last features_window fight dates. Fights of the fight date
+    itself are never counted, a fighter of a tournament has the same features in all his fights of the night.
+    The running sums of every fighter are kept in features_state_path, so new fights cost only their rows.
+    """
+
+    def __post_init__(self) -> None:
+        self.state = pd.read_parquet(self.features_state_path) if os.path.exists(self.features_state_path) \
+            else None
+
+    def update(self, records: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute features of the fights and add them to the running state. Fights have to be newer than the fights
+        already in the state, fights of a fighter at or before his last known date are skipped.
+        :param records: fight_records of the new fights
+        :return: features of the fights, one row per fight by date
+        """
+        names = ['event_fight', 'date'] + [f'f{corner}_{name}' for corner in (1, 2)
+                                           for name in ['url'] + feature_names(self)]
+        cum_sums, window = [f'cum_{name}' for name in SUMS], self.features_window
+        state = self.state if self.state is not None else \
+            pd.DataFrame(columns=['fighter', 'date'] + SUMS + cum_sums + ['last_nonwin'])
+
+        # Fights already counted would be counted twice, the state has to be rebuilt to correct them
+        last_dates = records['fighter'].map(state.groupby('fighter')['date'].max())
+        stale = records.loc[records['date'] <= last_dates, 'event_fight'].unique()
+        if len(stale):
+            tqdm.write(f'-----{len(stale)} FIGHTS ARE NOT NEWER THAN THE FEATURES STATE AND ARE SKIPPED-----')
+            records = records[~records['event_fight'].isin(stale)]
+        if records.empty:
+            return pd.DataFrame(columns=names)
+
+        days = records.groupby(['fighter', 'date'], as_index=False)[SUMS].sum()
+        days['new'] = True
+        old = state[state['fighter'].isin(days['fighter'])].assign(new=False)
+        combined = pd.concat([old, days], ignore_index=True).sort_values(['fighter', 'date'], kind='stable',
+                                                                          ignore_index=True)
+        fighters, new = combined['fighter'], combined['new'].to_numpy(dtype=bool)
+
+        # The first kept date of a fighter carries the sums of his older fights, later dates add their own sums
+        increments = combined[SUMS].to_numpy(dtype='float64')
+        carry = ~fighters.duplicated().to_numpy() & ~new
+        increments[carry] = combined.loc[carry, cum_sums].to_numpy(dtype='float64')
+        cum = pd.DataFrame(increments, columns=SUMS).groupby(fighters).cumsum()
+
+        # Sums before the date and sums of the last dates before it
+        before = cum - combined[SUMS].astype('float64')
+        last = cum.groupby(fighters).shift(1).fillna(0) - cum.groupby(fighters).shift(window + 1).fillna(0)
+
+        # Fights since the last date with a fight which is not a win
+        nonwin = (combined['fights'] > combined['wins']).to_numpy(dtype=bool)
+        last_nonwin = pd.Series(np.where(new, np.where(nonwin, cum['fights'], 0), combined['last_nonwin']),
+                                dtype='float64').groupby(fighters).cummax()
+        streak = (cum['fights'] - last_nonwin).groupby(fighters).shift(1).fillna(0)
+
+        features = pd.DataFrame({'fighter': fighters, 'date': combined['date'], **before[COUNTS[:6]],
+                                 'fight_minutes': before['fight_sec'] / 60, 'win_streak': streak,
+                                 'days_since_last': combined['date'].groupby(fighters).diff().dt.days,
+                                 **rates(before), f'last{window}_wins': last['wins'],
+                                 **{f'last{window}_{name}': value for name, value in rates(last).items()}})[new]
+
+        # Sums of the dates are kept for the rolling features, the first kept date carries the older ones
+        kept = combined.drop(columns=['new'] + cum_sums).assign(**{name: cum[name[4:]] for name in cum_sums},
+                                                                 last_nonwin=last_nonwin)
+        kept = kept.groupby('fighter').tail(window + 1)
+        self.state = pd.concat([state[~state['fighter'].isin(days['fighter'])], kept], ignore_index=True)
+        self.state[SUMS + cum_sums + ['last_nonwin']] = self.state[SUMS + cum_sums + ['last_nonwin']].astype('float64')
+
+        # Features of both corners side by side
+        fights = records.drop_duplicates(['event_fight', 'corner'])
+        fights = fights[['event_fight', 'date', 'corner', 'fighter']].merge(features, on=['fighter', 'date'])
+        wide = [fights[fights['corner'] == corner].drop(columns='corner').set_index(['event_fight', 'date'])
+                .rename(columns=lambda name: f'f{corner}_{"url" if name == "fighter" else name}') for corner in (1, 2)]
+        data = pd.concat(wide, axis=1).reindex(columns=names[2:]).reset_index()
+        return data.sort_values(['date', 'event_fight'], kind='stable', ignore_index=True)
+
+    def rebuild(self, records: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute features of the whole history from scratch.
+        :param records: fight_records of all fights
+        :return: features of the fights
+        """
+        self.state = None
+        return self.update(records)
+
+    def save(self) -> None:
+        """
+        Atomically write the running state. Should be called only after the features are saved.
+        """
+        if self.state is None:
+            return
+
+        folder = os.path.dirname(self.features_state_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        tmp_path = self.features_state_path + '.tmp'
+        self.state.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.features_state_path)
@@ -0,0 +1,58 @@
+import os
+from dataclasses import dataclass
+from src.data_class import Links
+from typing import Iterable
+
+
+@dataclass
+class Checkpoint(Links):
+    """
+    Durable append-only log of urls whose records are already written, grouped by sections (fights, fighters).
+    Urls are marked after their chunk is written, so a crashed or interrupted run resumes where it stopped.
+    """
+
+    def __post_init__(self) -> None:
+        self.sections = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    # The last line may be torn by a crash, complete lines end with a newline
+                    if line.endswith('\n') and '\t' in line:
+                        section, url = line.rstrip('\n').split('\t', 1)
+                        self.sections.setdefault(section, set()).add(url)
+
+    def done(self, section: str, url: str) -> bool:
+        """
+        :param section: name of the section
+        :param url: page url
+        :return: True if the record of the url is already written
+        """
+        return url in self.sections.get(section, ())
+
+    def mark(self, section: str, urls: Iterable[str]) -> None:
+        """
+        Append urls to the log and flush it to the disk.
+        :param section: name of the section
+        :param urls: pages urls
+        """
+        urls = [url for url in urls if not self.done(section, url)]
+        if not urls:
+            return
+
+        folder = os.path.dirname(self.checkpoint_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as file:
+            file.writelines(f'{section}\t{url}\n' for url in urls)
+            file.flush()
+            os.fsync(file.fileno())
+        self.sections.setdefault(section, set()).update(urls)
+
+    def clear(self) -> None:
+        """
+        Forget all urls and remove the log. Called when a run is finished or started from scratch.
+        """
+        self.sections = {}
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -0,0 +1,95 @@
+from bs4 import BeautifulSoup
+from dataclasses import dataclass
+from src.fetcher import Fetching
+from src.manifest import Manifest
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class CrawlGraph(Fetching):
+    """
+    Deduplicated url graph of the site: events -> fights -> fighters. The events list and every event page
+    are downloaded once per run and the graph is shared by the fighter and events parsers.
+    """
+
+    def __post_init__(self) -> None:
+        self.events = []
+        self.fights = {}
+        self.fighters = {}
+
+    def build(self, manifest: Optional[Manifest] = None,
+              events: Optional[List[Tuple[str, str]]] = None) -> 'CrawlGraph':
+        """
+        Download the events list and event pages and fill the graph.
+        :param manifest: registry of ingested pages, if passed event pages already ingested by both parsers
+        are not downloaded
+        :param events: date and link of the events of the graph, the whole events list by default
+        :return: the graph itself
+        """
+        self.events = self.get_events() if events is None else [tuple(event) for event in events]
+
+        events_links = [event[1] for event in self.events]
+        if manifest is not None:
+            events_links = [link for link in events_links
+                            if not (manifest.seen('events', link) and manifest.seen('fighters_events', link))]
+
+        for event_link, page in zip(events_links, self.fetcher.fetch_many(events_links, desc='Events scanned')):
+            if page is not None:
+                with self.metrics.measure('parse', event_link):
+                    self.add_event(event_link, BeautifulSoup(page, 'lxml'))
+
+        return self
+
+    def get_events(self) -> List[Tuple[str, str]]:
+        """
+        :return: date and link of every event from the events list
+        """
+        page = self.fetcher.fetch(self.page_events)
+        with self.metrics.measure('parse', self.page_events):
+            soup = BeautifulSoup(page, 'lxml')
+            events = [(row.find('span').text.strip(), row.find('a')['href'])
+                      for row in soup.find_all('i', class_=self.cls_statistics)]
+
+        return events
+
+    def add_event(self, event_link: str, soup: Any) -> None:
+        """
+        Add fights and fighters of the event page to the graph.
+        :param event_link: url of the event
+        :param soup: soup of the event page
+        """
+        self.fights[event_link] = []
+        for row in soup.find_all('tr', class_=self.cls_fight_details_tb):
+            self.fights[event_link].append(row['data-link'])
+
+        # Fighters are keyed by their links, names are not unique
+        self.fighters[event_link] = {}
+        for block in soup.find_all('a', class_=self.cls_style):
+            fighter_name, fighter_link = self.data_check(block)
+            if fighter_link is not None:
+                self.fighters[event_link][fighter_link] = fighter_name
+
+    @staticmethod
+    def data_check(block: Any) -> List[str]:
+        """
+        :param block:
+        :return: list consist with fighter name and actual link
+        """
+        fighter_name, fighter_link = None, None
+        try:
+            fighter_name, fighter_link = block.text.strip(), block['href']
+        except KeyError:
+            pass
+
+        return [fighter_name, fighter_link]
+
+    def fighters_of(self, events_links: List[str]) -> Dict[str, str]:
+        """
+        :param events_links: urls of events
+        :return: dictionary of links and names of fighters of the events
+        """
+        fighters_dict = {}
+        for event_link in events_links:
+            fighters_dict.update(self.fighters.get(event_link, {}))
+
+        return fighters_dict
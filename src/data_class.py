@@ -1,10 +1,13 @@
-from dataclasses import dataclass, field
+import os
+import socket
+from dataclasses import dataclass, field, fields
 
 
 @dataclass
 class Links:
 
     page_events: str = 'http://ufcstats.com/statistics/events/completed?page=all'
+    page_fighters: str = 'http://ufcstats.com/statistics/fighters?char={}&page=all'
 
     headers: dict = field(default_factory=lambda: {'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,' +
                                                              'image/avif,image/webp,image/apng,*/*;q=0.8,application/' +
@@ -20,6 +23,101 @@ class Links:
 
     num_rounds: int = 5
 
+    # Discovery of fighters: 'events' crawls every event page, 'index' reads the alphabetical fighters listing,
+    # without profiles only the listing columns are collected
+    fighters_discovery: str = 'events'
+    fetch_profiles: bool = True
+
+    # Backend of the fight page extractor: 'bs4' or the faster 'lxml'
+    extract_backend: str = 'bs4'
+
+    # Columns of the totals and significant strikes tables: (name of the stat, index of the first fighter cell)
+    totals_cols: tuple = (('kd', 2), ('sig_str', 4), ('sig_str%', 6), ('total_str', 8), ('td', 10), ('td%', 12),
+                          ('sub.att', 14), ('rev', 16), ('ctrl', 18))
+    strikes_cols: tuple = (('sig_str_head', 6), ('sig_str_body', 8), ('sig_str_leg', 10), ('sig_str_dist', 12),
+                           ('sig_str_clinch', 14), ('sig_str_ground', 16))
+    charts_cols: tuple = ('head', 'body', 'leg', 'dist', 'clinch', 'ground')
+
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    max_workers: int = 16
+
+    # Adaptive rate control of requests per host: requests in flight start at initial_concurrency and grow up to
+    # max_workers while latency is below latency_tolerance times the lowest seen one, throttling cuts them
+    # by backoff_factor
+    initial_concurrency: int = 2
+    backoff_factor: float = 0.5
+    latency_tolerance: float = 3.0
+    latency_smoothing: float = 0.2
+
+    # Failed requests are retried with jittered exponential delays, at least the Retry-After of the site
+    max_retries: int = 4
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 60.0
+    retry_statuses: tuple = (429, 500, 502, 503, 504)
+    throttle_statuses: tuple = (429, 503, 504)
+
+    # Consecutive failures opening the circuit of a host, seconds before a probe request is let through and
+    # openings in a row after which the host is considered down
+    breaker_threshold: int = 8
+    breaker_cooldown: float = 30.0
+    breaker_trips: int = 3
+
+    # Processes parsing html pages, 0 means parsing in the main process; size of the queues between stages
+    # and max records held back by a slow page until the earlier pages are finished
+    parse_workers: int = field(default_factory=os.cpu_count)
+    queue_size: int = 256
+    reorder_window: int = 256
+
+    # Rows in a chunk of the streamed datasets
+    chunk_size: int = 10000
+
+    manifest_path: str = os.path.join('data', 'manifest.json')
+    # Log of pages whose records are already written, an interrupted run resumes from it
+    checkpoint_path: str = os.path.join('data', 'checkpoint.log')
+
+    # Sharded crawl: work queue shared by the workers and partial outputs of the shards, events and fighters
+    # in a shard, seconds a claimed shard is leased to a worker and claims of a shard before it is marked as failed.
+    # A failed shard waits shard_retry_delay seconds doubled with every attempt, at most shard_retry_max_delay
+    queue_path: str = os.path.join('data', 'queue.sqlite')
+    parts_dir: str = os.path.join('data', 'parts')
+    shard_size: int = 25
+    fighter_shard_size: int = 200
+    lease_seconds: float = 300.0
+    max_attempts: int = 3
+    shard_retry_delay: float = 30.0
+    shard_retry_max_delay: float = 600.0
+    worker_id: str = field(default_factory=lambda: f'{socket.gethostname()}-{os.getpid()}')
+
+    # Sqlite database of the datasets in normalized tables, see src.store
+    store_path: str = os.path.join('data', 'ufc.sqlite')
+
+    # Pre-fight career features: running sums of every fighter, see src.career_features, and fight dates
+    # of the rolling features
+    features_state_path: str = os.path.join('data', 'features_state.parquet')
+    features_window: int = 3
+
+    # Json run report and prometheus textfile written at the end of a run, an empty path disables the output
+    report_path: str = os.path.join('data', 'run_report.json')
+    metrics_textfile: str = os.path.join('data', 'ufc_parser.prom')
+    metrics_prefix: str = 'ufc_parser'
+    # Failed urls kept in the run report
+    metrics_max_failures: int = 1000
+    # Labels added to every series of the prometheus textfile, for example the worker of a sharded crawl
+    metrics_labels: dict = field(default_factory=dict)
+
+    offline: bool = False
+    use_cache: bool = True
+    cache_dir: str = 'cache'
+    cache_max_size: int = 2 * 1024 ** 3
+
+    # Cache lifetime in seconds by url class, the first matched class is used, None means the page never expires
+    cache_ttl: dict = field(default_factory=lambda: {'statistics/events': 60 * 60,
+                                                     'event-details': 7 * 24 * 60 * 60,
+                                                     'fight-details': None,
+                                                     'fighter-details': 24 * 60 * 60,
+                                                     'default': 24 * 60 * 60})
+
     cls: str = 'b-fight-details__table-text'
     cls_flag: str = 'b-flag__text'
     cls_text: str = 'b-fight-details__text-item'
@@ -28,7 +126,14 @@ class Links:
     cls_charts: str = 'b-fight-details__charts-row'
     cls_person: str = 'b-link b-fight-details__person-link'
     cls_statistics: str = 'b-statistics__table-content'
+    cls_table_row: str = 'b-statistics__table-row'
+    cls_table_col: str = 'b-statistics__table-col'
     cls_fight_details: str = 'b-fight-details__person-title'
     cls_box_list_item: str = 'b-list__box-list-item b-list__box-list-item_type_block'
     cls_fight_details_tb: str = 'b-fight-details__table-row b-fight-details__table-row__hover js-fight-details-click'
 
+    def config(self) -> dict:
+        """
+        :return: values of the parameters, used to create linked objects with the same settings
+        """
+        return {param.name: getattr(self, param.name) for param in fields(Links)}
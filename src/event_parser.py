@@ -1,135 +1,201 @@
-import requests
-import numpy as np
 import pandas as pd
 from tqdm import tqdm
-from dateutil import parser
-from typing import Dict, Any
-from bs4 import BeautifulSoup
-from src.data_class import Links
+from functools import cached_property
+from src.fetcher import Fetching
+from src.manifest import Manifest
+from src.checkpoint import Checkpoint
+from src.pipeline import Pipeline
+from src.crawl_graph import CrawlGraph
+from src.fight_extractor import FightExtractor
+from src.normalize import prepare_events
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 
-class EventsParser(Links):
+class EventsParser(Fetching):
 
-    def cooking_soup(self, url: str) -> Any:
+    @cached_property
+    def extractor(self) -> FightExtractor:
         """
-        Function create an object soup and return it.
+        Single pass extractor of the fight details pages.
         """
-        r = requests.get(url=url, headers=self.headers)
-        soup = BeautifulSoup(r.text, 'lxml')
-        return soup
+        return FightExtractor(**self.config())
 
-    def get_all_event_data(self) -> pd.DataFrame:
+    def get_all_event_data(self, manifest: Optional[Manifest] = None,
+                           graph: Optional[CrawlGraph] = None) -> pd.DataFrame:
         """
         The main body of the parser. Collects data of events fights.
+        :param manifest: registry of ingested pages, if passed only new events and fights are parsed
+        :param graph: crawl graph shared with the fighter parser, built here if not passed
         :return: raw dataframe
         """
-        soup = self.cooking_soup(self.page_events)
+        chunks = list(self.iter_event_data(manifest, graph))
+        if not chunks:
+            print('-----NO NEW FIGHTS EVENTS-----')
+            return pd.DataFrame()
 
-        # Parse all events
-        event_ls, parse_list = [], []
-        events = [(row.find('span').text.strip(), row.find('a')['href'])
-                  for row in soup.find_all('i', class_=self.cls_statistics)]
-
-        # Parse all fights per events
-        for event in tqdm(events, desc='Events parsed'):
-            soup = self.cooking_soup(event[1])
-            event_fights = [row['data-link']
-                            for row in soup.find_all('tr', class_=self.cls_fight_details_tb)]
-            event_ls.append([event[0], event[1], event_fights])
-
-        # Main parser loop
-        for event in tqdm(event_ls, desc='Fights per event parsed'):
-            for fight in event[2]:
-                try:
-                    event_dict = {'date': event[0], 'event_url': event[1], 'event_fight': fight}
-                    event_dict = self.get_event_info(event_dict, fight)
-                    parse_list.append(event_dict)
-                except:
-                    pass
-
-        # Raw dataframe
-        data = pd.DataFrame(parse_list)
-        data = data.replace('--', np.nan, regex=True)
-        data['time'] = [parser.parse(time).time() for time in data['time']]
-        data['date'] = [parser.parse(date) for date in data['date'] if type(date) == str]
+        data = pd.concat(chunks, ignore_index=True)
         print('-----ALL FIGHTS EVENTS PARSED-----')
         return data
 
-    def get_event_info(self, event_dict: Dict[str, str], url: str) -> Dict[str, str]:
+    def iter_fights(self, manifest: Optional[Manifest] = None, graph: Optional[CrawlGraph] = None,
+                    checkpoint: Optional[Checkpoint] = None) -> Iterator[Dict[str, str]]:
+        """
+        Generator of raw fights, one record at a time in the order of the events list. Pages are downloaded
+        and parsed by the pipeline, only a bounded number of them is in flight.
+        :param manifest: registry of ingested pages, if passed only new events and fights are parsed
+        :param graph: crawl graph shared with the fighter parser, built here if not passed
+        :param checkpoint: log of written fights, if passed they are skipped
+        :return: generator of dictionaries of fights
+        """
+        if graph is None:
+            graph = CrawlGraph(**self.config())
+            graph.fetcher = self.fetcher
+            graph.build(manifest)
+
+        # Parse all events
+        events = graph.events
+        if manifest is not None:
+            events = [event for event in events if not manifest.seen('events', event[1])]
+
+        fights = [(event[0], event[1], fight) for event in events for fight in graph.fights.get(event[1], [])
+                  if (manifest is None or not manifest.seen('fights', fight))
+                  and (checkpoint is None or not checkpoint.done('fights', fight))]
+
+        # Main parser loop, fight pages are downloaded and parsed by the pipeline stages
+        records = Pipeline(**self.config()).run(self, 'parse_fight', [(fight, fight[2]) for fight in fights])
+
+        skipped = 0
+        for num, event_dict in tqdm(records, total=len(fights), desc='Fights per event parsed'):
+            if event_dict is None:
+                skipped += 1
+                self.fetcher.discard(fights[num][2])
+                continue
+            yield event_dict
+
+        # Skipped fights are neither checkpointed nor ingested, so the next run retries them
+        if skipped:
+            tqdm.write(f'-----{skipped} FIGHTS ARE NOT DOWNLOADED OR PARSED-----')
+
+    def iter_event_data(self, manifest: Optional[Manifest] = None, graph: Optional[CrawlGraph] = None,
+                        chunk_size: Optional[int] = None,
+                        checkpoint: Optional[Checkpoint] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streaming version of get_all_event_data: prepared chunks of fights are yielded as soon as they are parsed,
+        so they can be written without keeping the whole dataset in memory. Fights of a chunk are checkpointed
+        when the caller asks for the next chunk, that is after the chunk is written.
+        :param manifest: registry of ingested pages, if passed only new events and fights are parsed
+        :param graph: crawl graph shared with the fighter parser, built here if not passed
+        :param chunk_size: max rows in a chunk, chunk_size of the parser by default
+        :param checkpoint: log of written fights, if passed written fights are skipped and new ones are logged
+        :return: generator of prepared dataframes
+        """
+        if graph is None:
+            graph = CrawlGraph(**self.config())
+            graph.fetcher = self.fetcher
+            graph.build(manifest)
+
+        # Fights written before the interruption are in the output as well
+        if manifest is not None and checkpoint is not None:
+            manifest.add('fights', checkpoint.sections.get('fights', ()))
+
+        for chunk in Pipeline.chunks(self.iter_fights(manifest, graph, checkpoint), chunk_size or self.chunk_size):
+            yield self.prepare_data(pd.DataFrame(chunk))
+
+            fights = [event_dict['event_fight'] for event_dict in chunk]
+            if checkpoint is not None:
+                checkpoint.mark('fights', fights)
+            if manifest is not None:
+                manifest.add('fights', fights)
+
+        # Event is ingested only when all its fights are parsed, upcoming events have no fights yet
+        if manifest is not None:
+            manifest.add('events', [event[1] for event in graph.events if graph.fights.get(event[1]) and
+                                    all(manifest.seen('fights', fight) for fight in graph.fights[event[1]])])
+
+    @staticmethod
+    def prepare_data(data: pd.DataFrame) -> pd.DataFrame:
+        """
+        This function converts raw fights to the dataset form.
+        :param data: raw dataframe
+        :return: prepared dataframe
+        """
+        return prepare_events(data)
+
+    def parse_fight(self, fight: Tuple[str, str, str], page: str) -> Optional[Dict[str, str]]:
+        """
+        Parse stage of the pipeline, runs in a worker process.
+        :param fight: date of the event, url of the event and url of the fight
+        :param page: html of the fight page
+        :return: dictionary of the fight or None if the page can't be parsed, the failure is counted in the metrics
+        """
+        try:
+            with self.metrics.measure('parse', fight[2]):
+                event_dict = {'date': fight[0], 'event_url': fight[1], 'event_fight': fight[2]}
+                return self.get_event_info(event_dict, fight[2], page)
+        except (AttributeError, IndexError, KeyError, ValueError) as error:
+            tqdm.write(f'Fight {fight[2]} is not parsed: {error!r}')
+            return None
+
+    def get_event_info(self, event_dict: Dict[str, str], url: str, page: Any = None) -> Dict[str, str]:
         """
         This function collects information in the event header
         :param event_dict:
         :param url: url of fight event
+        :param page: already downloaded html or soup of the fight, if empty the page is downloaded
         :return: updated dictionary
         """
-        soup = self.cooking_soup(url)
+        page = self.fetcher.fetch(url) if page is None else page
+        blocks = self.extractor.extract(page)
+
+        f1_status_fg = blocks['fg_dt'][0]
+        event_dict['f1_status_fg'] = f1_status_fg.replace('\n', '').strip().split(' ')[0]
 
-        f1_status_fg = soup.find_all('div', class_=self.cls_fg_dt)[0]
-        event_dict['f1_status_fg'] = f1_status_fg.text.replace('\n', '').strip().split(' ')[0]
+        f2_status_fg = blocks['fg_dt'][1]
+        event_dict['f2_status_fg'] = f2_status_fg.replace('\n', '').strip().split(' ')[0]
 
-        f2_status_fg = soup.find_all('div', class_=self.cls_fg_dt)[1]
-        event_dict['f2_status_fg'] = f2_status_fg.text.replace('\n', '').strip().split(' ')[0]
+        event_dict['f1_fullname'] = blocks['person'][0].strip()
+        event_dict['f2_fullname'] = blocks['person'][1].strip()
 
-        event_dict['f1_fullname'] = soup.find_all('a', class_=self.cls_person)[0].text.strip()
-        event_dict['f2_fullname'] = soup.find_all('a', class_=self.cls_person)[1].text.strip()
+        # Links of the fighters identify them, names are not unique
+        event_dict['f1_url'], event_dict['f2_url'] = blocks['person_url'][0], blocks['person_url'][1]
 
-        first_fighter_nick = soup.find_all('p', class_=self.cls_fight_details)[0].text.strip()
+        first_fighter_nick = blocks['fight_details'][0].strip()
         event_dict['f1_nickname'] = first_fighter_nick.replace('"', '')
 
-        second_fighter_nick = soup.find_all('p', class_=self.cls_fight_details)[1].text.strip()
+        second_fighter_nick = blocks['fight_details'][1].strip()
         event_dict['f2_nickname'] = second_fighter_nick.replace('"', '')
 
-        event_dict['win_method'] = soup.find_all('i', {'style': 'font-style: normal'})[0].text.strip()
+        event_dict['win_method'] = blocks['method'][0].strip()
 
-        round_ = soup.find_all('i', class_=self.cls_text)[0].text
+        round_ = blocks['text'][0]
         event_dict['round'] = round_.replace('\n', '').replace('Round:', '').strip()
 
-        time_ = soup.find_all('i', class_=self.cls_text)[1].text
+        time_ = blocks['text'][1]
         event_dict['time'] = time_.replace('\n', '').replace('Time:', '').strip()
 
-        time_format_ = soup.find_all('i', class_=self.cls_text)[2].text
+        time_format_ = blocks['text'][2]
         event_dict['time_format'] = time_format_.replace('\n', '').replace('Time format:', '').strip()
 
-        referee_ = soup.find_all('i', class_=self.cls_text)[3].text
+        referee_ = blocks['text'][3]
         event_dict['referee'] = referee_.replace('\n', '').replace('Referee:', '').strip()
 
-        data_block = soup.find_all('tr', class_='b-fight-details__table-row')
+        event_dict = self.get_fight_info_per_rounds(event_dict, 1, blocks['rows'])
+        event_dict = self.get_fight_info_per_rounds(event_dict, 2, blocks['rows'])
 
-        event_dict = self.get_fight_info_per_rounds(event_dict, 1, data_block)
-        event_dict = self.get_fight_info_per_rounds(event_dict, 2, data_block)
-
-        land_trg_head = soup.find_all('div', class_=self.cls_charts)[0].text.strip()
-        event_dict['f1_land_trg_head'] = land_trg_head.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_head'] = land_trg_head.replace('\n', '').replace('   ', '').split(' ')[2]
-
-        land_trg_body = soup.find_all('div', class_=self.cls_charts)[1].text.strip()
-        event_dict['f1_land_trg_body'] = land_trg_body.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_body'] = land_trg_body.replace('\n', '').replace('   ', '').split(' ')[2]
-
-        land_trg_leg = soup.find_all('div', class_=self.cls_charts)[2].text.strip()
-        event_dict['f1_land_trg_leg'] = land_trg_leg.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_leg'] = land_trg_leg.replace('\n', '').replace('   ', '').split(' ')[2]
-
-        land_trg_dist = soup.find_all('div', class_=self.cls_charts)[3].text.strip()
-        event_dict['f1_land_trg_dist'] = land_trg_dist.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_dist'] = land_trg_dist.replace('\n', '').replace('   ', '').split(' ')[2]
-
-        land_trg_clinch = soup.find_all('div', class_=self.cls_charts)[4].text.strip()
-        event_dict['f1_land_trg_clinch'] = land_trg_clinch.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_clinch'] = land_trg_clinch.replace('\n', '').replace('   ', '').split(' ')[2]
-
-        land_trg_ground = soup.find_all('div', class_=self.cls_charts)[5].text.strip()
-        event_dict['f1_land_trg_ground'] = land_trg_ground.replace('\n', '').replace('   ', '').split(' ')[0]
-        event_dict['f2_land_trg_ground'] = land_trg_ground.replace('\n', '').replace('   ', '').split(' ')[2]
+        for num, chart in enumerate(self.charts_cols):
+            land_trg = blocks['charts'][num].strip().replace('\n', '').replace('   ', '').split(' ')
+            event_dict[f'f1_land_trg_{chart}'] = land_trg[0]
+            event_dict[f'f2_land_trg_{chart}'] = land_trg[2]
 
         return event_dict
 
-    def get_fight_info_per_rounds(self, event_dict: Dict[str, str], fg_num: int, data_block: Any) -> Dict[str, str]:
+    def get_fight_info_per_rounds(self, event_dict: Dict[str, str], fg_num: int,
+                                  data_block: List[List[str]]) -> Dict[str, str]:
         """
         This function collects information on the central unit, taking into account the tables for each round
         :param event_dict: work dictionary
         :param fg_num: number of fighter 1 or 2
-        :param data_block: block of bs4 soup
+        :param data_block: cell matrix of the page tables, one list of cells texts per table row
         :return: updated dictionary
         """
         event_rounds = int(event_dict['round'])
@@ -138,73 +204,29 @@ class EventsParser(Links):
         i = 0 if fg_num == 1 else 1
 
         # Total parameters
-        event_dict[f'f{fg_num}_kd'] = self.return_block(data_block, 1, 2, i)
-        event_dict[f'f{fg_num}_sig_str'] = self.return_block(data_block, 1, 4, i)
-        event_dict[f'f{fg_num}_sig_str%'] = self.return_block(data_block, 1, 6, i)
-        event_dict[f'f{fg_num}_total_str'] = self.return_block(data_block, 1, 8, i)
-        event_dict[f'f{fg_num}_td'] = self.return_block(data_block, 1, 10, i)
-        event_dict[f'f{fg_num}_td%'] = self.return_block(data_block, 1, 12, i)
-        event_dict[f'f{fg_num}_sub.att'] = self.return_block(data_block, 1, 14, i)
-        event_dict[f'f{fg_num}_rev'] = self.return_block(data_block, 1, 16, i)
-        event_dict[f'f{fg_num}_ctrl'] = self.return_block(data_block, 1, 18, i)
+        for name, ind in self.totals_cols:
+            event_dict[f'f{fg_num}_{name}'] = data_block[1][ind + i]
 
         for rnd in range(1, event_rounds + 1):
             step = rnd + 2
-            event_dict[f'f{fg_num}_rnd{rnd}_kd'] = self.return_block(data_block, step, 2, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str'] = self.return_block(data_block, step, 4, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str%'] = self.return_block(data_block, step, 6, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_total_str'] = self.return_block(data_block, step, 8, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_td'] = self.return_block(data_block, step, 10, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_td%'] = self.return_block(data_block, step, 12, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sub.att'] = self.return_block(data_block, step, 14, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_rev'] = self.return_block(data_block, step, 16, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_ctrl'] = self.return_block(data_block, step, 18, i)
-
-        for rnd in range(int(event_dict['round']) + 1, self.num_rounds + 1):
-            event_dict[f'f{fg_num}_rnd{rnd}_kd'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str%'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_total_str'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_td'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_td%'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sub.att'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_rev'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_ctrl'] = '---'
-
-        event_dict[f'f{fg_num}_sig_str_head'] = self.return_block(data_block, sig_num, 6, i)
-        event_dict[f'f{fg_num}_sig_str_body'] = self.return_block(data_block, sig_num, 8, i)
-        event_dict[f'f{fg_num}_sig_str_leg'] = self.return_block(data_block, sig_num, 10, i)
-        event_dict[f'f{fg_num}_sig_str_dist'] = self.return_block(data_block, sig_num, 12, i)
-        event_dict[f'f{fg_num}_sig_str_clinch'] = self.return_block(data_block, sig_num, 14, i)
-        event_dict[f'f{fg_num}_sig_str_ground'] = self.return_block(data_block, sig_num, 16, i)
+            for name, ind in self.totals_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = data_block[step][ind + i]
+
+        for rnd in range(event_rounds + 1, self.num_rounds + 1):
+            for name, _ in self.totals_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = '---'
+
+        # Significant strikes parameters
+        for name, ind in self.strikes_cols:
+            event_dict[f'f{fg_num}_{name}'] = data_block[sig_num][ind + i]
 
         for rnd in range(1, event_rounds + 1):
             step = sig_num + rnd + 1
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_head'] = self.return_block(data_block, step, 6, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_body'] = self.return_block(data_block, step, 8, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_leg'] = self.return_block(data_block, step, 10, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_dist'] = self.return_block(data_block, step, 12, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_clinch'] = self.return_block(data_block, step, 14, i)
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_ground'] = self.return_block(data_block, step, 16, i)
-
-        for rnd in range(int(event_dict['round']) + 1, self.num_rounds + 1):
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_head'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_body'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_leg'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_dist'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_clinch'] = '---'
-            event_dict[f'f{fg_num}_rnd{rnd}_sig_str_ground'] = '---'
+            for name, ind in self.strikes_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = data_block[step][ind + i]
 
-        return event_dict
+        for rnd in range(event_rounds + 1, self.num_rounds + 1):
+            for name, _ in self.strikes_cols:
+                event_dict[f'f{fg_num}_rnd{rnd}_{name}'] = '---'
 
-    def return_block(self, data_block: Any, num: int, ind: int, i: int) -> str:
-        """
-        Standard block for information output
-        :param data_block: block of bs4 soup
-        :param num: step parameter
-        :param ind: index of information block
-        :param i: number of fighter
-        :return: result information
-        """
-        string = data_block[num].find_all('p', class_=self.cls)[ind+i].text.strip()
-        return string
+        return event_dict
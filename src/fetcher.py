@@ -0,0 +1,198 @@
+import time
+import queue
+import requests
+from tqdm import tqdm
+from dataclasses import dataclass
+from functools import cached_property
+from src.metrics import Measured, page_type
+from src.cache import HtmlCache, CacheMissError
+from src.rate_control import RateController, EmptyPageError
+from requests.adapters import HTTPAdapter
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+@dataclass
+class Fetcher(Measured):
+    """
+    Shared fetch engine for all parsers. Keeps a pool of keep-alive sessions and downloads
+    batches of pages concurrently with at most max_workers requests in flight, the rate controller
+    adapts the number of requests to the site and failed requests are retried. Pages are served
+    from the html cache when possible, in offline mode only the cache is used.
+    """
+
+    def __post_init__(self) -> None:
+        self.cache = HtmlCache(cache_dir=self.cache_dir, cache_max_size=self.cache_max_size,
+                               cache_ttl=self.cache_ttl) if self.use_cache or self.offline else None
+        self._sessions = queue.LifoQueue()
+        for _ in range(self.max_workers):
+            self._sessions.put(self.make_session())
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetcher')
+        self.rate = RateController(**self.config())
+
+    def __enter__(self) -> 'Fetcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def make_session(self) -> requests.Session:
+        """
+        Function create a session with its own connection pool.
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def fetch(self, url: str) -> str:
+        """
+        Download one page through a pooled session. Latency, size and status of the response are recorded
+        in the metrics, failed requests are counted by the exception type.
+        :param url: page url
+        :return: page html
+        """
+        start = time.perf_counter()
+        try:
+            page, source = self.get(url)
+        except (requests.RequestException, CacheMissError) as error:
+            self.metrics.failure('fetch', url, error)
+            raise
+
+        self.metrics.observe('fetch_seconds', time.perf_counter() - start, page_type=page_type(url), source=source)
+        self.metrics.inc('fetch_bytes', len(page.encode()), page_type=page_type(url), source=source)
+        return page
+
+    def get(self, url: str) -> Tuple[str, str]:
+        """
+        :param url: page url
+        :return: page html and its source, cache or network
+        """
+        if self.cache is not None:
+            page = self.cache.get(url, stale=self.offline)
+            if page is not None:
+                return page, 'cache'
+            if self.offline:
+                raise CacheMissError(url)
+
+        page = self.download(url)
+
+        if self.cache is not None:
+            self.cache.put(url, page)
+
+        return page, 'network'
+
+    def download(self, url: str) -> str:
+        """
+        Download the page. Timeouts, connection errors, throttling, server errors and empty pages are retried
+        max_retries times with jittered exponential delays.
+        :param url: page url
+        :return: page html
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.request(url)
+            except requests.RequestException as error:
+                if attempt == self.max_retries or not self.rate.retryable(error):
+                    raise
+                self.metrics.inc('fetch_retries', page_type=page_type(url), error=type(error).__name__)
+                time.sleep(self.rate.retry_delay(url, attempt, error))
+
+    def request(self, url: str) -> str:
+        """
+        Single request through a pooled session, its outcome adjusts the rate of requests to the site.
+        :param url: page url
+        :return: page html
+        """
+        admitted = self.rate.acquire(url)
+        session, start = self._sessions.get(), time.perf_counter()
+        try:
+            r = session.get(url=url, timeout=(self.connect_timeout, self.timeout))
+        except requests.RequestException as error:
+            # Timeout is a sign of an overloaded site, connection errors are not
+            outcome = 'throttled' if isinstance(error, requests.Timeout) else 'error'
+            self.adjust(url, time.perf_counter() - start, outcome, admitted=admitted)
+            raise
+        finally:
+            self._sessions.put(session)
+        self.metrics.inc('fetch_responses', page_type=page_type(url), status=r.status_code)
+
+        if r.status_code in self.retry_statuses:
+            outcome = 'throttled' if r.status_code in self.throttle_statuses else 'error'
+            self.adjust(url, time.perf_counter() - start, outcome, self.rate.retry_after(r), admitted=admitted)
+            r.raise_for_status()
+        page = r.text
+        if r.ok and not page.strip():
+            self.adjust(url, time.perf_counter() - start, 'throttled', admitted=admitted)
+            raise EmptyPageError(f'Empty page: {url}', response=r)
+
+        self.adjust(url, time.perf_counter() - start, 'ok', admitted=admitted)
+        r.raise_for_status()
+        return page
+
+    def adjust(self, url: str, latency: float, outcome: str, retry_after: Optional[float] = None,
+               admitted: Optional[int] = None) -> None:
+        """
+        Pass the outcome of the request to the rate controller and record its decisions in the metrics.
+        """
+        event = self.rate.release(url, latency, outcome, retry_after, admitted)
+        host = urlsplit(url).netloc
+        if event is not None:
+            self.metrics.inc('rate_events', host=host, event=event)
+        self.metrics.gauge('fetch_concurrency', self.rate.limit(host), host=host)
+
+    def discard(self, url: str) -> None:
+        """
+        Drop the cached page. A page which is downloaded but can't be parsed, for example before its stats are
+        published, is downloaded again by the next attempt instead of being served from the cache forever.
+        :param url: page url
+        """
+        if self.cache is not None and not self.offline:
+            self.cache.delete(url)
+
+    def fetch_many(self, urls: Iterable[str], desc: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Download pages concurrently. The order of the result matches the order of urls,
+        pages that failed to download are returned as None.
+        :param urls: pages urls
+        :param desc: description of the progress bar, no progress bar if empty
+        :return: list of pages html
+        """
+        urls = list(urls)
+        pages = [None] * len(urls)
+        futures = {self._executor.submit(self.fetch, url): num for num, url in enumerate(urls)}
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc, disable=desc is None):
+            try:
+                pages[futures[future]] = future.result()
+            except (requests.RequestException, CacheMissError):
+                pass
+
+        return pages
+
+    def close(self) -> None:
+        """
+        Stop workers and close all opened connections.
+        """
+        self._executor.shutdown(wait=True)
+        while not self._sessions.empty():
+            self._sessions.get_nowait().close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+class Fetching(Measured):
+    """
+    Base of the objects downloading pages.
+    """
+
+    @cached_property
+    def fetcher(self) -> Fetcher:
+        """
+        Fetch engine of the object, created on the first use. Can be replaced by the fetcher shared by the objects
+        of the run.
+        """
+        return Fetcher(**self.config())
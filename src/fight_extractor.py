@@ -0,0 +1,105 @@
+import lxml.html
+from dataclasses import dataclass
+from bs4 import BeautifulSoup
+from src.data_class import Links
+from typing import Any, Dict, List, Tuple
+
+
+@dataclass
+class FightExtractor(Links):
+    """
+    Walks a fight details page once and collects the text of every block the events parser reads.
+    Tables are stored as an indexed cell matrix: one list of cell texts per table row.
+    """
+
+    def selectors(self) -> Dict[str, Tuple[str, str]]:
+        """
+        :return: name of the block and its (tag, class) pair
+        """
+        return {'fg_dt': ('div', self.cls_fg_dt),
+                'person': ('a', self.cls_person),
+                'fight_details': ('p', self.cls_fight_details),
+                'text': ('i', self.cls_text),
+                'charts': ('div', self.cls_charts),
+                'rows': ('tr', 'b-fight-details__table-row')}
+
+    def extract(self, page: Any) -> Dict[str, List[Any]]:
+        """
+        Function collects blocks of the page.
+        :param page: html of the page or an already created soup
+        :return: dictionary of blocks texts, 'rows' is the cell matrix of the tables, 'person_url' are links
+        of the fighters
+        """
+        if isinstance(page, str) and self.extract_backend == 'lxml':
+            return self.extract_lxml(page)
+
+        soup = BeautifulSoup(page, 'lxml') if isinstance(page, str) else page
+        return self.extract_soup(soup)
+
+    def extract_soup(self, soup: Any) -> Dict[str, List[Any]]:
+        """
+        Single pass over the soup.
+        """
+        lookup = self.lookup()
+        blocks = {name: [] for name in self.selectors()}
+        blocks['method'], blocks['person_url'] = [], []
+
+        for element in soup.find_all(['div', 'a', 'p', 'i', 'tr']):
+            name = self.match(lookup, element.name, element.get('class') or [])
+            if name == 'rows':
+                blocks[name].append([cell.text.strip() for cell in element.find_all('p', class_=self.cls)])
+            elif name is not None:
+                blocks[name].append(element.text)
+
+            if name == 'person':
+                blocks['person_url'].append(element.get('href'))
+
+            if element.name == 'i' and element.get('style') == 'font-style: normal':
+                blocks['method'].append(element.text)
+
+        return blocks
+
+    def extract_lxml(self, page: str) -> Dict[str, List[Any]]:
+        """
+        Single pass over the lxml tree, faster than the soup but keeps whitespace the soup drops.
+        """
+        lookup = self.lookup()
+        blocks = {name: [] for name in self.selectors()}
+        blocks['method'], blocks['person_url'] = [], []
+
+        for element in lxml.html.fromstring(page).iter('div', 'a', 'p', 'i', 'tr'):
+            name = self.match(lookup, element.tag, (element.get('class') or '').split())
+            if name == 'rows':
+                blocks[name].append([cell.text_content().strip() for cell in element.iter('p')
+                                     if self.cls in (cell.get('class') or '').split()])
+            elif name is not None:
+                blocks[name].append(element.text_content())
+
+            if name == 'person':
+                blocks['person_url'].append(element.get('href'))
+
+            if element.tag == 'i' and element.get('style') == 'font-style: normal':
+                blocks['method'].append(element.text_content())
+
+        return blocks
+
+    def lookup(self) -> Dict[Tuple[str, str], str]:
+        """
+        :return: name of the block by (tag, class) pair
+        """
+        return {selector: name for name, selector in self.selectors().items()}
+
+    @staticmethod
+    def match(lookup: Dict[Tuple[str, str], str], tag: str, classes: List[str]) -> Any:
+        """
+        Class matching of bs4: any single class or the whole class attribute equals the selector.
+        :return: name of the block or None
+        """
+        name = lookup.get((tag, ' '.join(classes)))
+        if name is None:
+            for cls in classes:
+                name = lookup.get((tag, cls))
+                if name is not None:
+                    break
+
+        return name
@@ -1,139 +1,241 @@
-import requests
-import datetime
+import string
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from bs4 import BeautifulSoup
 from collections import Counter
-from src.data_class import Links
-from typing import Any, List, Dict
+from src.fetcher import Fetching
+from src.manifest import Manifest
+from src.checkpoint import Checkpoint
+from src.pipeline import Pipeline
+from src.crawl_graph import CrawlGraph
+from src.normalize import prepare_fighters
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 
 
-class FighterParser(Links):
+class FighterParser(Fetching):
+    # Columns of fighters collected from the index without profiles
+    listing_columns = ['Link', 'Fullname', 'Win', 'Loss', 'Draw', 'Height', 'Weight', 'Reach', 'STANCE']
 
-    def cooking_soup(self, url: str) -> Any:
+    def get_fighters_links(self, manifest: Optional[Manifest] = None,
+                           graph: Optional[CrawlGraph] = None) -> List[Tuple[str, str]]:
         """
-        Function create an object soup and return it.
+        This function creates a list of fighter's names and links to their statistics, one per link
+        :param manifest: registry of ingested pages, if passed only fighters of new events are collected
+        :param graph: crawl graph shared with the events parser, built here if not passed
+        :return: list of names and links
         """
-        r = requests.get(url=url, headers=self.headers)
-        soup = BeautifulSoup(r.text, 'lxml')
-        return soup
+        if self.fighters_discovery == 'index':
+            return [(row['Fullname'], row['Link']) for row in self.get_fighters_index(manifest)]
 
-    def get_events_links(self) -> List[str]:
-        """
-        This method gets a list of fighters and parses the list. In its body it uses the get_fighter_params method
-        to collect more detailed data on the fighter. Result DataFrame automatically saved in directory data.
-        """
-        soup = self.cooking_soup(self.page_events)
-        events_list = [row.find('a')['href'] for row in soup.find_all('i', class_=self.cls_statistics)]
+        if graph is None:
+            graph = CrawlGraph(**self.config())
+            graph.fetcher = self.fetcher
+            graph.build(manifest)
 
-        return events_list
+        events_links = [event[1] for event in graph.events]
+        if manifest is not None:
+            events_links = [link for link in events_links if not manifest.seen('fighters_events', link)]
 
-    def get_fighters_links(self) -> Dict[str, str]:
+        return [(name, link) for link, name in graph.fighters_of(events_links).items()]
+
+    def get_fighters_index(self, manifest: Optional[Manifest] = None) -> List[Dict[str, Any]]:
         """
-        This function creates a dictionary with the value of the fighter's name and a link to his statistics
-        :return: dictionary
+        This function reads the alphabetical fighters listing, one page per letter. W/L/D of the listing
+        is the whole professional record of the fighter.
+        :param manifest: registry of ingested pages, if passed only fighters whose listing row changed are returned
+        :return: listing rows of fighters, one per link
         """
-        fighters_dict = {self.data_check(block)[0]: self.data_check(block)[1] for event_link in self.get_events_links()
-                         for block in self.cooking_soup(event_link).find_all('a', class_=self.cls_style)}
-
-        return fighters_dict
-
-    def get_fighters_params(self) -> pd.DataFrame:
+        fighters_rows = []
+        urls = [self.page_fighters.format(char) for char in string.ascii_lowercase]
+
+        for url, page in zip(urls, self.fetcher.fetch_many(urls, desc='Fighters index scanned')):
+            if page is None:
+                continue
+
+            with self.metrics.measure('parse', url):
+                rows = BeautifulSoup(page, 'lxml').find_all('tr', class_=self.cls_table_row)
+
+            for row in rows:
+                cols = row.find_all('td', class_=self.cls_table_col)
+                if len(cols) < 10 or cols[0].find('a') is None:
+                    continue
+
+                link = cols[0].find('a')['href']
+                values = [col.text.strip().replace(' ', '').replace('\n', '') for col in cols]
+                fighters_rows.append({'Fullname': ' '.join(filter(None, [cols[0].text.strip(), cols[1].text.strip()])),
+                                      'Link': link, 'Win': int(values[7]), 'Loss': int(values[8]),
+                                      'Draw': int(values[9]), 'Height': values[3], 'Weight': values[4],
+                                      'Reach': values[5], 'STANCE': values[6],
+                                      'Signature': '|'.join([link] + values[3:10])})
+
+        # Unchanged listing row means no new fights and no need to download the profile again. Signatures are
+        # ingested by iter_fighters when the fighter is parsed
+        if manifest is not None:
+            fighters_rows = [row for row in fighters_rows if not manifest.seen('fighter_rows', row['Signature'])]
+
+        return list({row['Link']: row for row in fighters_rows}.values())
+
+    def get_fighters_params(self, manifest: Optional[Manifest] = None,
+                            graph: Optional[CrawlGraph] = None) -> pd.DataFrame:
         """
         The main body of the parser. Collects data on the fighter's stats.
+        :param manifest: registry of ingested pages, if passed only fighters of new events are parsed
+        :param graph: crawl graph shared with the events parser, built here if not passed
         :return: raw dataframe
         """
-        values_list, params_name = [], []
-        links = self.get_fighters_links()
+        columns = self.listing_columns if self.fighters_discovery == 'index' and not self.fetch_profiles else None
+        data = pd.DataFrame(list(self.iter_fighters(manifest, graph)), columns=columns)
+        print('-----ALL FIGHTERS PARSED-----')
+        return data
+
+    def iter_fighters(self, manifest: Optional[Manifest] = None, graph: Optional[CrawlGraph] = None,
+                      checkpoint: Optional[Checkpoint] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generator of raw fighters, one record at a time in the order of discovery. Every record has the Link
+        of the fighter.
+        :param manifest: registry of ingested pages, if passed only fighters of new events are parsed
+        :param graph: crawl graph shared with the events parser, built here if not passed
+        :param checkpoint: log of written fighters, if passed they are skipped
+        :return: generator of dictionaries of fighter parameters
+        """
+        # Fighters written before the interruption of the run count as parsed
+        parsed = set(checkpoint.sections.get('fighters', ())) if checkpoint is not None else set()
+
+        if self.fighters_discovery == 'index':
+            rows = self.get_fighters_index(manifest)
+            links = [(row['Fullname'], row['Link']) for row in rows]
+        else:
+            if graph is None:
+                graph = CrawlGraph(**self.config())
+                graph.fetcher = self.fetcher
+                graph.build(manifest)
+            links = self.get_fighters_links(manifest, graph)
+        links = [fighter_url for fighter_url in links if fighter_url[1] not in parsed]
+
+        if self.fighters_discovery == 'index' and not self.fetch_profiles:
+            records = ({column: row[column] for column in self.listing_columns}
+                       for row in rows if row['Link'] not in parsed)
+        else:
+            records = self.iter_profiles(links)
+
+        for record in records:
+            yield record
+            parsed.add(record['Link'])
+
+        # Listing row is ingested only when its fighter is parsed, a failed profile is fetched next run
+        if manifest is not None and self.fighters_discovery == 'index':
+            manifest.add('fighter_rows', [row['Signature'] for row in rows if row['Link'] in parsed])
+
+        # Event is ingested only when profiles of all its fighters are parsed, failed ones are fetched next run
+        if manifest is not None and self.fighters_discovery == 'events':
+            manifest.add('fighters_events', [event[1] for event in graph.events if graph.fighters.get(event[1]) and
+                                             all(link in parsed for link in graph.fighters[event[1]])])
+
+    def iter_profiles(self, links: List[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Generator of raw fighters parsed from their profiles, in the order of the links.
+        :param links: names of fighters and links to their statistics
+        :return: generator of dictionaries of fighter parameters
+        """
+        # Fighter pages are downloaded and parsed by the pipeline stages
+        records = Pipeline(**self.config()).run(self, 'parse_fighter', [(link, link[1]) for link in links])
 
-        for fighter_url in tqdm(links.items(), desc='Fighters parsed'):
-            if type(fighter_url[1]) == str:
-                soup = self.cooking_soup(fighter_url[1])
+        skipped = 0
+        for num, parsed in tqdm(records, total=len(links), desc='Fighters parsed'):
+            if parsed is None:
+                skipped += 1
+                continue
+            yield {'Link': links[num][1], **dict(zip(*parsed))}
 
-                fighter_params = soup.find_all('li', class_=self.cls_box_list_item)
-                fighter_status = soup.find_all('i', class_=self.cls_flag)
+        if skipped:
+            tqdm.write(f'-----{skipped} FIGHTERS ARE NOT DOWNLOADED-----')
 
-                # Don't consider upcoming fights
-                dict_status = Counter([fight.text for fight in fighter_status])
-                del dict_status['next']
+    def parse_fighter(self, fighter_url: Tuple[str, str], page: str) -> List[List[Any]]:
+        """
+        Parse stage of the pipeline, runs in a worker process.
+        :param fighter_url: name of the fighter and link to his statistics
+        :param page: html of the fighter page
+        :return: names of the parameters and their values
+        """
+        with self.metrics.measure('parse', fighter_url[1]):
+            soup = BeautifulSoup(page, 'lxml')
 
-                if not params_name:
-                    params_name = [param.text.strip().replace(' ', '').replace('\n', '').split(':')[0]
-                                   for param in fighter_params
-                                   if len(param.text.strip().replace(' ', '').replace('\n', '').split(':')) > 1]
+            fighter_params = soup.find_all('li', class_=self.cls_box_list_item)
+            fighter_status = soup.find_all('i', class_=self.cls_flag)
 
-                    params_name = ['Fullname', 'Win', 'Loss', 'Draw'] + params_name
+            # Don't consider upcoming fights
+            dict_status = Counter([fight.text for fight in fighter_status])
+            del dict_status['next']
 
-                # Get main fighter parameters
-                values = [param.text.strip().replace(' ', '').replace('\n', '').split(':')[1]
-                          for param in fighter_params
-                          if len(param.text.strip().replace(' ', '').replace('\n', '').split(':')) > 1]
+            params_name = [param.text.strip().replace(' ', '').replace('\n', '').split(':')[0]
+                           for param in fighter_params
+                           if len(param.text.strip().replace(' ', '').replace('\n', '').split(':')) > 1]
 
-                # Assemble the resulting parameter sheet
-                values = [fighter_url[0], dict_status['win'], dict_status['loss'], dict_status['draw']] + values
-                values_list.append(values)
+            params_name = ['Fullname', 'Win', 'Loss', 'Draw'] + params_name
 
-        # Raw dataframe
-        data = pd.DataFrame(values_list, columns=params_name)
-        print('-----ALL FIGHTERS PARSED-----')
-        return data
+            # Get main fighter parameters
+            values = [param.text.strip().replace(' ', '').replace('\n', '').split(':')[1]
+                      for param in fighter_params
+                      if len(param.text.strip().replace(' ', '').replace('\n', '').split(':')) > 1]
 
-    def get_fighter_data(self) -> pd.DataFrame:
+            # Assemble the resulting parameter sheet
+            values = [fighter_url[0], dict_status['win'], dict_status['loss'], dict_status['draw']] + values
+            return [params_name, values]
+
+    def get_fighter_data(self, manifest: Optional[Manifest] = None,
+                         graph: Optional[CrawlGraph] = None) -> pd.DataFrame:
         """
         This function converts the raw dataset to a convenient form for analysis
+        :param manifest: registry of ingested pages, if passed only fighters of new events are parsed
+        :param graph: crawl graph shared with the events parser, built here if not passed
         :return: prepared fighter dataset
         """
-        fighters = self.get_fighters_params()
-
-        fighters = fighters.replace('--', np.nan, regex=True)
-
-        fighters['Height'] = [round(int(str(height).replace("'", " ").replace('"', '').split(' ')[0]) * 30.48 +
-                                    int(str(height).replace("'", " ").replace('"', '').split(' ')[1]) * 2.54, 1)
-                              if type(height) != float else np.nan for height in fighters['Height']]
-
-        fighters['Weight'] = [round(int(str(weight).replace('lbs.', '').strip()) * 0.453592, 1)
-                              if type(weight) == str else np.nan for weight in fighters['Weight']]
+        fighters = self.get_fighters_params(manifest, graph)
+        if fighters.empty:
+            return fighters
 
-        fighters['Reach'] = [round(int(str(reach).replace('"', '').strip()) * 2.54, 1)
-                             if type(reach) == str else np.nan for reach in fighters['Reach']]
+        return self.prepare_data(fighters)
 
-        fighters['Age'] = [datetime.date.today().year - int(dob.split(',')[1])
-                           if type(dob) == str else np.nan for dob in fighters['DOB']]
-
-        fighters['Str.Acc.'] = [int(str(val).replace('%', '').strip())
-                                if type(val) == str else np.nan for val in fighters['Str.Acc.']]
+    def iter_fighter_data(self, manifest: Optional[Manifest] = None, graph: Optional[CrawlGraph] = None,
+                          chunk_size: Optional[int] = None,
+                          checkpoint: Optional[Checkpoint] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streaming version of get_fighter_data, prepared chunks of fighters are yielded as soon as they are parsed.
+        Fighters of a chunk are checkpointed when the caller asks for the next chunk, after the chunk is written.
+        :param manifest: registry of ingested pages, if passed only fighters of new events are parsed
+        :param graph: crawl graph shared with the events parser, built here if not passed
+        :param chunk_size: max rows in a chunk, chunk_size of the parser by default
+        :param checkpoint: log of written fighters, if passed written fighters are skipped and new ones are logged
+        :return: generator of prepared dataframes
+        """
+        records = self.iter_fighters(manifest, graph, checkpoint)
+        for chunk in Pipeline.chunks(records, chunk_size or self.chunk_size):
+            yield self.prepare_data(pd.DataFrame(chunk))
 
-        fighters['Str.Def'] = [int(str(val).replace('%', '').strip())
-                               if type(val) == str else np.nan for val in fighters['Str.Def']]
+            if checkpoint is not None:
+                checkpoint.mark('fighters', [record['Link'] for record in chunk])
 
-        fighters['TDAcc.'] = [int(str(val).replace('%', '').strip())
-                              if type(val) == str else np.nan for val in fighters['TDAcc.']]
+    @staticmethod
+    def prepare_data(fighters: pd.DataFrame) -> pd.DataFrame:
+        """
+        This function converts raw fighters to the dataset form.
+        :param fighters: raw dataframe
+        :return: prepared dataframe
+        """
+        # Fighters collected from the index without profiles have only the listing parameters
+        for param in ['DOB', 'SLpM', 'Str.Acc.', 'SApM', 'Str.Def', 'TDAvg.', 'TDAcc.', 'TDDef.', 'Sub.Avg.', 'Link']:
+            if param not in fighters:
+                fighters[param] = np.nan
 
-        fighters['TDDef.'] = [int(str(val).replace('%', '').strip())
-                              if type(val) == str else np.nan for val in fighters['TDDef.']]
+        fighters = prepare_fighters(fighters)
 
         fighters = fighters.drop(columns=['DOB'], axis=1)
 
         fighters = fighters[['Fullname', 'Win', 'Loss', 'Draw', 'Age', 'Height', 'Weight', 'Reach', 'STANCE', 'SLpM',
-                             'Str.Acc.', 'SApM', 'Str.Def', 'TDAvg.', 'TDAcc.', 'TDDef.', 'Sub.Avg.']]
+                             'Str.Acc.', 'SApM', 'Str.Def', 'TDAvg.', 'TDAcc.', 'TDDef.', 'Sub.Avg.', 'Link']]
 
         fighters.columns = ['Fullname', 'Win', 'Loss', 'Draw', 'Age', 'Height', 'Weight', 'Reach', 'Stance', 'SLpM',
-                            'Str.Acc.%', 'SApM', 'Str.Def%', 'TDAvg.', 'TDAcc.%', 'TDDef.%', 'Sub.Avg.']
+                            'Str.Acc.%', 'SApM', 'Str.Def%', 'TDAvg.', 'TDAcc.%', 'TDDef.%', 'Sub.Avg.', 'Link']
 
         return fighters
-
-    @staticmethod
-    def data_check(block: Any) -> List[str]:
-        """
-        :param block:
-        :return: list consist with fighter name and actual link
-        """
-        fighter_name, fighter_link = None, None
-        try:
-            fighter_name, fighter_link = block.text.strip(), block['href']
-        except KeyError:
-            pass
-
-        return [fighter_name, fighter_link]
-
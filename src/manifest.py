@@ -0,0 +1,48 @@
+import os
+import json
+from dataclasses import dataclass
+from src.data_class import Links
+from typing import Iterable
+
+
+@dataclass
+class Manifest(Links):
+    """
+    Registry of already ingested urls grouped by sections (events, fights, fighters_events, fighter_rows).
+    Used by the parsers to scrape only new pages and saved next to the datasets.
+    """
+
+    def __post_init__(self) -> None:
+        self.sections = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.sections = {section: set(urls) for section, urls in json.load(file).items()}
+
+    def seen(self, section: str, url: str) -> bool:
+        """
+        :param section: name of the section
+        :param url: page url
+        :return: True if the url is already ingested
+        """
+        return url in self.sections.get(section, ())
+
+    def add(self, section: str, urls: Iterable[str]) -> None:
+        """
+        Mark urls as ingested.
+        :param section: name of the section
+        :param urls: pages urls
+        """
+        self.sections.setdefault(section, set()).update(urls)
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to manifest_path. Should be called only after the datasets are saved.
+        """
+        folder = os.path.dirname(self.manifest_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({section: sorted(urls) for section, urls in self.sections.items()}, file, indent=1)
+        os.replace(tmp_path, self.manifest_path)
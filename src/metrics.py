@@ -0,0 +1,307 @@
+import os
+import json
+import bisect
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cached_property
+from src.data_class import Links
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets in seconds
+BUCKETS = {'fetch_seconds': (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+           'parse_seconds': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+           'write_seconds': (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)}
+
+# Type and help line of every metric of the prometheus textfile
+DESCRIPTIONS = {'fetch_seconds': ('histogram', 'Latency of page requests by page type and source'),
+                'fetch_bytes': ('counter', 'Bytes of downloaded or cached pages by page type and source'),
+                'fetch_responses': ('counter', 'Responses of the site by page type and status code'),
+                'parse_seconds': ('histogram', 'Time of parsing a page by page type'),
+                'fetch_retries': ('counter', 'Retried requests by page type and exception type'),
+                'rate_events': ('counter', 'Decisions of the rate controller by host: decrease, circuit_open'),
+                'fetch_concurrency': ('gauge', 'Limit of requests in flight set by the rate controller by host'),
+                'failures': ('counter', 'Failed pages by stage, page type and exception type'),
+                'rows_written': ('counter', 'Rows written by dataset and format'),
+                'write_seconds': ('histogram', 'Time of writing a chunk by dataset and format'),
+                'run_started_timestamp_seconds': ('gauge', 'Start time of the run'),
+                'run_duration_seconds': ('gauge', 'Duration of the run'),
+                'run_success': ('gauge', '1 if the run is finished without errors'),
+                'last_success_timestamp_seconds': ('gauge', 'End time of the run if it is finished without errors')}
+
+# Url classes of the site, the first matched class is used
+PAGE_TYPES = (('statistics/events', 'events_list'), ('statistics/fighters', 'fighters_index'),
+              ('event-details', 'event'), ('fight-details', 'fight'), ('fighter-details', 'fighter'))
+
+
+def page_type(url: str) -> str:
+    """
+    :param url: page url
+    :return: class of the page, used as a label of the metrics
+    """
+    for url_class, name in PAGE_TYPES:
+        if url_class in url:
+            return name
+
+    return 'other'
+
+
+@dataclass
+class Metrics(Links):
+    """
+    Metrics of a run: fetch latency, bytes and status codes, parse time per page type, failures by exception
+    type and url, rows written. Thread safe; metrics of worker processes are collected with pop and added to
+    the metrics of the main process with merge. Exported as a json run report and a prometheus textfile.
+    """
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget all collected values.
+        """
+        self.counters, self.histograms, self.gauges, self.failed = {}, {}, {}, []
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """
+        Increase the counter.
+        :param name: name of the metric
+        :param value: increment
+        :param labels: labels of the series
+        """
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Set the gauge.
+        :param name: name of the metric
+        :param value: current value
+        :param labels: labels of the series
+        """
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Add the value to the histogram.
+        :param name: name of the metric, one of BUCKETS
+        :param value: observed value
+        :param labels: labels of the series
+        """
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        bucket = bisect.bisect_left(BUCKETS[name], value)
+        with self._lock:
+            counts, total = self.histograms.get(key, ([0] * (len(BUCKETS[name]) + 1), 0.0))
+            counts[bucket] += 1
+            self.histograms[key] = (counts, total + value)
+
+    def failure(self, stage: str, url: str, error: BaseException) -> None:
+        """
+        Count the failed page and keep its url for the run report.
+        :param stage: fetch, parse or write
+        :param url: page url
+        :param error: raised exception
+        """
+        self.inc('failures', stage=stage, page_type=page_type(url), error=type(error).__name__)
+        with self._lock:
+            if len(self.failed) < self.metrics_max_failures:
+                self.failed.append({'stage': stage, 'url': url, 'error': type(error).__name__,
+                                    'message': str(error)[:200]})
+
+    @contextmanager
+    def measure(self, stage: str, url: str) -> Iterator[None]:
+        """
+        Observe time of the block in the {stage}_seconds histogram, an exception raised by the block
+        is counted as a failure of the page and raised further.
+        :param stage: parse or fetch
+        :param url: page url
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as error:
+            self.failure(stage, url, error)
+            raise
+        finally:
+            self.observe(f'{stage}_seconds', time.perf_counter() - start, page_type=page_type(url))
+
+    def pop(self) -> Dict[str, Any]:
+        """
+        :return: collected values, the metrics are reset
+        """
+        with self._lock:
+            values = {'counters': self.counters, 'histograms': self.histograms, 'gauges': self.gauges,
+                      'failed': self.failed}
+            self.counters, self.histograms, self.gauges, self.failed = {}, {}, {}, []
+
+        return values
+
+    def merge(self, values: Dict[str, Any]) -> None:
+        """
+        Add values popped from metrics of another process.
+        :param values: result of pop
+        """
+        with self._lock:
+            for key, value in values['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, (counts, total) in values['histograms'].items():
+                old_counts, old_total = self.histograms.get(key, ([0] * len(counts), 0.0))
+                self.histograms[key] = ([old + new for old, new in zip(old_counts, counts)], old_total + total)
+            self.gauges.update(values['gauges'])
+            self.failed.extend(values['failed'][:max(self.metrics_max_failures - len(self.failed), 0)])
+
+    def report(self, success: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        :param success: result of the run, None while it is running
+        :return: json run report
+        """
+        finished = time.time()
+        report = {'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                  'finished': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(finished)),
+                  'duration_seconds': round(finished - self.started, 3), 'success': success}
+        if self.metrics_labels:
+            report['labels'] = dict(self.metrics_labels)
+
+        with self._lock:
+            counters, histograms = dict(self.counters), {key: (list(counts), total)
+                                                         for key, (counts, total) in self.histograms.items()}
+            gauges, failed = dict(self.gauges), list(self.failed)
+
+        sections = {'fetch_seconds': 'fetch', 'parse_seconds': 'parse', 'write_seconds': 'write'}
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            series = report.setdefault(sections[name], {}).setdefault('/'.join(value for _, value in labels), {})
+            series.update(self.summary(name, counts, total))
+
+        for (name, labels), value in sorted(counters.items()):
+            labels = dict(labels)
+            if name == 'fetch_bytes':
+                series = '/'.join([labels['page_type'], labels['source']])
+                report.setdefault('fetch', {}).setdefault(series, {})['bytes'] = value
+            elif name == 'fetch_responses':
+                report.setdefault('status_codes', {}).setdefault(labels['page_type'], {})[labels['status']] = value
+            elif name == 'rows_written':
+                report.setdefault('rows_written', {})['/'.join([labels['dataset'], labels['format']])] = value
+            elif name == 'fetch_retries':
+                report.setdefault('retries', {}).setdefault(labels['page_type'], {})[labels['error']] = value
+            elif name == 'rate_events':
+                report.setdefault('rate_control', {}).setdefault(labels['host'], {})[labels['event']] = value
+            elif name == 'failures':
+                report.setdefault('failures', {}).setdefault(labels['stage'], {}).setdefault(
+                    labels['page_type'], {})[labels['error']] = value
+
+        for (name, labels), value in sorted(gauges.items()):
+            if name == 'fetch_concurrency':
+                report.setdefault('rate_control', {}).setdefault(dict(labels)['host'], {})['concurrency'] = value
+
+        report['failures_total'] = sum(value for (name, _), value in counters.items() if name == 'failures')
+        report['failed_urls'] = failed
+        return report
+
+    @staticmethod
+    def summary(name: str, counts: List[int], total: float) -> Dict[str, Any]:
+        """
+        :param name: name of the histogram
+        :param counts: number of values in every bucket
+        :param total: sum of the values
+        :return: count, mean and approximate quantiles of the values, quantile is the upper bound of its bucket
+        """
+        count, summary = sum(counts), {}
+        summary.update(count=count, seconds=round(total, 6), mean=round(total / count, 6) if count else None)
+
+        for quantile in (0.5, 0.95, 0.99):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS[name] + (float('inf'),), counts):
+                cumulative += bucket_count
+                if count and cumulative >= quantile * count:
+                    summary[f'p{int(quantile * 100)}'] = bound if bound != float('inf') else None
+                    break
+
+        return summary
+
+    def prometheus(self, success: Optional[bool] = None) -> str:
+        """
+        :param success: result of the run, None while it is running
+        :return: metrics in the prometheus text exposition format
+        """
+        def series(metric: str, labels: Tuple[Tuple[str, str], ...], value: float) -> str:
+            labels = ','.join(f'{label}="{label_value}"'
+                              for label, label_value in tuple(self.metrics_labels.items()) + labels)
+            value = value if isinstance(value, int) else round(value, 6)
+            return f'{self.metrics_prefix}_{metric}{{{labels}}} {value}' if labels \
+                else f'{self.metrics_prefix}_{metric} {value}'
+
+        with self._lock:
+            counters, histograms = dict(self.counters), {key: (list(counts), total)
+                                                         for key, (counts, total) in self.histograms.items()}
+            gauges = dict(self.gauges)
+
+        now = time.time()
+        gauges[('run_started_timestamp_seconds', ())] = self.started
+        gauges[('run_duration_seconds', ())] = now - self.started
+        if success is not None:
+            gauges[('run_success', ())] = int(success)
+        if success:
+            gauges[('last_success_timestamp_seconds', ())] = now
+
+        lines = []
+        for name, (kind, description) in DESCRIPTIONS.items():
+            metric = f'{name}_total' if kind == 'counter' else name
+            lines += [f'# HELP {self.metrics_prefix}_{metric} {description}',
+                      f'# TYPE {self.metrics_prefix}_{metric} {kind}']
+
+            if kind == 'histogram':
+                for (key_name, labels), (counts, total) in sorted(histograms.items()):
+                    if key_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(BUCKETS[name] + (float('inf'),), counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                        lines.append(series(f'{name}_bucket', labels + (('le', le),), cumulative))
+                    lines += [series(f'{name}_sum', labels, total), series(f'{name}_count', labels, cumulative)]
+            else:
+                values = counters if kind == 'counter' else gauges
+                lines += [series(metric, labels, value) for (key_name, labels), value in sorted(values.items())
+                          if key_name == name]
+
+        return '\n'.join(lines) + '\n'
+
+    def save(self, success: Optional[bool] = None) -> None:
+        """
+        Atomically write the json run report to report_path and the prometheus textfile to metrics_textfile,
+        an empty path disables the output.
+        :param success: result of the run, None while it is running
+        """
+        for path, content in [(self.report_path, lambda: json.dumps(self.report(success), indent=1)),
+                              (self.metrics_textfile, lambda: self.prometheus(success))]:
+            if not path:
+                continue
+
+            folder = os.path.dirname(path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+
+            with open(path + '.tmp', 'w', encoding='utf-8') as file:
+                file.write(content())
+            os.replace(path + '.tmp', path)
+
+
+class Measured(Links):
+    """
+    Base of the objects recording metrics of the run.
+    """
+
+    @cached_property
+    def metrics(self) -> Metrics:
+        """
+        Metrics of the object, created on the first use. Can be replaced by the metrics shared by the objects
+        of the run.
+        """
+        return Metrics(**self.config())
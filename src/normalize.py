@@ -0,0 +1,145 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Callable
+
+# Placeholders of missing values on the site and of padded rounds in EventsParser.get_fight_info_per_rounds
+MISSING = ['--', '---']
+
+
+def replace_missing(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param data: raw dataframe
+    :return: dataframe with placeholders of missing values replaced by NaN, only exact values are replaced
+    """
+    return data.mask(data.isin(MISSING))
+
+
+def by_unique(values: pd.Series, convert: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """
+    Parsed columns take few distinct values, so only the distinct values are converted and mapped back by their codes.
+    :param values: column of strings and NaN
+    :param convert: conversion of a column of the string dtype
+    :return: converted column, missing values stay NaN
+    """
+    codes, uniques = pd.factorize(values)
+    converted = convert(pd.Series(uniques, dtype='string')).to_numpy()
+
+    # Code -1 of missing values takes the trailing NaN
+    if (codes < 0).any():
+        converted = np.append(converted.astype(float), np.nan)
+    return pd.Series(converted[codes], index=values.index)
+
+
+def to_number(values: pd.Series) -> pd.Series:
+    """
+    :param values: strings of numbers with surrounding spaces
+    :return: numbers
+    """
+    return pd.Series(pd.to_numeric(values.str.strip().to_numpy(dtype=object, na_value=np.nan)))
+
+
+def round_1(values: pd.Series) -> pd.Series:
+    """
+    :param values: float numbers
+    :return: numbers rounded to one decimal like builtin round, numpy rounding differs on some halves
+    """
+    return pd.Series([round(value, 1) for value in values], dtype=float)
+
+
+def event_time(values: pd.Series) -> pd.Series:
+    """
+    :param values: time of the end of the fight, '4:20'
+    :return: datetime.time objects, the numbers are read as hours and minutes like dateutil does
+    """
+    return pd.to_datetime(values, format='%H:%M', errors='coerce').dt.time
+
+
+def time_seconds(values: pd.Series) -> pd.Series:
+    """
+    :param values: time of the end of the fight of event_time, its hours and minutes are minutes and seconds
+    :return: seconds of the last round, NaN if the time is missing
+    """
+    return pd.Series([value.hour * 60 + value.minute if pd.notna(value) else np.nan for value in values],
+                     index=values.index, dtype='float64')
+
+
+def event_date(values: pd.Series) -> pd.Series:
+    """
+    :param values: date of the event, 'November 12, 1993'
+    :return: datetime64 column
+    """
+    return pd.to_datetime(values, format='%B %d, %Y')
+
+
+def height_cm(values: pd.Series) -> pd.Series:
+    """
+    :param values: height in feet and inches, 5'11"
+    :return: height in centimeters
+    """
+    def convert(heights: pd.Series) -> pd.Series:
+        parts = heights.str.extract(r'''^(\d+)'\s*(\d+)"?$''')
+        return round_1(to_number(parts[0]).astype(float) * 30.48 + to_number(parts[1]).astype(float) * 2.54)
+
+    return by_unique(values, convert)
+
+
+def weight_kg(values: pd.Series) -> pd.Series:
+    """
+    :param values: weight in pounds, '155lbs.'
+    :return: weight in kilograms
+    """
+    return by_unique(values, lambda weight: round_1(to_number(weight.str.replace('lbs.', '', regex=False)) * 0.453592))
+
+
+def reach_cm(values: pd.Series) -> pd.Series:
+    """
+    :param values: reach in inches, '72"' on the profiles and '72.0"' on the fighters listing
+    :return: reach in centimeters, float since the listing has decimal inches
+    """
+    return by_unique(values, lambda reach: round_1(to_number(reach.str.replace('"', '', regex=False)) * 2.54))
+
+
+def age(values: pd.Series) -> pd.Series:
+    """
+    :param values: date of birth, 'Jul19,1987'
+    :return: age in the current year
+    """
+    return by_unique(values, lambda dob: datetime.date.today().year - to_number(dob.str.split(',').str[1]))
+
+
+def percent(values: pd.Series) -> pd.Series:
+    """
+    :param values: percentage, '45%'
+    :return: number of percents
+    """
+    return by_unique(values, lambda percents: to_number(percents.str.replace('%', '', regex=False)))
+
+
+def prepare_events(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param data: raw fights of EventsParser
+    :return: fights with missing values, time and date converted
+    """
+    data = replace_missing(data)
+    data['time'] = event_time(data['time'])
+    data['date'] = event_date(data['date'])
+    return data
+
+
+def prepare_fighters(fighters: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param fighters: raw parameters of FighterParser, every column is present
+    :return: fighters with body measures in metric units, age and percentages as numbers
+    """
+    fighters = replace_missing(fighters)
+
+    fighters['Height'] = height_cm(fighters['Height'])
+    fighters['Weight'] = weight_kg(fighters['Weight'])
+    fighters['Reach'] = reach_cm(fighters['Reach'])
+    fighters['Age'] = age(fighters['DOB'])
+
+    for param in ['Str.Acc.', 'Str.Def', 'TDAcc.', 'TDDef.']:
+        fighters[param] = percent(fighters[param])
+
+    return fighters
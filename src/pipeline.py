@@ -0,0 +1,200 @@
+import queue
+import requests
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from src.data_class import Links
+from src.cache import CacheMissError
+from typing import Any, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Parsers of the worker process by class and parameters, created by the first task of a parser
+_worker_parsers = {}
+
+# Pool of parse processes shared by the pipelines of the process, created by the first run
+_pool, _pool_lock = None, threading.Lock()
+
+
+def _parse_task(parser_cls: type, config: dict, method: str, meta: Any, page: str) -> Tuple[Any, dict]:
+    key = (parser_cls, repr(sorted(config.items())))
+    if key not in _worker_parsers:
+        _worker_parsers[key] = parser_cls(**config)
+    parser = _worker_parsers[key]
+    # Metrics of the worker are sent back with the record and added to the metrics of the parser
+    return getattr(parser, method)(meta, page), parser.metrics.pop()
+
+
+@dataclass
+class Pipeline(Links):
+    """
+    Staged fetch -> parse pipeline. Download threads put html into a bounded queue, a pool of
+    parse_workers processes turns html into records and the caller collects them in the order of the tasks.
+    Bounded queues between the stages and the reorder window keep memory flat whatever the number of pages.
+    """
+
+    def pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        :return: pool of parse_workers processes shared by the pipelines of the process, None without workers
+        """
+        global _pool
+        if not self.parse_workers:
+            return None
+
+        with _pool_lock:
+            # A pool of another size or with a dead process is replaced
+            if _pool is not None and (_pool._max_workers != self.parse_workers or _pool._broken):
+                _pool.shutdown(wait=False, cancel_futures=True)
+                _pool = None
+            if _pool is None:
+                # Workers are spawned, not forked, so they don't inherit running download threads and open connections
+                _pool = ProcessPoolExecutor(max_workers=self.parse_workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+            return _pool
+
+    @staticmethod
+    def close_pool() -> None:
+        """
+        Stop the processes of the shared pool. Called at the end of the run.
+        """
+        global _pool
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=True, cancel_futures=True)
+                _pool = None
+
+    def run(self, parser: Any, method: str, tasks: List[Tuple[Any, str]]) -> Iterator[Tuple[int, Any]]:
+        """
+        Run the pipeline over the tasks.
+        :param parser: parser whose fetcher downloads pages, whose method parses them and whose metrics
+        collect parse metrics of the workers
+        :param method: name of the parser method, called as method(meta, page)
+        :param tasks: list of (meta, url) pairs
+        :return: generator of (number of the task, parsed record) in the order of the tasks, None for pages
+        failed to download
+        """
+        urls, pages, results = queue.Queue(), queue.Queue(maxsize=self.queue_size), queue.Queue(maxsize=self.queue_size)
+        for num, (meta, url) in enumerate(tasks):
+            urls.put((num, meta, url))
+
+        stop, errors, futures = threading.Event(), [], []
+        downloaders = min(self.max_workers, len(tasks)) or 1
+        executor, config = self.pool(), parser.config()
+
+        # A task is started only within reorder_window tasks of the first task not yielded yet, so a slow page
+        # holds back at most the window of finished records
+        window, emitted = threading.Condition(), [0]
+
+        def download() -> None:
+            try:
+                while not stop.is_set():
+                    try:
+                        num, meta, url = urls.get_nowait()
+                    except queue.Empty:
+                        break
+                    with window:
+                        while num >= emitted[0] + self.reorder_window and not stop.is_set():
+                            window.wait(0.1)
+                    try:
+                        page = parser.fetcher.fetch(url)
+                    except (requests.RequestException, CacheMissError):
+                        page = None
+                    self.put(pages, (num, meta, page), stop)
+                self.put(pages, None, stop)
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+
+        def dispatch() -> None:
+            try:
+                finished = 0
+                while finished < downloaders and not stop.is_set():
+                    try:
+                        item = pages.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is None:
+                        finished += 1
+                        continue
+
+                    num, meta, page = item
+                    if page is None or executor is None:
+                        future = Future()
+                        future.set_result((meta, page))
+                    else:
+                        future = executor.submit(_parse_task, type(parser), config, method, meta, page)
+                        futures.append(future)
+                    self.put(results, (num, page is not None, future), stop)
+                self.put(results, None, stop)
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+
+        threads = [threading.Thread(target=download, daemon=True) for _ in range(downloaders)]
+        threads.append(threading.Thread(target=dispatch, daemon=True))
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        try:
+            while True:
+                try:
+                    item = results.get(timeout=0.1)
+                except queue.Empty:
+                    # Failure of a stage stops the pipeline and is raised to the caller
+                    if errors:
+                        raise errors[0]
+                    continue
+                if item is None:
+                    break
+
+                num, downloaded, future = item
+                if not downloaded:
+                    pending[num] = None
+                elif executor is None:
+                    pending[num] = getattr(parser, method)(*future.result())
+                else:
+                    pending[num], metrics = future.result()
+                    parser.metrics.merge(metrics)
+
+                # Finished records are held only until the earlier tasks are finished
+                while emitted[0] in pending:
+                    yield emitted[0], pending.pop(emitted[0])
+                    with window:
+                        emitted[0] += 1
+                        window.notify_all()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            # The pool is shared, only tasks of this run are cancelled
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def chunks(records: Iterator[Any], chunk_size: int) -> Iterator[List[Any]]:
+        """
+        :param records: generator of records
+        :param chunk_size: max records in a chunk
+        :return: generator of lists of records
+        """
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def put(stage: queue.Queue, item: Any, stop: threading.Event) -> None:
+        """
+        Put the item into the bounded queue, waiting for free space until the pipeline is stopped.
+        """
+        while not stop.is_set():
+            try:
+                stage.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,235 @@
+import time
+import random
+import requests
+import threading
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from src.data_class import Links
+from src.metrics import page_type
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Requests to the host are suspended after too many consecutive failures.
+    """
+
+
+class HostDownError(CircuitOpenError):
+    """
+    Circuit of the host is opened breaker_trips times in a row, requests fail without retries until a probe succeeds.
+    """
+
+
+class EmptyPageError(requests.RequestException):
+    """
+    Site answered with an empty page, a sign of throttling.
+    """
+
+
+class HostState:
+    """
+    Rate control state of one host.
+    """
+
+    def __init__(self, limit: float) -> None:
+        self.limit, self.in_flight = limit, 0
+        # Slow start doubles the limit every round trip until the first decrease
+        self.slow_start = True
+        # Lowest latency by page type, smoothed latency and its smoothed ratio to the lowest one
+        self.latency_min, self.latency_ewma, self.slowdown = {}, None, 1.0
+        self.last_decrease, self.paused_until = 0.0, 0.0
+        # Consecutive failures, start of the open circuit, openings of the circuit without a success in between
+        self.failures, self.opened_at, self.half_open, self.trips = 0, None, False, 0
+        # All openings of the circuit, requests admitted before the last one don't count towards the breaker
+        self.openings = 0
+
+
+@dataclass
+class RateController(Links):
+    """
+    Adaptive per-host request scheduler. The number of requests in flight grows while responses are fast
+    (slow start, then additive increase), stops growing when latency is above latency_tolerance times the lowest
+    latency of the page type and is cut by backoff_factor on throttling and latency twice above the tolerance
+    (AIMD). Retry-After of the site pauses the host.
+    After breaker_threshold consecutive failures the circuit of the host is open for breaker_cooldown seconds,
+    then a single probe request decides whether it is closed again. Requests wait for the probe, but after
+    breaker_trips openings in a row the host is considered down and they fail at once.
+    """
+
+    def __post_init__(self) -> None:
+        self._cond = threading.Condition()
+        self.hosts = {}
+
+    def state(self, host: str) -> HostState:
+        """
+        :param host: host of the site
+        :return: rate control state of the host, created on the first request
+        """
+        if host not in self.hosts:
+            self.hosts[host] = HostState(float(max(1, min(self.initial_concurrency, self.max_workers))))
+
+        return self.hosts[host]
+
+    def acquire(self, url: str) -> int:
+        """
+        Wait for a free slot of the host of the url.
+        :param url: page url
+        :return: openings of the circuit at the admission of the request, passed to release
+        """
+        host = urlsplit(url).netloc
+        with self._cond:
+            state = self.state(host)
+            while True:
+                now = time.monotonic()
+                if state.opened_at is not None:
+                    if now - state.opened_at < self.breaker_cooldown:
+                        error = HostDownError if state.trips >= self.breaker_trips else CircuitOpenError
+                        raise error(f'Circuit of {host} is open after {state.failures} failures')
+                    # Cooldown is over, a single probe request is let through
+                    state.opened_at, state.half_open, state.limit = None, True, 1.0
+
+                if state.in_flight < int(state.limit) and now >= state.paused_until:
+                    state.in_flight += 1
+                    return state.openings
+
+                self._cond.wait(timeout=max(min(state.paused_until - now, 1.0), 0.05))
+
+    def release(self, url: str, latency: float, outcome: str, retry_after: Optional[float] = None,
+                admitted: Optional[int] = None) -> Optional[str]:
+        """
+        Free the slot and adjust the limit of the host by the outcome of the request. Latency is compared
+        with the lowest latency of the same page type, pages of different types have different sizes.
+        :param url: page url passed to acquire
+        :param latency: seconds of the request
+        :param outcome: 'ok' for an answer of the site, 'throttled' for timeouts, empty pages and throttle_statuses,
+        'error' for connection errors and other server errors
+        :param retry_after: seconds the site asks to wait
+        :param admitted: openings of the circuit returned by acquire, requests admitted before the circuit was
+        opened only free their slot
+        :return: 'decrease' or 'circuit_open' if the limit is cut or the circuit is opened, else None
+        """
+        with self._cond:
+            state, now, event = self.hosts[urlsplit(url).netloc], time.monotonic(), None
+            state.in_flight -= 1
+
+            if admitted is not None and admitted != state.openings:
+                # Requests sent before the circuit was opened fail with the same outage, they are not probes
+                pass
+            elif outcome == 'ok':
+                # Successful probe closes the circuit, the limit grows back with the slow start
+                state.slow_start = state.slow_start or state.half_open
+                state.failures, state.half_open, state.trips = 0, False, 0
+
+                kind = page_type(url)
+                state.latency_min[kind] = min(state.latency_min.get(kind, latency), latency)
+                slowdown = latency / state.latency_min[kind] if state.latency_min[kind] > 0 else 1.0
+                state.slowdown += self.latency_smoothing * (slowdown - state.slowdown)
+                state.latency_ewma = latency if state.latency_ewma is None \
+                    else state.latency_ewma + self.latency_smoothing * (latency - state.latency_ewma)
+
+                # Growing latency stops the growth of the limit, latency twice above the tolerance cuts it
+                if state.slowdown > 2 * self.latency_tolerance and state.limit <= 1.0:
+                    # Latency stays high with a single request in flight, the site itself is slower now
+                    state.latency_min, state.slowdown = {}, 1.0
+                elif state.slowdown > 2 * self.latency_tolerance:
+                    event = self.decrease(state, now)
+                elif state.slowdown > self.latency_tolerance:
+                    state.slow_start = False
+                else:
+                    state.limit = min(state.limit + (1.0 if state.slow_start else 1.0 / state.limit),
+                                      float(self.max_workers))
+            else:
+                # Throttling cuts the limit, other errors only count towards the circuit breaker
+                state.failures += 1
+                if outcome == 'throttled':
+                    event = self.decrease(state, now)
+                if retry_after:
+                    state.paused_until = max(state.paused_until, now + min(retry_after, self.retry_max_delay))
+                # Only a closed circuit or a failed probe opens the circuit, failures while it is open don't
+                if state.half_open or (state.opened_at is None and state.failures >= self.breaker_threshold):
+                    state.opened_at, state.half_open, event = now, False, 'circuit_open'
+                    state.trips += 1
+                    state.openings += 1
+
+            self._cond.notify_all()
+
+        return event
+
+    def decrease(self, state: HostState, now: float) -> Optional[str]:
+        """
+        Multiplicative decrease of the limit, at most once per round trip, so a burst of failures of
+        requests sent together cuts it once.
+        :return: 'decrease' if the limit is cut
+        """
+        if now - state.last_decrease < (state.latency_ewma or 0.0):
+            return None
+
+        state.limit = max(state.limit * self.backoff_factor, 1.0)
+        state.slow_start, state.last_decrease = False, now
+        return 'decrease'
+
+    def retry_delay(self, url: str, attempt: int, error: requests.RequestException) -> float:
+        """
+        Jittered exponential delay before the next attempt, at least the Retry-After of the site
+        or the rest of the circuit cooldown.
+        :param url: page url
+        :param attempt: number of the failed attempt, from 0
+        :param error: error of the attempt
+        :return: seconds to wait
+        """
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+        response = getattr(error, 'response', None)
+        if response is not None:
+            delay = max(delay, min(self.retry_after(response) or 0.0, self.retry_max_delay))
+
+        if isinstance(error, CircuitOpenError):
+            with self._cond:
+                opened_at = self.state(urlsplit(url).netloc).opened_at
+            if opened_at is not None:
+                delay = max(delay, opened_at + self.breaker_cooldown - time.monotonic())
+
+        return delay
+
+    def limit(self, host: str) -> float:
+        """
+        :param host: host of the site
+        :return: current limit of requests in flight
+        """
+        with self._cond:
+            return self.state(host).limit
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> Optional[float]:
+        """
+        :param response: response of the site
+        :return: seconds of the Retry-After header, None if it is absent or malformed
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def retryable(self, error: requests.RequestException) -> bool:
+        """
+        :param error: error of the request
+        :return: True for timeouts, connection errors, empty pages and statuses worth retrying
+        """
+        if isinstance(error, HostDownError):
+            return False
+        if isinstance(error, (requests.Timeout, requests.ConnectionError, EmptyPageError)):
+            return True
+
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in self.retry_statuses
@@ -0,0 +1,98 @@
+import pyarrow as pa
+from src.data_class import Links
+from src.stats_model import typed_columns
+from src.career_features import feature_names
+
+# Arrow types of the typed stats columns
+TYPED = {'Int8': pa.int8(), 'int8': pa.int8(), 'Int16': pa.int16(), 'float32': pa.float32()}
+
+
+def events_schema(links: Links) -> pa.Schema:
+    """
+    Declared schema of the events dataset. Columns follow the order of EventsParser.get_event_info.
+    :param links: parameters of the parser, the stats columns depend on num_rounds
+    :return: arrow schema
+    """
+    header = [pa.field('date', pa.timestamp('ns')), pa.field('event_url', pa.string()),
+              pa.field('event_fight', pa.string())]
+    header += [pa.field(f'f{fg_num}_{name}', pa.string())
+               for name in ['status_fg', 'fullname', 'url', 'nickname'] for fg_num in (1, 2)]
+    header += [pa.field('win_method', pa.string()), pa.field('round', pa.string()), pa.field('time', pa.time64('us')),
+               pa.field('time_format', pa.string()), pa.field('referee', pa.string())]
+
+    stats, rounds = [], range(1, links.num_rounds + 1)
+    for fg_num in (1, 2):
+        stats += [f'f{fg_num}_{name}' for name, _ in links.totals_cols]
+        stats += [f'f{fg_num}_rnd{rnd}_{name}' for rnd in rounds for name, _ in links.totals_cols]
+        stats += [f'f{fg_num}_{name}' for name, _ in links.strikes_cols]
+        stats += [f'f{fg_num}_rnd{rnd}_{name}' for rnd in rounds for name, _ in links.strikes_cols]
+    stats += [f'f{fg_num}_land_trg_{chart}' for chart in links.charts_cols for fg_num in (1, 2)]
+
+    return pa.schema(header + [pa.field(name, pa.string()) for name in stats])
+
+
+def fights_schema(links: Links) -> pa.Schema:
+    """
+    Declared schema of the fights table of the typed stats model, see src.stats_model.normalize_events.
+    :param links: parameters of the parser
+    :return: arrow schema
+    """
+    header = [field for field in events_schema(links) if not field.name.startswith(('f1_', 'f2_'))
+              or field.name.split('_', 1)[1] in ('status_fg', 'fullname', 'url', 'nickname')]
+    header = [pa.field('round', pa.int8()) if field.name == 'round' else field for field in header]
+
+    stats = [name for name, _ in links.totals_cols] + [name for name, _ in links.strikes_cols]
+    totals = [pa.field(f'f{fg_num}_{name}', TYPED[dtype]) for fg_num in (1, 2) for name, dtype in typed_columns(stats)]
+    charts = [pa.field(f'f{fg_num}_land_trg_{chart}', pa.int16()) for chart in links.charts_cols for fg_num in (1, 2)]
+
+    return pa.schema(header + totals + charts)
+
+
+def rounds_schema(links: Links) -> pa.Schema:
+    """
+    Declared schema of the long per round stats table of the typed stats model.
+    :param links: parameters of the parser
+    :return: arrow schema
+    """
+    stats = [name for name, _ in links.totals_cols] + [name for name, _ in links.strikes_cols]
+    return pa.schema([pa.field('event_fight', pa.string()), pa.field('fighter', pa.int8()),
+                      pa.field('round', pa.int8())] +
+                     [pa.field(name, TYPED[dtype]) for name, dtype in typed_columns(stats)])
+
+
+def fighters_schema(links: Links) -> pa.Schema:
+    """
+    Declared schema of the fighters dataset, the output of FighterParser.get_fighter_data.
+    :param links: parameters of the parser
+    :return: arrow schema
+    """
+    return pa.schema([pa.field('Fullname', pa.string()), pa.field('Win', pa.int64()), pa.field('Loss', pa.int64()),
+                      pa.field('Draw', pa.int64()), pa.field('Age', pa.float64()), pa.field('Height', pa.float64()),
+                      pa.field('Weight', pa.float64()), pa.field('Reach', pa.float64()),
+                      pa.field('Stance', pa.string()), pa.field('SLpM', pa.string()),
+                      pa.field('Str.Acc.%', pa.float64()), pa.field('SApM', pa.string()),
+                      pa.field('Str.Def%', pa.float64()), pa.field('TDAvg.', pa.string()),
+                      pa.field('TDAcc.%', pa.float64()), pa.field('TDDef.%', pa.float64()),
+                      pa.field('Sub.Avg.', pa.string()), pa.field('Link', pa.string())])
+
+
+def features_schema(links: Links) -> pa.Schema:
+    """
+    Declared schema of the pre-fight career features, see src.career_features.CareerFeatures.update.
+    :param links: parameters of the features
+    :return: arrow schema
+    """
+    return pa.schema([pa.field('event_fight', pa.string()), pa.field('date', pa.timestamp('ns'))] +
+                     [field for fg_num in (1, 2) for field in [pa.field(f'f{fg_num}_url', pa.string())] +
+                      [pa.field(f'f{fg_num}_{name}', pa.float64()) for name in feature_names(links)]])
+
+
+def dataset_schema(dataset: str, links: Links) -> pa.Schema:
+    """
+    :param dataset: name of the dataset, 'events', 'fights', 'rounds', 'fighter' or 'features'
+    :param links: parameters of the parser
+    :return: arrow schema of the dataset
+    """
+    schemas = {'events': events_schema, 'fights': fights_schema, 'rounds': rounds_schema, 'fighter': fighters_schema,
+               'features': features_schema}
+    return schemas[dataset](links)
@@ -0,0 +1,256 @@
+import os
+import time
+import threading
+import contextlib
+import requests
+import pandas as pd
+from tqdm import tqdm
+from dataclasses import dataclass
+from functools import cached_property
+from src.fetcher import Fetching
+from src.store import Store
+from src.work_queue import WorkQueue
+from src.pipeline import Pipeline
+from src.crawl_graph import CrawlGraph
+from src.schemas import dataset_schema
+from src.stats_model import normalize_events
+from src.event_parser import EventsParser
+from src.fighter_parser import FighterParser
+from utils.scripts import open_writer
+from utils.writers import ParquetWriter, read_data
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class ShardWorker(Fetching):
+    """
+    Sharded crawl of the whole history. The planner splits the events list into shards of the work queue,
+    any number of workers on one box or on several nodes claim shards and write a partial output per shard.
+    A shard of events queues the fighters found on its event pages, every fighter is queued once, in shards
+    of fighter_shard_size. When the queue is drained the merge combines the partial outputs into the datasets.
+    """
+
+    @cached_property
+    def queue(self) -> WorkQueue:
+        """
+        Work queue shared by the workers.
+        """
+        return WorkQueue(**self.config())
+
+    def linked(self, cls: type) -> Any:
+        """
+        :param cls: parser or crawl graph class
+        :return: object of the class sharing the fetcher and the metrics of the worker
+        """
+        obj = cls(**self.config())
+        obj.fetcher, obj.metrics = self.fetcher, self.metrics
+        return obj
+
+    def plan(self) -> int:
+        """
+        Queue shards of events of the events list, events queued by a previous plan are skipped.
+        With the index discovery fighters of the alphabetical listing are queued as well.
+        :return: number of new shards
+        """
+        events = self.linked(CrawlGraph).get_events()
+        shards = self.queue.add('events', [list(event) for event in events], self.shard_size)
+
+        if self.fighters_discovery == 'index':
+            fighters = self.linked(FighterParser).get_fighters_index()
+            shards += self.queue.add('fighters', [[row['Fullname'], row['Link']] for row in fighters],
+                                     self.fighter_shard_size)
+
+        print(f'-----{shards} NEW SHARDS PLANNED FOR {len(events)} EVENTS-----')
+        return shards
+
+    def run(self) -> int:
+        """
+        Claim and process shards until no shard is pending or claimed by other workers. A failed shard
+        goes back to the queue for another attempt.
+        :return: number of shards completed by the worker
+        """
+        completed = 0
+        while True:
+            shard = self.queue.claim(self.worker_id)
+            if shard is None:
+                # Shards of other workers may queue fighters or come back when their worker dies
+                if not self.queue.unfinished():
+                    break
+                time.sleep(1.0)
+                continue
+
+            tqdm.write(f'Shard {shard["id"]} of {len(shard["items"])} {shard["kind"]}, attempt {shard["attempts"]}')
+            try:
+                with self.leased(shard['id']):
+                    output, skipped = self.process(shard)
+            except Exception as error:
+                tqdm.write(f'Shard {shard["id"]} failed: {error!r}')
+                self.queue.fail(shard['id'], self.worker_id, repr(error)[:500])
+                continue
+
+            completed += self.queue.complete(shard['id'], self.worker_id, output, skipped)
+
+        print(f'-----{completed} SHARDS COMPLETED BY {self.worker_id}-----')
+        return completed
+
+    @contextlib.contextmanager
+    def leased(self, shard_id: int) -> Iterator[None]:
+        """
+        Renew the lease of the shard in the background while the block runs.
+        :param shard_id: id of the claimed shard
+        """
+        stop = threading.Event()
+
+        def renew() -> None:
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.queue.renew(shard_id, self.worker_id):
+                    tqdm.write(f'Lease of shard {shard_id} is lost')
+                    return
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def process(self, shard: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """
+        Parse the items of the shard and write them to the partial output of the shard. Fights and fighters
+        failed to download or parse fail the shard, so it is retried. The last attempt keeps the parsed ones
+        and the missing urls are recorded in the queue.
+        :param shard: claimed shard
+        :return: path of the partial output and urls of the missing fights or fighters
+        """
+        if shard['kind'] == 'events':
+            ev, graph = self.linked(EventsParser), self.linked(CrawlGraph)
+            graph.build(events=shard['items'])
+            # Fights of an event page failed to download would be missing, the shard is retried instead
+            missing = [event[1] for event in graph.events if event[1] not in graph.fights]
+            if missing:
+                raise requests.RequestException(f'{len(missing)} event pages are not downloaded')
+
+            expected = [fight for event in graph.events for fight in graph.fights[event[1]]]
+            written = []
+            output = self.write_part('events', shard['id'], self.collected(ev.iter_event_data(graph=graph),
+                                                                           'event_fight', written),
+                                     dataset_schema('events', ev))
+            skipped = self.skipped(shard, expected, written)
+
+            # Fighters are queued after the output is written, a retried shard queues only the missing ones
+            if self.fighters_discovery == 'events':
+                fighters = graph.fighters_of([event[1] for event in graph.events])
+                self.queue.add('fighters', [[name, link] for link, name in fighters.items()], self.fighter_shard_size)
+            return output, skipped
+
+        fp, written = self.linked(FighterParser), []
+        records = fp.iter_profiles([tuple(item) for item in shard['items']])
+        chunks = (fp.prepare_data(pd.DataFrame(chunk)) for chunk in Pipeline.chunks(records, self.chunk_size))
+        output = self.write_part('fighters', shard['id'], self.collected(chunks, 'Link', written),
+                                 dataset_schema('fighter', fp))
+        return output, self.skipped(shard, [item[-1] for item in shard['items']], written)
+
+    @staticmethod
+    def collected(chunks: Iterator[pd.DataFrame], column: str, keys: List[str]) -> Iterator[pd.DataFrame]:
+        """
+        :param chunks: prepared chunks of the dataset
+        :param column: column of the urls of the rows
+        :param keys: list the urls of the passed chunks are appended to
+        :return: generator of the chunks
+        """
+        for chunk in chunks:
+            keys.extend(chunk[column])
+            yield chunk
+
+    def skipped(self, shard: Dict[str, Any], expected: List[str], written: List[str]) -> List[str]:
+        """
+        :param shard: claimed shard
+        :param expected: urls of the items of the shard
+        :param written: urls of the items in the partial output
+        :return: urls of the missing items, raises to retry the shard if it has attempts left
+        """
+        written = set(written)
+        skipped = [url for url in expected if url not in written]
+        if skipped and shard['attempts'] < self.max_attempts:
+            raise requests.RequestException(f'{len(skipped)} pages of the shard are not downloaded or parsed')
+        return skipped
+
+    def write_part(self, kind: str, shard_id: int, chunks: Iterator[pd.DataFrame], schema: Any) -> str:
+        """
+        Write the partial output of the shard. The file appears only when it is complete, a worker which
+        lost the lease and the worker which claimed the shard after it don't write the same file.
+        :param kind: kind of the shard
+        :param shard_id: id of the shard
+        :param chunks: prepared chunks of the dataset
+        :param schema: declared schema of the dataset
+        :return: path of the file
+        """
+        folder = os.path.join(self.parts_dir, kind)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'shard-{shard_id:05d}.parquet')
+
+        with ParquetWriter(f'{path}.{self.worker_id}.tmp', schema) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        os.replace(f'{path}.{self.worker_id}.tmp', path)
+        return path
+
+    def merge(self, file_format: str = 'parquet', typed: bool = False, store: Optional[Store] = None) -> Dict[str, int]:
+        """
+        Combine partial outputs of done shards into the datasets in the order of the shards. Events are
+        deduplicated by the fight url and fighters by the whole row, a fighter of several events is parsed once.
+        :param file_format: format of the datasets
+        :param typed: save fights and rounds of the stats model instead of the wide events
+        :param store: database the datasets are upserted into as well
+        :return: number of rows by dataset
+        """
+        unfinished = self.queue.unfinished()
+        failed = sum(statuses.get('failed', 0) for statuses in self.queue.stats().values())
+        if unfinished or failed:
+            tqdm.write(f'-----{unfinished} SHARDS ARE NOT FINISHED AND {failed} FAILED, THEIR ROWS ARE MISSING-----')
+        for kind, urls in self.queue.skipped().items():
+            tqdm.write(f'-----{len(urls)} PAGES OF {kind.upper()} SHARDS ARE NOT DOWNLOADED OR PARSED AFTER '
+                       f'{self.max_attempts} ATTEMPTS, THEIR ROWS ARE MISSING: {" ".join(urls[:10])}-----')
+
+        rows, seen = {}, set()
+        with open_writer(f'fighter.{file_format}', dataset_schema('fighter', self), metrics=self.metrics) as writer:
+            for data in self.read_parts('fighters'):
+                hashes = pd.util.hash_pandas_object(data, index=False)
+                data = data[~hashes.duplicated().to_numpy() & ~hashes.isin(seen).to_numpy()]
+                seen.update(hashes)
+                writer.write(data)
+                if store is not None:
+                    store.upsert_fighters(data)
+                rows['fighter'] = rows.get('fighter', 0) + len(data)
+        print('---FIGHTERS DATASET MERGED AND SAVED---')
+
+        names, seen = ['fights', 'rounds'] if typed else ['events'], set()
+        with contextlib.ExitStack() as stack:
+            writers = {name: stack.enter_context(open_writer(f'{name}.{file_format}', dataset_schema(name, self),
+                                                             metrics=self.metrics)) for name in names}
+            for data in self.read_parts('events'):
+                data = data[~data['event_fight'].duplicated() & ~data['event_fight'].isin(seen)]
+                seen.update(data['event_fight'])
+                if data.empty:
+                    continue
+
+                for name, table in (normalize_events(data, self) if typed else {'events': data}).items():
+                    writers[name].write(table)
+                    rows[name] = rows.get(name, 0) + len(table)
+                if store is not None:
+                    store.upsert_events(data)
+        print('---FIGHTERS EVENTS DATASET MERGED AND SAVED---')
+
+        return rows
+
+    def read_parts(self, kind: str) -> Iterator[pd.DataFrame]:
+        """
+        :param kind: kind of the shards
+        :return: generator of partial outputs of done shards, one at a time
+        """
+        for path in self.queue.outputs(kind):
+            yield read_data(path)
+
+    def close(self) -> None:
+        self.queue.close()
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from src.data_class import Links
+from typing import Dict, List, Tuple
+
+# Kinds of the fight stats: 'count' is a plain number, 'landed' is "12 of 30", 'percent' is "45%",
+# 'time' is control time "1:23"
+STAT_KINDS = {'kd': 'count', 'sub.att': 'count', 'rev': 'count', 'sig_str%': 'percent', 'td%': 'percent',
+              'ctrl': 'time'}
+
+
+def stat_kind(name: str) -> str:
+    """
+    :param name: name of the stat as in Links.totals_cols and Links.strikes_cols
+    :return: kind of the stat
+    """
+    return STAT_KINDS.get(name, 'landed')
+
+
+def typed_name(name: str) -> str:
+    """
+    :param name: name of the stat
+    :return: name of the typed column, without characters unsafe for columnar formats
+    """
+    return name.replace('%', '_pct').replace('.', '_')
+
+
+def typed_columns(names: List[str]) -> List[Tuple[str, str]]:
+    """
+    :param names: names of the stats
+    :return: typed columns of the stats with their pandas dtypes
+    """
+    columns = []
+    for name in names:
+        kind = stat_kind(name)
+        if kind == 'landed':
+            columns += [(f'{typed_name(name)}_landed', 'Int16'), (f'{typed_name(name)}_attempted', 'Int16')]
+        elif kind == 'percent':
+            columns.append((typed_name(name), 'float32'))
+        elif kind == 'time':
+            columns.append((f'{typed_name(name)}_sec', 'Int16'))
+        else:
+            columns.append((typed_name(name), 'Int16'))
+
+    return columns
+
+
+def parse_values(values: pd.Series, kind: str) -> List[np.ndarray]:
+    """
+    :param values: raw strings of stats of one kind
+    :param kind: kind of the stats
+    :return: float arrays of parsed values, two arrays for 'landed', NaN where the value is missing
+    """
+    values = values.astype('string').str.strip()
+
+    if kind == 'landed':
+        parts = values.str.extract(r'^(\d+) of (\d+)$')
+        parsed = [pd.to_numeric(parts[0]), pd.to_numeric(parts[1])]
+    elif kind == 'percent':
+        parsed = [pd.to_numeric(values.str.rstrip('%'), errors='coerce')]
+    elif kind == 'time':
+        parts = values.str.extract(r'^(\d+):(\d+)$')
+        parsed = [pd.to_numeric(parts[0]) * 60 + pd.to_numeric(parts[1])]
+    else:
+        parsed = [pd.to_numeric(values, errors='coerce')]
+
+    return [part.to_numpy(dtype='float64', na_value=np.nan) for part in parsed]
+
+
+def typed_stats(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function converts raw string stats to small numeric columns, missing values become <NA>.
+    Stats take few distinct values, so only the distinct strings are parsed and mapped back by their codes.
+    :param data: raw stats, columns are names of the stats
+    :return: typed stats
+    """
+    codes, uniques = pd.factorize(data.to_numpy(dtype=object).ravel())
+    codes, uniques = codes.reshape(data.shape), pd.Series(uniques, dtype=object)
+
+    # Parsed distinct values of every kind, a trailing NaN is taken by the code -1 of missing values
+    parsed = {kind: [np.append(part, np.nan) for part in parse_values(uniques, kind)]
+              for kind in {stat_kind(name) for name in data.columns}}
+
+    typed = {}
+    for num, name in enumerate(data.columns):
+        values = [part[codes[:, num]] for part in parsed[stat_kind(name)]]
+        for (column, dtype), column_values in zip(typed_columns([name]), values):
+            typed[column] = pd.Series(column_values, index=data.index).astype(dtype)
+
+    return pd.DataFrame(typed, index=data.index)
+
+
+def normalize_events(data: pd.DataFrame, links: Links) -> Dict[str, pd.DataFrame]:
+    """
+    This function turns the wide events dataset into the compact stats model:
+    'fights' - one row per fight with the header, typed total stats and landed by target charts,
+    'rounds' - long table of typed per round stats keyed by (event_fight, fighter, round), without padded rounds.
+    :param data: prepared events dataset of EventsParser
+    :param links: parameters of the parser
+    :return: dictionary of the tables
+    """
+    if data.empty:
+        return {'fights': pd.DataFrame(), 'rounds': pd.DataFrame()}
+
+    stats = [name for name, _ in links.totals_cols] + [name for name, _ in links.strikes_cols]
+    rounds_stats = [f'f{fg_num}_rnd{rnd}_{name}' for fg_num in (1, 2)
+                    for rnd in range(1, links.num_rounds + 1) for name in stats]
+    total_stats = [f'f{fg_num}_{name}' for fg_num in (1, 2) for name in stats]
+    charts = [f'f{fg_num}_land_trg_{chart}' for chart in links.charts_cols for fg_num in (1, 2)]
+
+    header = [name for name in data.columns if name not in set(rounds_stats + total_stats + charts)]
+    fights = data[header].copy()
+    fights['round'] = pd.to_numeric(fights['round'], errors='coerce').astype('Int8')
+
+    for fg_num in (1, 2):
+        totals = typed_stats(data[[f'f{fg_num}_{name}' for name in stats]].set_axis(stats, axis=1))
+        fights[[f'f{fg_num}_{name}' for name in totals.columns]] = totals
+    for name in charts:
+        fights[name] = pd.to_numeric(data[name].astype('string').str.rstrip('%'), errors='coerce').astype('Int16')
+
+    # Per round stats of both fighters, rounds after the end of the fight are not stored
+    parts = []
+    for fg_num in (1, 2):
+        for rnd in range(1, links.num_rounds + 1):
+            part = data.loc[fights['round'] >= rnd, [f'f{fg_num}_rnd{rnd}_{name}' for name in stats]]
+            part = typed_stats(part.set_axis(stats, axis=1))
+            part.insert(0, 'event_fight', data.loc[part.index, 'event_fight'])
+            part.insert(1, 'fighter', pd.Series(fg_num, index=part.index, dtype='int8'))
+            part.insert(2, 'round', pd.Series(rnd, index=part.index, dtype='int8'))
+            parts.append(part)
+
+    rounds = pd.concat(parts).sort_values(['event_fight', 'fighter', 'round'], kind='stable')
+    return {'fights': fights, 'rounds': rounds.reset_index(drop=True)}
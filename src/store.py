@@ -0,0 +1,214 @@
+import os
+import time
+import sqlite3
+import pandas as pd
+from dataclasses import dataclass
+from src.metrics import Measured
+from src.normalize import time_seconds
+from src.stats_model import normalize_events, typed_columns
+from typing import Any, Dict, List, Optional, Tuple
+
+# Columns of the fighters dataset and their columns in the fighters table, numbers of the profile are stored as numbers
+FIGHTER_COLUMNS = {'Fullname': ('fullname', 'TEXT'), 'Win': ('win', 'INTEGER'), 'Loss': ('loss', 'INTEGER'),
+                   'Draw': ('draw', 'INTEGER'), 'Age': ('age', 'REAL'), 'Height': ('height_cm', 'REAL'),
+                   'Weight': ('weight_kg', 'REAL'), 'Reach': ('reach_cm', 'REAL'), 'Stance': ('stance', 'TEXT'),
+                   'SLpM': ('slpm', 'REAL'), 'Str.Acc.%': ('str_acc_pct', 'REAL'), 'SApM': ('sapm', 'REAL'),
+                   'Str.Def%': ('str_def_pct', 'REAL'), 'TDAvg.': ('td_avg', 'REAL'),
+                   'TDAcc.%': ('td_acc_pct', 'REAL'), 'TDDef.%': ('td_def_pct', 'REAL'),
+                   'Sub.Avg.': ('sub_avg', 'REAL')}
+
+# Name, table and column of every index
+INDEXES = [('events_date', 'events', 'date'), ('fighters_fullname', 'fighters', 'fullname'),
+           ('fights_event', 'fights', 'event_id'), ('fights_date', 'fights', 'date'),
+           ('fight_stats_fighter', 'fight_stats', 'fighter_id'), ('round_stats_fighter', 'round_stats', 'fighter_id')]
+
+
+def url_key(url: Any) -> Optional[str]:
+    """
+    :param url: ufcstats url of an event, a fight or a fighter, or its id
+    :return: id of the page, the last part of the url
+    """
+    return url.rstrip('/').rsplit('/', 1)[-1] if isinstance(url, str) and url else None
+
+
+@dataclass
+class Store(Measured):
+    """
+    Local sqlite database of the datasets in normalized tables: events, fighters, fights, fight_stats
+    (stats of a fighter in a fight) and round_stats (stats of a fighter in a round). Rows are keyed by ids
+    of the ufcstats urls and upserted, a scraped again page updates its rows in place. Fights are indexed
+    by event, date and fighter, so a slice is read without loading the datasets.
+    """
+
+    def __post_init__(self) -> None:
+        folder = os.path.dirname(self.store_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._conn = sqlite3.connect(self.store_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+        with self._conn:
+            for table, (columns, key) in self.tables().items():
+                columns = ', '.join(f'{name} {sql_type}' for name, sql_type in columns)
+                self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns}, PRIMARY KEY ({", ".join(key)}))')
+            for name, table, column in INDEXES:
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})')
+
+    def __enter__(self) -> 'Store':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def tables(self) -> Dict[str, Tuple[List[Tuple[str, str]], List[str]]]:
+        """
+        :return: columns with their sqlite types and the primary key of every table
+        """
+        names = [name for name, _ in self.totals_cols] + [name for name, _ in self.strikes_cols]
+        stats = [(name, 'REAL' if dtype == 'float32' else 'INTEGER') for name, dtype in typed_columns(names)]
+        charts = [(f'land_trg_{chart}', 'INTEGER') for chart in self.charts_cols]
+
+        return {'events': ([('event_id', 'TEXT'), ('url', 'TEXT'), ('date', 'TEXT')], ['event_id']),
+                'fighters': ([('fighter_id', 'TEXT'), ('url', 'TEXT')] + list(FIGHTER_COLUMNS.values()),
+                             ['fighter_id']),
+                'fights': ([('fight_id', 'TEXT'), ('url', 'TEXT'), ('event_id', 'TEXT'), ('date', 'TEXT'),
+                            ('win_method', 'TEXT'), ('round', 'INTEGER'), ('time_sec', 'INTEGER'),
+                            ('time_format', 'TEXT'), ('referee', 'TEXT')], ['fight_id']),
+                'fight_stats': ([('fight_id', 'TEXT'), ('corner', 'INTEGER'), ('fighter_id', 'TEXT'),
+                                 ('fullname', 'TEXT'), ('nickname', 'TEXT'), ('status', 'TEXT')] + stats + charts,
+                                ['fight_id', 'corner']),
+                'round_stats': ([('fight_id', 'TEXT'), ('corner', 'INTEGER'), ('round', 'INTEGER'),
+                                 ('fighter_id', 'TEXT')] + stats, ['fight_id', 'corner', 'round'])}
+
+    def upsert(self, table: str, data: pd.DataFrame) -> None:
+        """
+        Insert rows of the table, rows with a known key are updated.
+        :param table: name of the table
+        :param data: rows, columns named as in the table
+        """
+        columns, key = self.tables()[table]
+        names = [name for name, _ in columns]
+        updates = ', '.join(f'{name} = excluded.{name}' for name in names if name not in key)
+
+        data = data.reindex(columns=names).astype(object)
+        self._conn.executemany(f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))}) '
+                               f'ON CONFLICT ({", ".join(key)}) DO UPDATE SET {updates}',
+                               data.where(data.notna(), None).itertuples(index=False, name=None))
+
+        self.metrics.inc('rows_written', len(data), dataset=table, format='sqlite')
+
+    def upsert_events(self, data: pd.DataFrame) -> None:
+        """
+        Upsert events, fights and stats of the chunk of the prepared events dataset in one transaction.
+        :param data: prepared events dataset of EventsParser
+        """
+        if data.empty:
+            return
+
+        start = time.perf_counter()
+        tables = normalize_events(data, self)
+        fights, rounds = tables['fights'], tables['rounds']
+        dates = fights['date'].dt.strftime('%Y-%m-%d')
+
+        events = pd.DataFrame({'event_id': fights['event_url'].map(url_key), 'url': fights['event_url'],
+                               'date': dates}).drop_duplicates('event_id')
+
+        header = pd.DataFrame({'fight_id': fights['event_fight'].map(url_key), 'url': fights['event_fight'],
+                               'event_id': fights['event_url'].map(url_key), 'date': dates,
+                               'win_method': fights['win_method'], 'round': fights['round'],
+                               'time_sec': time_seconds(fights['time']).astype('Int64'),
+                               'time_format': fights['time_format'], 'referee': fights['referee']})
+
+        stats, fighter_ids = [], {}
+        for corner in (1, 2):
+            prefix = f'f{corner}_'
+            part = fights[[name for name in fights.columns if name.startswith(prefix)]]
+            part = part.rename(columns=lambda name: name[len(prefix):])
+            part = part.rename(columns={'status_fg': 'status'})
+            part.insert(0, 'fight_id', header['fight_id'])
+            part.insert(1, 'corner', corner)
+            part.insert(2, 'fighter_id', part['url'].map(url_key))
+            stats.append(part)
+            fighter_ids[corner] = dict(zip(part['fight_id'], part['fighter_id']))
+
+        rounds = rounds.rename(columns={'fighter': 'corner'})
+        rounds.insert(0, 'fight_id', rounds.pop('event_fight').map(url_key))
+        rounds['fighter_id'] = [fighter_ids[corner].get(fight_id)
+                                for fight_id, corner in zip(rounds['fight_id'], rounds['corner'])]
+
+        with self._conn:
+            self.upsert('events', events)
+            self.upsert('fights', header)
+            self.upsert('fight_stats', pd.concat(stats, ignore_index=True))
+            self.upsert('round_stats', rounds)
+            # Rounds after the end of a corrected fight are not its rounds anymore
+            self._conn.executemany('DELETE FROM round_stats WHERE fight_id = ? AND round > ?',
+                                   [(fight_id, int(rnd)) for fight_id, rnd in zip(header['fight_id'], header['round'])
+                                    if pd.notna(rnd)])
+
+        self.metrics.observe('write_seconds', time.perf_counter() - start, dataset='events', format='sqlite')
+
+    def upsert_fighters(self, data: pd.DataFrame) -> None:
+        """
+        Upsert fighters of the chunk of the prepared fighters dataset, fighters without a link are skipped.
+        :param data: prepared fighters dataset of FighterParser
+        """
+        if data.empty or 'Link' not in data:
+            return
+
+        start = time.perf_counter()
+        data = data[data['Link'].notna()]
+        fighters = pd.DataFrame({'fighter_id': data['Link'].map(url_key), 'url': data['Link']})
+        for column, (name, sql_type) in FIGHTER_COLUMNS.items():
+            values = data[column] if column in data else None
+            fighters[name] = pd.to_numeric(values, errors='coerce') if sql_type != 'TEXT' else values
+
+        with self._conn:
+            self.upsert('fighters', fighters)
+
+        self.metrics.observe('write_seconds', time.perf_counter() - start, dataset='fighters', format='sqlite')
+
+    def read(self, query: str, params: Tuple[Any, ...] = ()) -> pd.DataFrame:
+        """
+        :param query: sql query
+        :param params: parameters of the query
+        :return: rows of the query
+        """
+        return pd.read_sql_query(query, self._conn, params=params)
+
+    def fighter(self, fighter: str) -> pd.DataFrame:
+        """
+        :param fighter: url or id of the fighter
+        :return: profile of the fighter
+        """
+        return self.read('SELECT * FROM fighters WHERE fighter_id = ?', (url_key(fighter),))
+
+    def fighter_fights(self, fighter: str) -> pd.DataFrame:
+        """
+        :param fighter: url or id of the fighter
+        :return: fights of the fighter with his stats and his opponent, by date
+        """
+        return self.read('SELECT f.date, f.event_id, s.*, o.fighter_id AS opponent_id, o.fullname AS opponent, '
+                         'f.win_method, f.round, f.time_sec FROM fight_stats s JOIN fights f USING (fight_id) '
+                         'JOIN fight_stats o ON o.fight_id = s.fight_id AND o.corner != s.corner '
+                         'WHERE s.fighter_id = ? ORDER BY f.date', (url_key(fighter),))
+
+    def event_fights(self, event: str) -> pd.DataFrame:
+        """
+        :param event: url or id of the event
+        :return: fights of the event
+        """
+        return self.read('SELECT * FROM fights WHERE event_id = ?', (url_key(event),))
+
+    def fights_between(self, start: str, end: str) -> pd.DataFrame:
+        """
+        :param start: first date, YYYY-MM-DD
+        :param end: last date, YYYY-MM-DD
+        :return: fights of events between the dates, by date
+        """
+        return self.read('SELECT * FROM fights WHERE date BETWEEN ? AND ? ORDER BY date', (start, end))
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+from src.data_class import Links
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class WorkQueue(Links):
+    """
+    Durable work queue of shards in a sqlite file, shared by worker processes of one box or of several nodes
+    mounting the same volume. A worker claims a shard for lease_seconds and renews the lease while it works,
+    the shard of a dead worker is claimed again when its lease expires. A failed shard is claimed again after
+    a delay growing with its attempts, so an outage of the site doesn't use them up at once. Items of the shards
+    (urls of events and fighters) are unique, an item added twice is queued once.
+    """
+
+    def __post_init__(self) -> None:
+        folder = os.path.dirname(self.queue_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._lock = threading.Lock()
+        # Transactions are opened explicitly, concurrent writers wait for the lock of the file
+        self._conn = sqlite3.connect(self.queue_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS shards (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, '
+                           'items TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, lease_until REAL, '
+                           'attempts INTEGER NOT NULL DEFAULT 0, output TEXT, error TEXT, updated REAL NOT NULL)')
+        # Queues created before the retry delay of failed shards get its column
+        if 'available_at' not in [row[1] for row in self._conn.execute('PRAGMA table_info(shards)')]:
+            self._conn.execute('ALTER TABLE shards ADD COLUMN available_at REAL')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS shards_status ON shards (status, id)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS items (kind TEXT NOT NULL, key TEXT NOT NULL, '
+                           'PRIMARY KEY (kind, key))')
+
+    def transaction(self, query: Any) -> Any:
+        """
+        Run the function in a write transaction, the file is locked for other processes until it is finished.
+        :param query: function of the connection
+        :return: result of the function
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = query(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+        return result
+
+    def add(self, kind: str, items: List[List[str]], shard_size: int) -> int:
+        """
+        Queue new items in shards of shard_size items, items queued before are skipped.
+        :param kind: kind of the items, events or fighters
+        :param items: items, the last value of an item is its url
+        :param shard_size: max items in a shard
+        :return: number of new shards
+        """
+        def query(conn: sqlite3.Connection) -> int:
+            new = [item for item in items
+                   if conn.execute('INSERT OR IGNORE INTO items (kind, key) VALUES (?, ?)', (kind, item[-1])).rowcount]
+            shards = [new[start:start + shard_size] for start in range(0, len(new), shard_size)]
+            conn.executemany('INSERT INTO shards (kind, items, status, updated) VALUES (?, ?, ?, ?)',
+                             [(kind, json.dumps(shard), 'pending', time.time()) for shard in shards])
+            return len(shards)
+
+        return self.transaction(query)
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the first pending shard whose retry delay is over or a shard whose lease is expired. Shards claimed
+        max_attempts times are marked as failed.
+        :param worker: id of the worker
+        :return: id, kind, items and attempts of the shard, None if there is nothing to claim now
+        """
+        def query(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            now = time.time()
+            conn.execute("UPDATE shards SET status = 'failed', error = 'lease expired', updated = ? "
+                         "WHERE status = 'claimed' AND lease_until < ? AND attempts >= ?",
+                         (now, now, self.max_attempts))
+            row = conn.execute("SELECT id, kind, items, attempts FROM shards WHERE (status = 'pending' AND "
+                               "(available_at IS NULL OR available_at <= ?)) OR (status = 'claimed' AND "
+                               "lease_until < ?) ORDER BY id LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+
+            conn.execute("UPDATE shards SET status = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                         "updated = ? WHERE id = ?", (worker, now + self.lease_seconds, now, row[0]))
+            return {'id': row[0], 'kind': row[1], 'items': json.loads(row[2]), 'attempts': row[3] + 1}
+
+        return self.transaction(query)
+
+    def renew(self, shard_id: int, worker: str) -> bool:
+        """
+        Extend the lease of the shard.
+        :return: False if the shard is not leased by the worker anymore
+        """
+        return self.transaction(lambda conn: conn.execute(
+            "UPDATE shards SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+            (time.time() + self.lease_seconds, time.time(), shard_id, worker)).rowcount == 1)
+
+    def complete(self, shard_id: int, worker: str, output: str, skipped: Optional[List[str]] = None) -> bool:
+        """
+        Mark the shard as done.
+        :param output: path of the partial output of the shard
+        :param skipped: urls of the items missing in the output
+        :return: False if the shard is not leased by the worker anymore
+        """
+        error = json.dumps({'skipped': skipped}) if skipped else None
+        return self.transaction(lambda conn: conn.execute(
+            "UPDATE shards SET status = 'done', output = ?, error = ?, updated = ? WHERE id = ? AND worker = ? "
+            "AND status = 'claimed'", (output, error, time.time(), shard_id, worker)).rowcount == 1)
+
+    def fail(self, shard_id: int, worker: str, error: str) -> None:
+        """
+        Return the shard to the queue after the retry delay of its attempts, after max_attempts attempts it is
+        marked as failed.
+        """
+        now = time.time()
+        self.transaction(lambda conn: conn.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, "
+            "available_at = ? + MIN(? * (1 << (attempts - 1)), ?), error = ?, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'claimed'",
+            (self.max_attempts, now, self.shard_retry_delay, self.shard_retry_max_delay, error, now, shard_id,
+             worker)))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        :return: number of shards by kind and status
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, status, COUNT(*) FROM shards GROUP BY kind, status').fetchall()
+
+        stats = {}
+        for kind, status, count in rows:
+            stats.setdefault(kind, {})[status] = count
+        return stats
+
+    def unfinished(self) -> int:
+        """
+        :return: number of pending and claimed shards
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM shards "
+                                      "WHERE status IN ('pending', 'claimed')").fetchone()[0]
+
+    def skipped(self) -> Dict[str, List[str]]:
+        """
+        :return: urls of the items missing in the outputs of done shards by kind
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, error FROM shards WHERE status = 'done' AND error IS NOT NULL "
+                                      "ORDER BY id").fetchall()
+
+        skipped = {}
+        for kind, error in rows:
+            skipped.setdefault(kind, []).extend(json.loads(error)['skipped'])
+        return skipped
+
+    def outputs(self, kind: str) -> List[str]:
+        """
+        :param kind: kind of the shards
+        :return: partial outputs of done shards in the order of the shards
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT output FROM shards WHERE kind = ? "
+                                                         "AND status = 'done' ORDER BY id", (kind,))]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
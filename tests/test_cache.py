@@ -0,0 +1,91 @@
+import time
+import zlib
+from src.cache import HtmlCache
+
+
+def make_cache(tmp_path, **params) -> HtmlCache:
+    return HtmlCache(**{'cache_dir': str(tmp_path), **params})
+
+
+def test_put_and_get(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put('http://ufcstats.com/fight-details/1', '<html>fight</html>')
+
+    assert cache.get('http://ufcstats.com/fight-details/1') == '<html>fight</html>'
+    assert cache.get('http://ufcstats.com/fight-details/2') is None
+    cache.close()
+
+
+def test_pages_persist_between_instances(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put('http://ufcstats.com/fight-details/1', '<html>fight</html>')
+    cache.close()
+
+    cache = make_cache(tmp_path)
+    assert cache.get('http://ufcstats.com/fight-details/1') == '<html>fight</html>'
+    cache.close()
+
+
+def test_ttl_by_url_class(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+
+    assert cache.ttl('http://ufcstats.com/fight-details/1') is None
+    assert cache.ttl('http://ufcstats.com/event-details/1') == 7 * 24 * 60 * 60
+    assert cache.ttl('http://ufcstats.com/statistics/events/completed?page=all') == 60 * 60
+    assert cache.ttl('http://ufcstats.com/unknown') == cache.cache_ttl['default']
+    cache.close()
+
+
+def test_expired_pages_are_served_only_when_stale(tmp_path) -> None:
+    cache = make_cache(tmp_path, cache_ttl={'event-details': 60, 'default': None})
+    cache.put('http://ufcstats.com/event-details/1', 'event')
+    cache.put('http://ufcstats.com/fight-details/1', 'fight')
+
+    # Pages fetched two minutes ago
+    cache._conn.execute('UPDATE pages SET fetched = ?', (time.time() - 120,))
+
+    assert cache.get('http://ufcstats.com/event-details/1') is None
+    assert cache.get('http://ufcstats.com/event-details/1', stale=True) == 'event'
+    assert cache.get('http://ufcstats.com/fight-details/1') == 'fight'
+    cache.close()
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path) -> None:
+    pages = {f'http://ufcstats.com/fight-details/{num}': str(num) * 100 for num in range(4)}
+    size = len(zlib.compress(pages['http://ufcstats.com/fight-details/0'].encode('utf-8')))
+    cache = make_cache(tmp_path, cache_max_size=3 * size)
+
+    for num, (url, page) in enumerate(pages.items()):
+        cache.put(url, page)
+        if num == 2:
+            # The first page is read, so the second one is the least recently used
+            time.sleep(0.01)
+            cache.get('http://ufcstats.com/fight-details/0')
+        time.sleep(0.01)
+
+    assert cache.get('http://ufcstats.com/fight-details/1') is None
+    assert cache.get('http://ufcstats.com/fight-details/0') == pages['http://ufcstats.com/fight-details/0']
+    assert cache.get('http://ufcstats.com/fight-details/3') == pages['http://ufcstats.com/fight-details/3']
+    cache.close()
+
+
+def test_replaced_page_keeps_the_size(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put('http://ufcstats.com/fight-details/1', 'a' * 1000)
+    cache.put('http://ufcstats.com/fight-details/1', 'b' * 1000)
+
+    assert cache._size == len(zlib.compress(('b' * 1000).encode('utf-8')))
+    cache.close()
+
+
+def test_delete(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put('http://ufcstats.com/fight-details/1', 'a' * 1000)
+    cache.put('http://ufcstats.com/fight-details/2', 'b' * 1000)
+    cache.delete('http://ufcstats.com/fight-details/1')
+    cache.delete('http://ufcstats.com/fight-details/3')
+
+    assert cache.get('http://ufcstats.com/fight-details/1') is None
+    assert cache.get('http://ufcstats.com/fight-details/2') == 'b' * 1000
+    assert cache._size == len(zlib.compress(('b' * 1000).encode('utf-8')))
+    cache.close()
@@ -0,0 +1,73 @@
+import pytest
+import pandas as pd
+from src.career_features import CareerFeatures, fight_records
+from benchmarks.bench_features import synthetic_fights, naive_features, same_features, long_features
+
+WINDOW = 3
+URLS = ['event_fight', 'date', 'f1_url', 'f2_url']
+
+
+@pytest.fixture(scope='module')
+def events() -> pd.DataFrame:
+    return synthetic_fights(200, 40)
+
+
+def split(events: pd.DataFrame, new_events: int) -> pd.Series:
+    """
+    :return: mask of the fight records of the last events
+    """
+    last_events = events['event_url'].drop_duplicates().iloc[-new_events:]
+    return fight_records(events)['event_fight'].isin(events.loc[events['event_url'].isin(last_events),
+                                                                'event_fight'])
+
+
+def test_features_equal_the_scan_of_every_fighter(events: pd.DataFrame) -> None:
+    records = fight_records(events)
+    full = CareerFeatures(features_state_path='', features_window=WINDOW).rebuild(records)
+
+    naive = naive_features(records, records, WINDOW).set_index(['event_fight', 'corner'])
+    vectorized = long_features(full, WINDOW).set_index(['event_fight', 'corner'])
+    assert len(full) == len(events)
+    assert same_features(naive, vectorized.loc[naive.index, naive.columns])
+
+
+def test_update_equals_rebuild(events: pd.DataFrame) -> None:
+    records, new = fight_records(events), split(events, 3)
+    full = CareerFeatures(features_state_path='', features_window=WINDOW).rebuild(records)
+
+    features = CareerFeatures(features_state_path='', features_window=WINDOW)
+    features.rebuild(records[~new])
+    update = features.update(records[new])
+
+    assert len(update) == records.loc[new, 'event_fight'].nunique()
+    assert same_features(update.drop(columns=URLS), full[full['event_fight'].isin(update['event_fight'])]
+                         .drop(columns=URLS))
+
+
+def test_update_of_the_saved_state_equals_rebuild(tmp_path, events: pd.DataFrame) -> None:
+    path = str(tmp_path / 'state' / 'features_state.parquet')
+    records, new = fight_records(events), split(events, 3)
+    full = CareerFeatures(features_state_path='', features_window=WINDOW).rebuild(records)
+
+    features = CareerFeatures(features_state_path=path, features_window=WINDOW)
+    assert features.state is None
+    features.rebuild(records[~new])
+    features.save()
+
+    # As an incremental run, the state is read back from the file
+    features = CareerFeatures(features_state_path=path, features_window=WINDOW)
+    update = features.update(records[new])
+    assert same_features(update.drop(columns=URLS), full[full['event_fight'].isin(update['event_fight'])]
+                         .drop(columns=URLS))
+    assert update[['f1_url', 'f2_url']].equals(full.loc[full['event_fight'].isin(update['event_fight']),
+                                                        ['f1_url', 'f2_url']].reset_index(drop=True))
+
+
+def test_fights_already_in_the_state_are_skipped(events: pd.DataFrame) -> None:
+    records = fight_records(events)
+    features = CareerFeatures(features_state_path='', features_window=WINDOW)
+    features.rebuild(records)
+    state = features.state.copy()
+
+    assert features.update(records).empty
+    pd.testing.assert_frame_equal(features.state, state)
@@ -0,0 +1,80 @@
+import os
+import pandas as pd
+import pytest
+from src.checkpoint import Checkpoint
+from src.crawl_graph import CrawlGraph
+from src.event_parser import EventsParser
+from src.schemas import dataset_schema
+from utils.writers import get_writer
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+
+@pytest.fixture(scope='module')
+def fetcher() -> FixtureFetcher:
+    fetcher = FixtureFetcher(use_cache=False)
+    yield fetcher
+    fetcher.close()
+
+
+def events_parser(fetcher: FixtureFetcher) -> EventsParser:
+    parser = EventsParser(parse_workers=0, chunk_size=3)
+    parser.fetcher = fetcher
+    return parser
+
+
+def test_checkpoint_survives_a_torn_line(tmp_path) -> None:
+    path = str(tmp_path / 'data' / 'checkpoint.log')
+    checkpoint = Checkpoint(checkpoint_path=path)
+    checkpoint.mark('fights', ['url1', 'url2'])
+    checkpoint.mark('fights', ['url2'])
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('fights\turl3')
+
+    checkpoint = Checkpoint(checkpoint_path=path)
+    assert checkpoint.sections == {'fights': {'url1', 'url2'}}
+    assert checkpoint.done('fights', 'url1') and not checkpoint.done('fights', 'url3')
+
+    checkpoint.clear()
+    assert not os.path.exists(path) and not Checkpoint(checkpoint_path=path).sections
+
+
+def test_resume_after_a_kill_between_a_write_and_its_checkpoint(tmp_path, fetcher: FixtureFetcher) -> None:
+    parser, path = events_parser(fetcher), str(tmp_path / 'events.parquet')
+    schema, checkpoint_path = dataset_schema('events', parser), str(tmp_path / 'checkpoint.log')
+    graph = CrawlGraph()
+    graph.fetcher = fetcher
+    graph.build()
+
+    # The run is killed after its second part is written, before the fights of the part are checkpointed
+    checkpoint = Checkpoint(checkpoint_path=checkpoint_path)
+    writer = get_writer(path, schema, resumable=True, key='event_fight')
+    chunks = parser.iter_event_data(graph=graph, checkpoint=checkpoint)
+    for _ in range(2):
+        writer.write(next(chunks))
+    chunks.close()
+    assert len(Checkpoint(checkpoint_path=checkpoint_path).sections['fights']) == 3
+
+    checkpoint = Checkpoint(checkpoint_path=checkpoint_path)
+    with get_writer(path, schema, resumable=True, resume=True, key='event_fight') as writer:
+        for chunk in parser.iter_event_data(graph=graph, checkpoint=checkpoint):
+            writer.write(chunk)
+
+    data = pd.read_parquet(path)
+    fights = [fight for event in graph.events for fight in graph.fights[event[1]]]
+    assert not data['event_fight'].duplicated().any()
+    assert set(data['event_fight']) == set(fights) - {'http://ufcstats.com/fight-details/79d1b233a5c07ecf'}
+    assert not os.path.exists(path + '.parts')
+
+
+def test_failed_run_keeps_its_parts(tmp_path) -> None:
+    path = str(tmp_path / 'fighter.parquet')
+    schema = dataset_schema('fighter', EventsParser())
+    with pytest.raises(RuntimeError):
+        with get_writer(path, schema, resumable=True, key='Link') as writer:
+            writer.write(pd.DataFrame({'Fullname': ['A'], 'Link': ['link1']}))
+            raise RuntimeError
+
+    assert len(os.listdir(path + '.parts')) == 1
+    with get_writer(path, schema, resumable=True, resume=True, key='Link') as writer:
+        writer.write(pd.DataFrame({'Fullname': ['A', 'B'], 'Link': ['link1', 'link2']}))
+    assert pd.read_parquet(path)['Link'].tolist() == ['link1', 'link2']
@@ -0,0 +1,50 @@
+from bs4 import BeautifulSoup
+from typing import List, Tuple
+from src.crawl_graph import CrawlGraph
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+URL = 'http://ufcstats.com/{}-details/{}'
+
+
+def event_page(fights: List[Tuple[str, List[Tuple[str, str]]]]) -> BeautifulSoup:
+    """
+    :param fights: links of the fights with names and links of their fighters
+    :return: soup of the event page in the markup of the site
+    """
+    rows = []
+    for fight, fighters in fights:
+        links = ''.join(f'<a href="{link}" class="b-link b-link_style_black">{name}</a>' for name, link in fighters)
+        rows.append(f'<tr class="b-fight-details__table-row b-fight-details__table-row__hover '
+                    f'js-fight-details-click" data-link="{fight}"><td>{links}</td></tr>')
+    # Links of the same style without href are not fighters
+    return BeautifulSoup(f'<table><tbody>{"".join(rows)}</tbody></table>'
+                         f'<a class="b-link b-link_style_black">View</a>', 'lxml')
+
+
+def test_namesakes_are_kept_apart_by_their_links() -> None:
+    events, fights = [URL.format('event', num) for num in range(3)], [URL.format('fight', num) for num in range(3)]
+    fighters = [URL.format('fighter', num) for num in range(4)]
+    graph = CrawlGraph()
+    graph.add_event(events[0], event_page([(fights[0], [('Michael McDonald', fighters[0]), ('Jon Jones', fighters[1])]),
+                                           (fights[1], [('Michael McDonald', fighters[2]),
+                                                        ('Max Holloway', fighters[3])])]))
+    graph.add_event(events[1], event_page([(fights[2], [('Michael McDonald', fighters[0]),
+                                                        ('Max Holloway', fighters[3])])]))
+
+    assert graph.fights[events[0]] == fights[:2]
+    assert graph.fighters[events[0]] == {fighters[0]: 'Michael McDonald', fighters[1]: 'Jon Jones',
+                                         fighters[2]: 'Michael McDonald', fighters[3]: 'Max Holloway'}
+
+    # A fighter of several events is listed once, events not in the graph have no fighters
+    assert sorted(graph.fighters_of(events)) == fighters
+
+
+def test_build_from_the_fixture_pages() -> None:
+    graph = CrawlGraph()
+    graph.fetcher = FixtureFetcher(use_cache=False)
+    graph.build(events=[('November 12, 1993', 'http://ufcstats.com/event-details/missing')] + graph.get_events())
+
+    assert len(graph.events) == 5 and [len(graph.fights[link]) for _, link in graph.events[1:]] == [4, 4, 4, 1]
+    # The event page failed to download is not in the graph
+    assert 'http://ufcstats.com/event-details/missing' not in graph.fights
+    assert len(graph.fighters_of([link for _, link in graph.events])) == 13
@@ -0,0 +1,145 @@
+import os
+import json
+import threading
+import pytest
+import requests
+from typing import Iterator, List
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.fetcher import Fetcher
+from src.cache import CacheMissError
+from src.crawl_graph import CrawlGraph
+from src.event_parser import EventsParser
+
+FIXTURES_DIR = os.path.join('benchmarks', 'fixtures')
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local stand-in of the site, serves the fixture pages by the path of their url and counts the requests.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        with open(os.path.join(FIXTURES_DIR, 'index.json'), 'r', encoding='utf-8') as file:
+            self.files = {urlsplit(url).path: name for url, name in json.load(file).items()}
+        self.requests = 0
+
+    def url(self, path: str) -> str:
+        return f'http://127.0.0.1:{self.server_port}{path}'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        if self.path not in self.server.files:
+            self.send_error(404)
+            return
+
+        with open(os.path.join(FIXTURES_DIR, self.server.files[self.path]), 'rb') as file:
+            body = file.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[FixtureServer]:
+    # Requests to the local server must not go through a proxy of the environment
+    for name in ['http_proxy', 'HTTP_PROXY', 'https_proxy', 'HTTPS_PROXY', 'all_proxy', 'ALL_PROXY']:
+        monkeypatch.delenv(name, raising=False)
+
+    fixture_server = FixtureServer()
+    thread = threading.Thread(target=fixture_server.serve_forever, daemon=True)
+    thread.start()
+    yield fixture_server
+    fixture_server.shutdown()
+    fixture_server.server_close()
+
+
+@pytest.fixture
+def urls(server: FixtureServer) -> List[str]:
+    return [server.url(path) for path in sorted(server.files)]
+
+
+def make_fetcher(tmp_path, **params) -> Fetcher:
+    return Fetcher(**{'cache_dir': str(tmp_path / 'cache'), 'max_workers': 4, 'retry_base_delay': 0.0, **params})
+
+
+def test_fetch_matches_direct_download(tmp_path, urls: List[str]) -> None:
+    with make_fetcher(tmp_path) as fetcher:
+        for url in urls:
+            assert fetcher.fetch(url) == requests.get(url).text
+
+
+def test_fetch_many_keeps_order_and_returns_none_for_failed_pages(tmp_path, server: FixtureServer,
+                                                                  urls: List[str]) -> None:
+    missing = server.url('/fight-details/missing')
+    with make_fetcher(tmp_path, use_cache=False) as fetcher:
+        pages = fetcher.fetch_many(urls + [missing])
+
+    assert pages == [requests.get(url).text for url in urls] + [None]
+    # Not found pages are not retried
+    assert server.requests == 2 * len(urls) + 1
+
+
+def test_cached_pages_are_not_downloaded_again(tmp_path, server: FixtureServer, urls: List[str]) -> None:
+    with make_fetcher(tmp_path) as fetcher:
+        downloaded = fetcher.fetch_many(urls)
+    with make_fetcher(tmp_path) as fetcher:
+        cached = [fetcher.get(url) for url in urls]
+
+    assert server.requests == len(urls)
+    assert cached == [(page, 'cache') for page in downloaded]
+
+
+def test_no_cache_downloads_every_time(tmp_path, server: FixtureServer, urls: List[str]) -> None:
+    with make_fetcher(tmp_path, use_cache=False) as fetcher:
+        fetcher.fetch(urls[0])
+        assert fetcher.get(urls[0])[1] == 'network'
+
+    assert server.requests == 2
+
+
+def test_offline_serves_expired_pages_and_raises_on_missing_ones(tmp_path, server: FixtureServer,
+                                                                 urls: List[str]) -> None:
+    with make_fetcher(tmp_path) as fetcher:
+        page = fetcher.fetch(urls[0])
+
+    # Every page is expired, offline mode still serves it from the cache
+    with make_fetcher(tmp_path, offline=True, cache_ttl={'default': 0}) as fetcher:
+        assert fetcher.fetch(urls[0]) == page
+        with pytest.raises(CacheMissError):
+            fetcher.fetch(urls[1])
+        assert fetcher.fetch_many(urls[:2]) == [page, None]
+
+    assert server.requests == 1
+
+
+def test_expired_pages_are_downloaded_again(tmp_path, server: FixtureServer, urls: List[str]) -> None:
+    with make_fetcher(tmp_path, cache_ttl={'default': 0}) as fetcher:
+        fetcher.fetch(urls[0])
+        assert fetcher.get(urls[0])[1] == 'network'
+
+    assert server.requests == 2
+
+
+def test_unparsed_fight_page_is_downloaded_again(tmp_path, server: FixtureServer) -> None:
+    # The page of the fight without stats tables can't be parsed
+    parsed, unparsed = server.url('/fight-details/3458a748e9bb17bc'), server.url('/fight-details/79d1b233a5c07ecf')
+    graph = CrawlGraph()
+    graph.events, graph.fights = [('June 01, 2024', server.url('/event'))], {server.url('/event'): [unparsed, parsed]}
+
+    with make_fetcher(tmp_path) as fetcher:
+        parser = EventsParser(parse_workers=0)
+        parser.fetcher = fetcher
+        assert [fight['event_fight'] for fight in parser.iter_fights(graph=graph)] == [parsed]
+
+        assert fetcher.get(parsed)[1] == 'cache'
+        assert fetcher.get(unparsed)[1] == 'network'
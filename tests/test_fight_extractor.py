@@ -0,0 +1,34 @@
+import os
+import glob
+import pytest
+from bs4 import BeautifulSoup
+from typing import Any, Callable
+from src.event_parser import EventsParser
+from benchmarks.bench_extractor import LegacyEventsParser
+
+FIXTURES = sorted(glob.glob(os.path.join('benchmarks', 'fixtures', 'fight-details-*.html')))
+
+
+def outcome(func: Callable[[], Any]) -> Any:
+    """
+    :return: result of the function or the type of its error, pages without stats tables are not parsed
+    """
+    try:
+        return func()
+    except (AttributeError, IndexError, KeyError, ValueError) as error:
+        return type(error)
+
+
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+def test_extractor_matches_legacy_parser(path: str, backend: str) -> None:
+    with open(path, 'r', encoding='utf-8') as file:
+        page = file.read()
+
+    reference = outcome(lambda: LegacyEventsParser().get_event_info({}, BeautifulSoup(page, 'lxml')))
+    result = outcome(lambda: EventsParser(extract_backend=backend).get_event_info({}, '', page))
+    assert result == reference
+
+
+def test_fixtures_have_fights() -> None:
+    assert FIXTURES
@@ -0,0 +1,62 @@
+import os
+import sys
+import subprocess
+import pandas as pd
+import pytest
+from src.manifest import Manifest
+from src.fighter_parser import FighterParser
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+
+@pytest.fixture(scope='module')
+def fetcher() -> FixtureFetcher:
+    fetcher = FixtureFetcher(use_cache=False)
+    yield fetcher
+    fetcher.close()
+
+
+def fighter_parser(fetcher: FixtureFetcher, **params) -> FighterParser:
+    parser = FighterParser(parse_workers=0, fighters_discovery='index', **params)
+    parser.fetcher = fetcher
+    return parser
+
+
+def test_listing_agrees_with_the_profiles(fetcher: FixtureFetcher) -> None:
+    parser = fighter_parser(fetcher)
+    rows = parser.get_fighters_index()
+    profiles = FighterParser.prepare_data(pd.DataFrame(parser.iter_profiles([(row['Fullname'], row['Link'])
+                                                                            for row in rows])))
+    listing = FighterParser.prepare_data(pd.DataFrame(rows, columns=FighterParser.listing_columns))
+
+    # Every fighter of the fixtures is listed once, the empty first rows of the pages are skipped
+    assert len(rows) == len({row['Link'] for row in rows}) == len(profiles) == 13
+    listing, profiles = listing.set_index('Link'), profiles.set_index('Link').loc[listing['Link']]
+    columns = ['Fullname', 'Height', 'Weight', 'Reach', 'Stance']
+    pd.testing.assert_frame_equal(listing[columns], profiles[columns])
+
+    # W/L/D of the listing is the whole professional record, the profile counts only the fights on the site
+    record = ['Win', 'Loss', 'Draw']
+    assert (listing[record] >= profiles[record]).all().all()
+    assert (listing[record] != profiles[record]).any().any()
+    assert listing[['Age', 'SLpM', 'Str.Acc.%']].isna().all().all()
+
+
+def test_listing_without_profiles(fetcher: FixtureFetcher, tmp_path) -> None:
+    manifest = Manifest(manifest_path=str(tmp_path / 'manifest.json'))
+    parser = fighter_parser(fetcher, fetch_profiles=False)
+    requests = fetcher.requests
+    fighters = parser.get_fighters_params(manifest)
+
+    # Only the listing pages are downloaded
+    assert fetcher.requests - requests == 26
+    assert list(fighters.columns) == FighterParser.listing_columns and len(fighters) == 13
+
+    # Unchanged listing rows are skipped by the next run
+    assert parser.get_fighters_index(manifest) == []
+
+
+def test_no_profiles_needs_the_index_discovery(tmp_path) -> None:
+    # Offline run in an empty folder, a parser accepting the flags would not reach the site
+    result = subprocess.run([sys.executable, os.path.abspath('main.py'), '--no-profiles', '--offline'],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 2 and '--fighters-discovery index' in result.stderr
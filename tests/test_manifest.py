@@ -0,0 +1,62 @@
+import requests
+import pandas as pd
+from typing import Tuple
+from dataclasses import dataclass
+from src.manifest import Manifest
+from src.crawl_graph import CrawlGraph
+from src.event_parser import EventsParser
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+# Fight of the oldest event, its page has no stats tables and is never parsed
+OLD_FIGHT = 'http://ufcstats.com/fight-details/79d1b233a5c07ecf'
+
+
+@dataclass
+class FlakyFetcher(FixtureFetcher):
+    """
+    Fixture fetch engine failing to download the pages of the down urls.
+    """
+    down: Tuple[str, ...] = ()
+
+    def get(self, url: str) -> Tuple[str, str]:
+        if url in self.down:
+            raise requests.HTTPError(f'503 Server Error: Service Unavailable for url: {url}')
+        return super().get(url)
+
+
+def parse(fetcher: FixtureFetcher, manifest: Manifest) -> Tuple[CrawlGraph, pd.DataFrame]:
+    """
+    :return: graph of the run and the parsed fights
+    """
+    parser, graph = EventsParser(parse_workers=0), CrawlGraph()
+    parser.fetcher = graph.fetcher = fetcher
+    graph.build(manifest)
+    return graph, pd.concat(list(parser.iter_event_data(manifest, graph)), ignore_index=True)
+
+
+def test_event_is_seen_after_all_its_fights_are_parsed(tmp_path) -> None:
+    path = str(tmp_path / 'data' / 'manifest.json')
+    fetcher = FlakyFetcher(use_cache=False)
+    graph = CrawlGraph()
+    graph.fetcher = fetcher
+    event = graph.build().events[0][1]
+    failed = graph.fights[event][1]
+
+    # A fight of the first event is not downloaded
+    fetcher.down = (failed,)
+    manifest = Manifest(manifest_path=path)
+    graph, data = parse(fetcher, manifest)
+    fights = [fight for _, link in graph.events for fight in graph.fights[link]]
+    assert set(data['event_fight']) == set(fights) - {failed, OLD_FIGHT}
+    assert manifest.sections['fights'] == set(fights) - {failed, OLD_FIGHT}
+    assert manifest.sections['events'] == {link for _, link in graph.events[1:-1]}
+    manifest.save()
+
+    # The next run parses only the fights not ingested yet, the event is seen when its last fight is parsed
+    fetcher.down = ()
+    manifest = Manifest(manifest_path=path)
+    assert manifest.seen('fights', fights[0]) and not manifest.seen('events', event)
+    _, data = parse(fetcher, manifest)
+    assert data['event_fight'].tolist() == [failed]
+    assert manifest.seen('events', event) and not manifest.seen('fights', OLD_FIGHT)
+    assert manifest.sections['events'] == {link for _, link in graph.events[:-1]}
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.normalize import prepare_events, prepare_fighters, reach_cm
+from benchmarks.bench_normalize import legacy_prepare_events, legacy_prepare_fighters, synthetic_raw_events, \
+    synthetic_raw_fighters
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_prepare_fighters_matches_legacy(seed: int) -> None:
+    data = synthetic_raw_fighters(2000, seed)
+    pd.testing.assert_frame_equal(prepare_fighters(data.copy()), legacy_prepare_fighters(data.copy()))
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_prepare_events_matches_legacy(seed: int) -> None:
+    data = synthetic_raw_events(500, seed)
+    pd.testing.assert_frame_equal(prepare_events(data.copy()), legacy_prepare_events(data.copy()))
+
+
+def test_reach_reads_decimal_inches_of_the_listing() -> None:
+    # Deliberate change of the fighters index discovery: the listing shows decimal inches, the legacy
+    # conversion read only the whole inches of the profiles
+    listing = pd.DataFrame({'Height': ['6\'0"'], 'Weight': ['170lbs.'], 'Reach': ['72.5"'], 'DOB': [np.nan],
+                            'Str.Acc.': [np.nan], 'Str.Def': [np.nan], 'TDAcc.': [np.nan], 'TDDef.': [np.nan]})
+    with pytest.raises(ValueError, match="72.5"):
+        legacy_prepare_fighters(listing.copy())
+
+    assert reach_cm(pd.Series(['72.5"', '72.0"', '72"'])).tolist() == [184.2, 182.9, 182.9]
+    assert prepare_fighters(listing.copy())['Reach'].dtype == np.float64
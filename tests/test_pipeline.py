@@ -0,0 +1,88 @@
+import time
+import threading
+import pytest
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+from src.pipeline import Pipeline
+from src.event_parser import EventsParser
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+
+@dataclass
+class HeldFetcher(FixtureFetcher):
+    """
+    Fixture fetch engine whose held page is downloaded only when it is released, the started downloads are recorded.
+    """
+    held: str = ''
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.released, self.started = threading.Event(), []
+
+    def get(self, url: str) -> Tuple[str, str]:
+        self.started.append(url)
+        if url == self.held:
+            self.released.wait(10)
+        return super().get(url)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pool() -> None:
+    yield
+    Pipeline.close_pool()
+
+
+def fight_tasks(fetcher: FixtureFetcher) -> List[Tuple[Tuple[str, str, str], str]]:
+    """
+    :return: tasks of every fight page of the fixtures, the old fight without stats tables is not parsed
+    """
+    fights = [url for url in fetcher.index if '/fight-details/' in url]
+    return [(('March 02, 2024', 'http://ufcstats.com/event-details/0', url), url) for url in fights]
+
+
+def run(parser: EventsParser, tasks: List[Tuple[Any, str]]) -> List[Tuple[int, Any]]:
+    return list(Pipeline(**parser.config()).run(parser, 'parse_fight', tasks))
+
+
+@pytest.mark.parametrize('parse_workers', [1, 2])
+def test_workers_give_the_records_of_the_main_process(parse_workers: int) -> None:
+    # Concurrent downloads with latency finish out of order
+    fetcher = FixtureFetcher(use_cache=False, latency=0.01)
+    tasks = fight_tasks(fetcher)
+    serial = EventsParser(parse_workers=0, max_workers=8)
+    parallel = EventsParser(parse_workers=parse_workers, max_workers=8)
+    serial.fetcher = parallel.fetcher = fetcher
+
+    expected = run(serial, tasks)
+    assert [num for num, _ in expected] == list(range(len(tasks)))
+    assert sum(record is None for _, record in expected) == 1
+    assert run(parallel, tasks) == expected
+    # Parse metrics of the workers are collected by the parser, with the fight failed to parse
+    metrics = parallel.metrics.pop()
+    assert sum(metrics['histograms'][('parse_seconds', (('page_type', 'fight'),))][0]) == len(tasks)
+    assert len(metrics['failed']) == 1
+
+
+def test_slow_page_holds_back_only_the_reorder_window() -> None:
+    fetcher = HeldFetcher(use_cache=False)
+    tasks = fight_tasks(fetcher)
+    fetcher.held = tasks[0][1]
+    parser = EventsParser(parse_workers=0, max_workers=8, reorder_window=4)
+    parser.fetcher = fetcher
+
+    records = []
+    thread = threading.Thread(target=lambda: records.extend(run(parser, tasks)))
+    thread.start()
+    time.sleep(0.5)
+
+    # Tasks behind the window of the held first page are not started and nothing is yielded out of order
+    assert len(fetcher.started) == 4 and not records
+    fetcher.released.set()
+    thread.join(10)
+    assert [num for num, _ in records] == list(range(len(tasks)))
+    assert len(fetcher.started) == len(tasks)
+
+
+def test_chunks() -> None:
+    assert list(Pipeline.chunks(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(Pipeline.chunks(iter([]), 3)) == []
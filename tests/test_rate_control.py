@@ -0,0 +1,185 @@
+import time
+import threading
+import pytest
+import requests
+from email.utils import formatdate
+from src.fetcher import Fetcher
+from src.rate_control import RateController, CircuitOpenError, HostDownError, EmptyPageError
+
+URL = 'http://ufcstats.com/fight-details/1'
+
+
+def response(status: int, retry_after: str = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    if retry_after is not None:
+        r.headers['Retry-After'] = retry_after
+    return r
+
+
+def fail(rate: RateController, outcome: str = 'error', retry_after: float = None) -> str:
+    rate.acquire(URL)
+    return rate.release(URL, 0.1, outcome, retry_after)
+
+
+def test_breaker_opens_after_threshold_failures() -> None:
+    rate = RateController(breaker_threshold=3, breaker_cooldown=60.0)
+
+    assert [fail(rate) for _ in range(3)] == [None, None, 'circuit_open']
+    with pytest.raises(CircuitOpenError) as error:
+        rate.acquire(URL)
+    assert not isinstance(error.value, HostDownError)
+    assert rate.retryable(error.value)
+
+
+def test_success_resets_failures() -> None:
+    rate = RateController(breaker_threshold=3, breaker_cooldown=60.0)
+    fail(rate), fail(rate)
+    rate.acquire(URL)
+    rate.release(URL, 0.1, 'ok')
+
+    assert [fail(rate) for _ in range(2)] == [None, None]
+    rate.acquire(URL)
+
+
+def test_probe_after_cooldown_closes_or_reopens_the_circuit() -> None:
+    rate = RateController(breaker_threshold=2, breaker_cooldown=0.05)
+    fail(rate), fail(rate)
+    time.sleep(0.06)
+
+    # Failed probe opens the circuit again at once
+    assert fail(rate) == 'circuit_open'
+    with pytest.raises(CircuitOpenError):
+        rate.acquire(URL)
+
+    time.sleep(0.06)
+    rate.acquire(URL)
+    assert rate.limit('ufcstats.com') == 1.0
+    rate.release(URL, 0.1, 'ok')
+    assert rate.hosts['ufcstats.com'].trips == 0
+    rate.acquire(URL)
+
+
+def test_host_is_down_after_breaker_trips() -> None:
+    rate = RateController(breaker_threshold=1, breaker_cooldown=0.05, breaker_trips=2)
+    assert fail(rate) == 'circuit_open'
+    time.sleep(0.06)
+    assert fail(rate) == 'circuit_open'
+
+    with pytest.raises(HostDownError) as error:
+        rate.acquire(URL)
+    assert not rate.retryable(error.value)
+
+
+@pytest.mark.parametrize('tokens', [True, False])
+def test_concurrent_failures_open_the_circuit_once(tokens: bool) -> None:
+    rate = RateController(max_workers=16, initial_concurrency=16, breaker_threshold=8, breaker_trips=3,
+                          breaker_cooldown=60.0)
+    admitted = [rate.acquire(URL) for _ in range(12)]
+    events = [rate.release(URL, 0.1, 'error', admitted=token if tokens else None) for token in admitted]
+
+    assert events.count('circuit_open') == 1
+    assert rate.hosts['ufcstats.com'].trips == 1
+    with pytest.raises(CircuitOpenError) as error:
+        rate.acquire(URL)
+    assert not isinstance(error.value, HostDownError)
+
+
+def test_requests_sent_before_the_opening_are_not_probes() -> None:
+    rate = RateController(max_workers=4, initial_concurrency=4, breaker_threshold=1, breaker_cooldown=0.05)
+    stale, failed = rate.acquire(URL), rate.acquire(URL)
+    assert rate.release(URL, 0.1, 'error', admitted=failed) == 'circuit_open'
+    time.sleep(0.06)
+
+    # The probe waits for the slot of the old request, whose failure doesn't decide the probe
+    probe = []
+    thread = threading.Thread(target=lambda: probe.append(rate.acquire(URL)))
+    thread.start()
+    time.sleep(0.05)
+    assert rate.hosts['ufcstats.com'].half_open
+    assert rate.release(URL, 0.1, 'error', admitted=stale) is None
+    thread.join(timeout=5)
+    rate.release(URL, 0.1, 'ok', admitted=probe[0])
+    assert rate.hosts['ufcstats.com'].trips == 0
+    rate.acquire(URL)
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (requests.Timeout(), True), (requests.ConnectionError(), True), (EmptyPageError(), True),
+    (requests.HTTPError(response=response(503)), True), (requests.HTTPError(response=response(429)), True),
+    (requests.HTTPError(response=response(404)), False), (requests.HTTPError(), False),
+    (HostDownError(), False), (CircuitOpenError(), True)])
+def test_retryable(error: requests.RequestException, retryable: bool) -> None:
+    assert RateController().retryable(error) == retryable
+
+
+@pytest.mark.parametrize('value, seconds', [('5', 5.0), ('-3', 0.0), ('soon', None), ('', None)])
+def test_retry_after_seconds(value: str, seconds: float) -> None:
+    assert RateController.retry_after(response(429, value)) == seconds
+
+
+def test_retry_after_date() -> None:
+    seconds = RateController.retry_after(response(503, formatdate(time.time() + 120, usegmt=True)))
+    assert 110 < seconds <= 120
+
+
+def test_retry_delay_respects_retry_after_and_max_delay() -> None:
+    rate = RateController(retry_base_delay=0.5, retry_max_delay=60.0)
+
+    assert rate.retry_delay(URL, 0, requests.HTTPError(response=response(429, '10'))) >= 10.0
+    assert rate.retry_delay(URL, 0, requests.HTTPError(response=response(429, '3600'))) == 60.0
+    assert all(rate.retry_delay(URL, 3, requests.Timeout()) <= 4.0 for _ in range(100))
+
+
+def test_retry_delay_waits_for_the_end_of_the_cooldown() -> None:
+    rate = RateController(breaker_threshold=1, breaker_cooldown=30.0, retry_base_delay=0.01)
+    fail(rate)
+
+    assert rate.retry_delay(URL, 0, CircuitOpenError()) > 29.0
+
+
+def test_retry_after_pauses_the_host() -> None:
+    rate = RateController()
+    fail(rate, 'throttled', retry_after=0.2)
+
+    start = time.monotonic()
+    rate.acquire(URL)
+    assert time.monotonic() - start >= 0.15
+
+
+def test_limit_grows_on_success_and_is_cut_by_throttling() -> None:
+    rate = RateController(initial_concurrency=2, max_workers=16, backoff_factor=0.5)
+    for _ in range(4):
+        rate.acquire(URL)
+        rate.release(URL, 0.1, 'ok')
+    assert rate.limit('ufcstats.com') == 6.0
+
+    assert fail(rate, 'throttled') == 'decrease'
+    assert rate.limit('ufcstats.com') == 3.0
+
+
+class FailingFetcher(Fetcher):
+    """
+    Fetcher whose every request fails with the given error.
+    """
+
+    def request(self, url: str) -> str:
+        self.requests += 1
+        raise self.error
+
+
+@pytest.mark.parametrize('error, requests_made', [(HostDownError(), 1), (CircuitOpenError(), 3),
+                                                  (requests.HTTPError(response=response(404)), 1),
+                                                  (requests.HTTPError(response=response(503)), 3)])
+def test_fetcher_retries(tmp_path, monkeypatch: pytest.MonkeyPatch, error: requests.RequestException,
+                         requests_made: int) -> None:
+    delays = []
+    monkeypatch.setattr(time, 'sleep', delays.append)
+    fetcher = FailingFetcher(use_cache=False, max_retries=2, max_workers=1, cache_dir=str(tmp_path))
+    fetcher.requests, fetcher.error = 0, error
+
+    with pytest.raises(type(error)):
+        fetcher.download(URL)
+    assert fetcher.requests == requests_made
+    assert len(delays) == requests_made - 1
+    fetcher.close()
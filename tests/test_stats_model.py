@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.event_parser import EventsParser
+from src.stats_model import normalize_events, typed_columns, typed_stats
+from benchmarks.fixture_fetcher import FixtureFetcher
+
+
+@pytest.fixture(scope='module')
+def parser() -> EventsParser:
+    parser = EventsParser(parse_workers=0)
+    parser.fetcher = FixtureFetcher(use_cache=False)
+    yield parser
+    parser.fetcher.close()
+
+
+@pytest.fixture(scope='module')
+def events(parser: EventsParser) -> pd.DataFrame:
+    return pd.concat(list(parser.iter_event_data()), ignore_index=True)
+
+
+def test_typed_stats() -> None:
+    raw = pd.DataFrame({'sig_str': ['12 of 30', '--', np.nan], 'sig_str%': ['40%', '---', np.nan],
+                        'ctrl': ['1:23', '0:00', np.nan], 'kd': ['2', '0', np.nan]})
+    typed = typed_stats(raw)
+
+    assert [(column, str(dtype)) for column, dtype in typed.dtypes.items()] == typed_columns(list(raw.columns))
+    assert typed.iloc[0].tolist() == [12, 30, 40.0, 83, 2]
+    assert typed['sig_str_landed'].isna().tolist() == [False, True, True]
+    assert typed['ctrl_sec'].tolist()[1] == 0 and typed['sig_str_pct'].isna().tolist() == [False, True, True]
+
+
+def test_fights_have_typed_stats(parser: EventsParser, events: pd.DataFrame) -> None:
+    fights = normalize_events(events, parser)['fights']
+    stats = [name for name, _ in parser.totals_cols] + [name for name, _ in parser.strikes_cols]
+
+    assert len(fights) == len(events) and fights['round'].dtype == 'Int8'
+    assert not any(column.startswith('f1_rnd') for column in fights.columns)
+    for fg_num in (1, 2):
+        for column, dtype in typed_columns(stats):
+            assert fights[f'f{fg_num}_{column}'].dtype == dtype
+    assert all(fights[f'f1_land_trg_{chart}'].dtype == 'Int16' for chart in parser.charts_cols)
+
+    # Stats missing on the page are <NA>, not zeros
+    assert fights['f1_sig_str_pct'].isna().any() and fights['f1_sig_str_landed'].notna().all()
+
+
+def test_rounds_have_no_padding(parser: EventsParser, events: pd.DataFrame) -> None:
+    tables = normalize_events(events, parser)
+    fights, rounds = tables['fights'].set_index('event_fight'), tables['rounds']
+
+    # Every fighter has a row per round fought, padded rounds after the end of the fight are dropped
+    assert len(rounds) == 2 * fights['round'].sum()
+    last = rounds.groupby(['event_fight', 'fighter'])['round'].agg(['count', 'max'])
+    assert (last['count'] == last['max']).all()
+    assert (last['max'] == fights.loc[last.index.get_level_values(0), 'round'].to_numpy()).all()
+    assert rounds[['event_fight', 'fighter', 'round']].equals(
+        rounds[['event_fight', 'fighter', 'round']].sort_values(['event_fight', 'fighter', 'round']))
+    assert rounds['fighter'].dtype == rounds['round'].dtype == 'int8'
+    assert rounds['sig_str_landed'].dtype == 'Int16' and rounds['sig_str_landed'].notna().all()
+
+
+def test_empty_events(parser: EventsParser) -> None:
+    tables = normalize_events(pd.DataFrame(), parser)
+    assert tables['fights'].empty and tables['rounds'].empty
@@ -0,0 +1,98 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from src.store import Store, url_key
+from benchmarks.bench_store import synthetic_history
+
+
+@pytest.fixture
+def history() -> dict:
+    return synthetic_history(36, 10, per_event=12)
+
+
+@pytest.fixture
+def store(tmp_path) -> Store:
+    store = Store(store_path=str(tmp_path / 'data' / 'ufc.sqlite'))
+    yield store
+    store.close()
+
+
+def count(store: Store, table: str, where: str = '1', params: tuple = ()) -> int:
+    return int(store.read(f'SELECT COUNT(*) AS n FROM {table} WHERE {where}', params)['n'][0])
+
+
+def test_upsert_fighters_updates_rows_in_place(store: Store, history: dict) -> None:
+    fighters = history['fighter']
+    store.upsert_fighters(fighters)
+    fighters = fighters.assign(Win=fighters['Win'] + 1)
+    store.upsert_fighters(fighters.iloc[:3])
+
+    assert count(store, 'fighters') == len(fighters)
+    assert store.fighter(fighters['Link'][0])['win'][0] == fighters['Win'][0]
+    assert store.fighter(fighters['Link'][5])['win'][0] == fighters['Win'][5] - 1
+
+
+def test_upsert_events_fills_every_table(store: Store, history: dict) -> None:
+    events = history['events']
+    store.upsert_events(events)
+    store.upsert_events(events)
+
+    rounds = events['round'].astype(int)
+    assert count(store, 'events') == 3
+    assert count(store, 'fights') == len(events)
+    assert count(store, 'fight_stats') == 2 * len(events)
+    assert count(store, 'round_stats') == 2 * rounds.sum()
+
+
+def test_corrected_fight_loses_its_later_rounds(store: Store, history: dict) -> None:
+    events = history['events']
+    fight = events.index[events['round'].astype(int) >= 3][0]
+    store.upsert_events(events)
+
+    # The fight is corrected to end in the first round, later rounds are padded
+    corrected = events.loc[[fight]].copy()
+    corrected['round'] = '1'
+    for rnd in range(2, store.num_rounds + 1):
+        corrected[[name for name in corrected.columns if f'_rnd{rnd}_' in name]] = np.nan
+    store.upsert_events(corrected)
+
+    fight_id = url_key(events['event_fight'][fight])
+    assert count(store, 'round_stats', 'fight_id = ?', (fight_id,)) == 2
+    assert store.read('SELECT round FROM fights WHERE fight_id = ?', (fight_id,))['round'][0] == 1
+    assert count(store, 'fights') == len(events)
+
+
+def test_fighter_fights(store: Store, history: dict) -> None:
+    events = history['events']
+    store.upsert_events(events)
+    fighter = events['f1_url'][0]
+
+    fights = store.fighter_fights(fighter)
+    own = events[(events['f1_url'] == fighter) | (events['f2_url'] == fighter)]
+    opponents = np.where(own['f1_url'] == fighter, own['f2_url'], own['f1_url'])
+    assert sorted(fights['fight_id']) == sorted(own['event_fight'].map(url_key))
+    assert (fights['fighter_id'] == url_key(fighter)).all()
+    assert sorted(fights['opponent_id']) == sorted(url_key(url) for url in opponents)
+    assert fights['date'].is_monotonic_increasing
+
+
+def test_fights_between_and_event_fights(store: Store, history: dict) -> None:
+    events = history['events']
+    store.upsert_events(events)
+    dates = events['date'].drop_duplicates().dt.strftime('%Y-%m-%d').tolist()
+
+    fights = store.fights_between(dates[1], dates[2])
+    assert len(fights) == 24
+    assert set(fights['date']) == {dates[1], dates[2]}
+    assert len(store.event_fights(events['event_url'][0])) == 12
+
+
+def test_time_of_the_fight_is_stored_in_seconds(store: Store, history: dict) -> None:
+    events = history['events'].iloc[:2].copy()
+    events['time'] = [datetime.time(4, 20), None]
+    store.upsert_events(events)
+
+    times = store.read('SELECT url, time_sec FROM fights ORDER BY url').set_index('url')['time_sec']
+    assert times[events['event_fight'].iloc[0]] == 260
+    assert pd.isna(times[events['event_fight'].iloc[1]])
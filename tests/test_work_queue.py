@@ -0,0 +1,133 @@
+import time
+import sqlite3
+from src.work_queue import WorkQueue
+
+
+def make_queue(tmp_path, **params) -> WorkQueue:
+    return WorkQueue(**{'queue_path': str(tmp_path / 'queue.sqlite'), 'lease_seconds': 60.0, 'max_attempts': 3,
+                        'shard_retry_delay': 0.05, 'shard_retry_max_delay': 0.15, **params})
+
+
+def available_at(queue: WorkQueue, shard_id: int) -> float:
+    return queue._conn.execute('SELECT available_at FROM shards WHERE id = ?', (shard_id,)).fetchone()[0]
+
+
+def test_add_splits_items_into_shards_and_skips_queued_ones(tmp_path) -> None:
+    queue = make_queue(tmp_path)
+
+    assert queue.add('events', [['date', f'url{num}'] for num in range(5)], 2) == 3
+    assert queue.add('events', [['date', 'url4'], ['date', 'url5']], 2) == 1
+    assert queue.add('fighters', [['name', 'url4']], 2) == 1
+    assert queue.stats() == {'events': {'pending': 4}, 'fighters': {'pending': 1}}
+    queue.close()
+
+
+def test_claim_leases_shards_in_order(tmp_path) -> None:
+    queue = make_queue(tmp_path)
+    queue.add('events', [['date', 'url1'], ['date', 'url2']], 1)
+
+    assert queue.claim('w1') == {'id': 1, 'kind': 'events', 'items': [['date', 'url1']], 'attempts': 1}
+    assert queue.claim('w2')['id'] == 2
+    assert queue.claim('w3') is None
+    assert queue.unfinished() == 2
+    queue.close()
+
+
+def test_expired_lease_is_claimed_by_another_worker(tmp_path) -> None:
+    queue = make_queue(tmp_path, lease_seconds=0.05)
+    queue.add('events', [['date', 'url1']], 1)
+    queue.claim('dead')
+    time.sleep(0.06)
+
+    shard = queue.claim('alive')
+    assert shard['id'] == 1 and shard['attempts'] == 2
+
+    # The stale worker can't renew, complete or fail the shard anymore
+    assert not queue.renew(1, 'dead')
+    assert not queue.complete(1, 'dead', 'dead.parquet')
+    queue.fail(1, 'dead', 'error')
+    assert queue.stats() == {'events': {'claimed': 1}}
+
+    assert queue.complete(1, 'alive', 'alive.parquet')
+    assert queue.outputs('events') == ['alive.parquet']
+    assert queue.unfinished() == 0
+    queue.close()
+
+
+def test_renew_extends_the_lease(tmp_path) -> None:
+    queue = make_queue(tmp_path, lease_seconds=0.1)
+    queue.add('events', [['date', 'url1']], 1)
+    queue.claim('w1')
+    time.sleep(0.06)
+
+    assert queue.renew(1, 'w1')
+    time.sleep(0.06)
+    assert queue.claim('w2') is None
+    queue.close()
+
+
+def test_failed_shard_waits_for_its_retry_delay(tmp_path) -> None:
+    queue = make_queue(tmp_path)
+    queue.add('events', [['date', 'url1'], ['date', 'url2']], 1)
+    queue.claim('w1')
+    start = time.time()
+    queue.fail(1, 'w1', 'site is down')
+
+    # The other shard is claimed first, the failed one only after the delay
+    assert queue.claim('w1')['id'] == 2
+    assert queue.claim('w1') is None
+    time.sleep(0.06)
+    assert queue.claim('w1')['id'] == 1
+
+    # Delay doubles with every attempt up to shard_retry_max_delay
+    queue.fail(1, 'w1', 'site is down')
+    assert 0.1 <= available_at(queue, 1) - start <= 0.1 + time.time() - start
+    queue.close()
+
+
+def test_shard_fails_after_max_attempts(tmp_path) -> None:
+    queue = make_queue(tmp_path, shard_retry_delay=0.0)
+    queue.add('events', [['date', 'url1']], 1)
+    for _ in range(3):
+        queue.fail(queue.claim('w1')['id'], 'w1', 'site is down')
+
+    assert queue.stats() == {'events': {'failed': 1}}
+    assert queue.claim('w1') is None
+    assert queue.unfinished() == 0
+    queue.close()
+
+
+def test_expired_lease_of_the_last_attempt_fails_the_shard(tmp_path) -> None:
+    queue = make_queue(tmp_path, lease_seconds=0.01, max_attempts=1)
+    queue.add('events', [['date', 'url1']], 1)
+    queue.claim('dead')
+    time.sleep(0.02)
+
+    assert queue.claim('alive') is None
+    assert queue.stats() == {'events': {'failed': 1}}
+    queue.close()
+
+
+def test_skipped_items_of_done_shards(tmp_path) -> None:
+    queue = make_queue(tmp_path)
+    queue.add('events', [['date', 'url1'], ['date', 'url2']], 1)
+    queue.complete(queue.claim('w1')['id'], 'w1', 'part1.parquet', ['fight1'])
+    queue.complete(queue.claim('w1')['id'], 'w1', 'part2.parquet')
+
+    assert queue.skipped() == {'events': ['fight1']}
+    assert queue.outputs('events') == ['part1.parquet', 'part2.parquet']
+    queue.close()
+
+
+def test_queue_without_retry_delay_column_is_upgraded(tmp_path) -> None:
+    conn = sqlite3.connect(str(tmp_path / 'queue.sqlite'))
+    conn.execute('CREATE TABLE shards (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, items TEXT NOT NULL, '
+                 'status TEXT NOT NULL, worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, '
+                 'output TEXT, error TEXT, updated REAL NOT NULL)')
+    conn.execute("INSERT INTO shards (kind, items, status, updated) VALUES ('events', '[]', 'pending', 0)")
+    conn.commit()
+    conn.close()
+
+    queue = make_queue(tmp_path)
+    assert queue.claim('w1')['id'] == 1
+    queue.close()
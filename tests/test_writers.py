@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from src.data_class import Links
+from src.schemas import dataset_schema
+from utils.scripts import open_writer, load_data
+from utils.writers import DatasetWriter, ExcelWriter, FeatherWriter, ParquetWriter, PartsWriter
+from benchmarks.bench_store import synthetic_history
+
+
+@pytest.fixture(scope='module')
+def history() -> dict:
+    return synthetic_history(12, 5, per_event=4)
+
+
+def expected(data: pd.DataFrame, schema: pa.Schema) -> pd.DataFrame:
+    """
+    :return: data converted to the declared schema, as every writer should store it
+    """
+    return pa.Table.from_pandas(data.reindex(columns=schema.names), schema=schema, preserve_index=False).to_pandas()
+
+
+def write(filename: str, data: pd.DataFrame, schema: pa.Schema, resumable: bool = False) -> DatasetWriter:
+    with open_writer(filename, schema, resumable=resumable) as writer:
+        # Chunks of the dataset are written one after another
+        writer.write(data.iloc[:len(data) // 2])
+        writer.write(data.iloc[len(data) // 2:])
+    return writer
+
+
+def test_dataset_writer_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        DatasetWriter('data.parquet', pa.schema([]))
+
+
+@pytest.mark.parametrize('dataset', ['fighter', 'events'])
+@pytest.mark.parametrize('extension, resumable, writer_cls', [('parquet', False, ParquetWriter),
+                                                              ('feather', False, FeatherWriter),
+                                                              ('parquet', True, PartsWriter),
+                                                              ('feather', True, PartsWriter)])
+def test_round_trip(tmp_path, monkeypatch: pytest.MonkeyPatch, history: dict, dataset: str, extension: str,
+                    resumable: bool, writer_cls: type) -> None:
+    monkeypatch.chdir(tmp_path)
+    data, schema = history[dataset], dataset_schema(dataset, Links())
+
+    writer = write(f'{dataset}.{extension}', data, schema, resumable)
+    assert type(writer) is writer_cls and writer.rows == len(data)
+
+    loaded = load_data(f'{dataset}.{extension}')
+    reference = expected(data, schema)
+    assert loaded.dtypes.to_dict() == reference.dtypes.to_dict()
+    pd.testing.assert_frame_equal(loaded, reference)
+
+
+def test_excel_round_trip(tmp_path, monkeypatch: pytest.MonkeyPatch, history: dict) -> None:
+    monkeypatch.chdir(tmp_path)
+    data, schema = history['fighter'], dataset_schema('fighter', Links())
+
+    assert type(write('fighter.xlsx', data, schema)) is ExcelWriter
+
+    loaded, reference = load_data('fighter.xlsx'), data.reset_index(drop=True)
+    assert loaded.columns.tolist() == reference.columns.tolist()
+    for column in ['Win', 'Loss', 'Draw', 'Age', 'Height', 'Weight', 'Reach', 'Str.Acc.%']:
+        assert np.issubdtype(loaded[column].dtype, np.number)
+        np.testing.assert_allclose(loaded[column], reference[column])
+    assert loaded['Fullname'].tolist() == reference['Fullname'].tolist()
+
+
+def test_missing_file_is_not_loaded(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    assert load_data('fighter.parquet') is None
@@ -1,23 +1,81 @@
 import os
 import logging
 import pandas as pd
-from typing import Any
+import pyarrow as pa
+from typing import Any, List, Optional, Union
+from src.metrics import Metrics
+from utils.writers import get_writer, read_data
 
 
-def save_data(filename: str, data: pd.DataFrame) -> None:
+def open_writer(filename: str, schema: Optional[pa.Schema] = None, resumable: bool = False,
+                resume: bool = False, metrics: Optional[Metrics] = None,
+                key: Optional[Union[str, List[str]]] = None) -> Any:
     """
-    This function saved parsed data.
+    This function opens a streaming writer of the dataset, the format is chosen by the file extension.
     :param filename: Filename
-    :param data: Saved DataFrame
-    :return: No return
+    :param schema: Declared schema of the dataset
+    :param resumable: Keep written chunks on disk, so an interrupted run can be resumed
+    :param resume: Continue the chunks of an interrupted run
+    :param metrics: Metrics of the run, written rows are counted
+    :param key: Columns identifying rows of a resumable writer, rows written again on resume are kept once
+    :return: Writer, chunks are passed to its write method
     """
     file_path = os.path.join(os.getcwd(), 'data')
 
     if not os.path.exists(file_path):
         os.makedirs(file_path)
 
-    save_path = os.path.join(file_path, filename)
-    data.to_excel(save_path, engine='xlsxwriter', index=False)
+    return get_writer(os.path.join(file_path, filename), schema, resumable=resumable, resume=resume,
+                      metrics=metrics, key=key)
+
+
+def save_data(filename: str, data: pd.DataFrame, schema: Optional[pa.Schema] = None,
+              metrics: Optional[Metrics] = None) -> None:
+    """
+    This function saved parsed data.
+    :param filename: Filename, .parquet, .feather or .xlsx
+    :param data: Saved DataFrame
+    :param schema: Declared schema of the dataset, inferred from the data if not passed
+    :param metrics: Metrics of the run, written rows are counted
+    :return: No return
+    """
+    if schema is None and not filename.endswith('.xlsx'):
+        schema = pa.Schema.from_pandas(data, preserve_index=False)
+
+    with open_writer(filename, schema, metrics=metrics) as writer:
+        writer.write(data)
+
+
+def load_data(filename: str) -> Optional[pd.DataFrame]:
+    """
+    This function loads previously saved data.
+    :param filename: Filename
+    :return: Saved DataFrame or None if the file does not exist
+    """
+    load_path = os.path.join(os.getcwd(), 'data', filename)
+
+    if not os.path.exists(load_path):
+        return None
+
+    return read_data(load_path)
+
+
+def merge_data(old_data: Optional[pd.DataFrame], new_data: pd.DataFrame,
+               key: Union[str, List[str]]) -> pd.DataFrame:
+    """
+    This function merges freshly parsed rows into the saved dataset. New rows replace old ones with the same key.
+    :param old_data: Saved DataFrame
+    :param new_data: Freshly parsed DataFrame
+    :param key: Column or columns identifying a row
+    :return: Merged DataFrame
+    """
+    if old_data is None or old_data.empty:
+        return new_data
+    if new_data.empty:
+        return old_data
+
+    data = pd.concat([old_data, new_data], ignore_index=True)
+    return data.drop_duplicates(subset=key, keep='last').reset_index(drop=True)
 
 
 def logger(log_name: str) -> Any:
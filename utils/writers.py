@@ -0,0 +1,215 @@
+import os
+import abc
+import time
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Any, List, Optional, Union
+from src.metrics import Metrics
+
+
+class DatasetWriter(abc.ABC):
+    """
+    Base output writer. Chunks of a dataset are written as they are parsed, the schema declares types
+    of the columns, so every chunk is stored the same way.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema, compression: str = 'zstd',
+                 metrics: Optional[Metrics] = None) -> None:
+        self.path, self.schema, self.compression, self.metrics = path, schema, compression, metrics
+        self.rows = 0
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def to_table(self, data: pd.DataFrame) -> pa.Table:
+        """
+        Convert the chunk to the declared schema, columns absent in the chunk are written as nulls.
+        """
+        data = data.reindex(columns=self.schema.names)
+        return pa.Table.from_pandas(data, schema=self.schema, preserve_index=False)
+
+    def write(self, data: pd.DataFrame) -> None:
+        start = time.perf_counter()
+        self.write_table(self.to_table(data))
+        self.written(len(data), time.perf_counter() - start)
+
+    def written(self, rows: int, seconds: Optional[float]) -> None:
+        """
+        Record rows and time of the written chunk in the metrics, None if the chunk is written on close.
+        """
+        if self.metrics is not None:
+            name, extension = os.path.splitext(os.path.basename(self.path))
+            self.metrics.inc('rows_written', rows, dataset=name, format=extension.lstrip('.'))
+            if seconds is not None:
+                self.metrics.observe('write_seconds', seconds, dataset=name, format=extension.lstrip('.'))
+
+    @abc.abstractmethod
+    def write_table(self, table: pa.Table) -> None:
+        """
+        Write the chunk converted to the declared schema.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetWriter(DatasetWriter):
+    """
+    Parquet file, every chunk becomes one or more row groups.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema, compression: str = 'zstd', row_group_size: int = 10000,
+                 metrics: Optional[Metrics] = None) -> None:
+        super().__init__(path, schema, compression, metrics)
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, schema, compression=compression)
+
+    def write_table(self, table: pa.Table) -> None:
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class FeatherWriter(DatasetWriter):
+    """
+    Arrow IPC (Feather v2) file, every chunk becomes a record batch.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema, compression: str = 'zstd',
+                 metrics: Optional[Metrics] = None) -> None:
+        super().__init__(path, schema, compression, metrics)
+        self.sink = pa.OSFile(path, 'wb')
+        self.writer = pa.ipc.new_file(self.sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def write_table(self, table: pa.Table) -> None:
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        self.writer.close()
+        self.sink.close()
+
+
+class ExcelWriter(DatasetWriter):
+    """
+    Excel workbook. The format can't be appended, so chunks are collected and written on close.
+    """
+
+    def __init__(self, path: str, schema: Optional[pa.Schema] = None, compression: Optional[str] = None,
+                 metrics: Optional[Metrics] = None) -> None:
+        super().__init__(path, schema, compression, metrics)
+        self.chunks = []
+
+    def write(self, data: pd.DataFrame) -> None:
+        self.chunks.append(data)
+        self.rows += len(data)
+        self.written(len(data), None)
+
+    def write_table(self, table: pa.Table) -> None:
+        self.write(table.to_pandas())
+
+    def close(self) -> None:
+        data = pd.concat(self.chunks, ignore_index=True) if self.chunks else pd.DataFrame()
+        data.to_excel(self.path, engine='xlsxwriter', index=False)
+
+
+class PartsWriter(DatasetWriter):
+    """
+    Resumable writer. Every chunk is written to its own parquet file in the parts folder next to the dataset,
+    so chunks written before a crash survive it. On close the parts are merged into the dataset one at a time.
+    A run killed after a part is written but before its pages are checkpointed writes them again on resume,
+    so rows of a key already merged are dropped.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema, compression: str = 'zstd', row_group_size: int = 10000,
+                 resume: bool = False, metrics: Optional[Metrics] = None,
+                 key: Optional[Union[str, List[str]]] = None) -> None:
+        super().__init__(path, schema, compression, metrics)
+        self.row_group_size, self.folder = row_group_size, path + '.parts'
+        self.key = [key] if isinstance(key, str) else key
+
+        # Parts of an interrupted run are kept when it is resumed, unfinished parts have the .tmp extension
+        if not resume and os.path.exists(self.folder):
+            shutil.rmtree(self.folder)
+        os.makedirs(self.folder, exist_ok=True)
+        self.parts = sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder)
+                            if name.endswith('.parquet'))
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        # A failed run leaves the parts for the resume
+        if exc_type is None:
+            self.close()
+
+    def write_table(self, table: pa.Table) -> None:
+        part = os.path.join(self.folder, f'part-{len(self.parts):05d}.parquet')
+        with ParquetWriter(part + '.tmp', self.schema, self.compression, self.row_group_size) as writer:
+            writer.write_table(table)
+        os.replace(part + '.tmp', part)
+        self.parts.append(part)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        seen = set()
+        with get_writer(self.path, self.schema, self.compression, self.row_group_size) as writer:
+            for part in self.parts:
+                table = pq.read_table(part, schema=self.schema)
+                if self.key:
+                    keys = list(zip(*[table.column(name).to_pylist() for name in self.key]))
+                    table = table.filter(pa.array([not (row in seen or seen.add(row)) for row in keys]))
+                writer.write_table(table)
+        shutil.rmtree(self.folder)
+
+
+def get_writer(path: str, schema: pa.Schema, compression: str = 'zstd', row_group_size: int = 10000,
+               resumable: bool = False, resume: bool = False, metrics: Optional[Metrics] = None,
+               key: Optional[Union[str, List[str]]] = None) -> Any:
+    """
+    This function chooses the writer by the file extension.
+    :param path: path of the output file
+    :param schema: declared schema of the dataset
+    :param compression: compression codec of parquet and feather files
+    :param row_group_size: max rows in a parquet row group
+    :param resumable: write chunks to parts which survive a crash, the file is assembled on close
+    :param resume: keep parts of an interrupted run
+    :param metrics: metrics of the run, rows and time of written chunks are recorded
+    :param key: columns identifying rows of a resumable writer, rows of a key written twice are kept once
+    :return: writer
+    """
+    extension = os.path.splitext(path)[1]
+
+    if resumable:
+        return PartsWriter(path, schema, compression, row_group_size, resume, metrics, key)
+
+    if extension == '.parquet':
+        return ParquetWriter(path, schema, compression, row_group_size, metrics)
+    if extension in ('.feather', '.arrow'):
+        return FeatherWriter(path, schema, compression, metrics)
+    if extension == '.xlsx':
+        return ExcelWriter(path, schema, metrics=metrics)
+
+    raise ValueError(f'Unknown output format: {extension}')
+
+
+def read_data(path: str) -> pd.DataFrame:
+    """
+    This function reads a dataset written by any of the writers.
+    :param path: path of the file
+    :return: DataFrame
+    """
+    extension = os.path.splitext(path)[1]
+
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension in ('.feather', '.arrow'):
+        return pd.read_feather(path)
+    if extension == '.xlsx':
+        return pd.read_excel(path)
+
+    raise ValueError(f'Unknown output format: {extension}')